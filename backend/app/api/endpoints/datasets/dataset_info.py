@@ -1,26 +1,53 @@
-from fastapi import APIRouter, HTTPException, Request, Header, Depends
-from typing import List
-from app.services.storage.mongodb_service import get_data_from_collection, get_dataset_card_info
-from app.schemas.models import DatasetInfoResponse, BrowseResponse, ManageResponse
+from fastapi import APIRouter, HTTPException, Request, Header, Depends, Query
+from typing import List, Optional
+from bson import ObjectId
+from app.services.storage.mongodb_service import get_data_from_collection, get_dataset_card_info, search_dataset_catalog
+from app.schemas.models import DatasetInfoResponse, BrowseResponse, ManageResponse, CatalogSearchResponse
 from app.auth.user_auth import get_current_user
+from app.services.query.row_formats import JSON, NotAcceptableError, encode_rows, negotiate_row_format, row_columns
+from app.utils.response_cache import cached_response
 
 dataset_info_router = APIRouter()
 
 
 @dataset_info_router.get("/datasets", response_model=BrowseResponse, operation_id="get_datasets")
-async def get_datasets(current_user: dict = Depends(get_current_user)) -> BrowseResponse:
-    datasets = get_dataset_card_info()
-    return BrowseResponse(data=datasets)
+def get_datasets(request: Request, current_user: dict = Depends(get_current_user)) -> BrowseResponse:
+    return cached_response(request, "datasets", current_user.get("_id"), {},
+                           lambda: BrowseResponse(data=get_dataset_card_info()))
 
 
 @dataset_info_router.get("/dataset", response_model=DatasetInfoResponse, operation_id="get_dataset_info")
-async def get_dataset_info(id: str, current_user: dict = Depends(get_current_user)) -> DatasetInfoResponse:
+def get_dataset_info(id: str, request: Request, current_user: dict = Depends(get_current_user)) -> DatasetInfoResponse:
+    """
+    Dataset details with a preview of its first rows.
+
+    Besides JSON, the response is available as columnar JSON, MessagePack or
+    an Arrow stream (see ``row_formats``); there the preview rows become
+    ``columns``/``data`` and the other details move to ``dataset``.
+    """
     try:
+        media_type = negotiate_row_format(request.headers.get("accept"))
+    except NotAcceptableError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+    def render_rows(response: DatasetInfoResponse) -> bytes:
+        detail = response.model_dump(mode="json", by_alias=True)
+        rows = detail["data"].pop("rows")
+        return encode_rows(media_type, row_columns(rows), rows,
+                           {"status": detail["status"], "dataset": detail["data"]})
+
+    def build() -> DatasetInfoResponse:
         dataset = get_data_from_collection(dataset_id=id)
         if not dataset or dataset == []:
             raise HTTPException(status_code=404, detail="Dataset not found")
         return DatasetInfoResponse(status="success", data=dataset)
 
+    try:
+        if media_type == JSON:
+            return cached_response(request, "dataset", current_user.get("_id"), {"id": id}, build)
+        return cached_response(request, "dataset", current_user.get("_id"), {"id": id}, build,
+                               media_type=media_type, render=render_rows)
+
     except HTTPException:
         raise
     except Exception as e:
@@ -29,7 +56,7 @@ async def get_dataset_info(id: str, current_user: dict = Depends(get_current_use
 
 
 @dataset_info_router.get("/user/datasets", response_model=ManageResponse, operation_id="get_user_datasets")
-async def get_user_datasets(current_user: dict = Depends(get_current_user)) -> ManageResponse:
+def get_user_datasets(request: Request, current_user: dict = Depends(get_current_user)) -> ManageResponse:
     try:
         # Get the user's MongoDB _id from the current_user
         user_id = current_user.get("_id")
@@ -37,11 +64,42 @@ async def get_user_datasets(current_user: dict = Depends(get_current_user)) -> M
             raise HTTPException(
                 status_code=401, detail="Missing user id from token")
 
-        datasets = get_dataset_card_info(user_id=str(user_id))
-        return ManageResponse(data=datasets)
+        return cached_response(request, "user/datasets", user_id, {},
+                               lambda: ManageResponse(data=get_dataset_card_info(user_id=str(user_id))))
 
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@dataset_info_router.get("/datasets/search", response_model=CatalogSearchResponse, operation_id="search_datasets")
+def search_datasets(
+    q: Optional[str] = None,
+    tags: List[str] = Query(default=[]),
+    dataset_type: Optional[str] = None,
+    is_temporal: Optional[bool] = None,
+    is_spatial: Optional[bool] = None,
+    owner: Optional[str] = None,
+    limit: int = Query(default=20, ge=1, le=100),
+    skip: int = Query(default=0, ge=0),
+    current_user: dict = Depends(get_current_user),
+) -> CatalogSearchResponse:
+    if owner and not ObjectId.is_valid(owner):
+        raise HTTPException(status_code=400, detail="Invalid owner id")
+    try:
+        result = search_dataset_catalog(
+            query=q,
+            tags=tags,
+            dataset_type=dataset_type,
+            is_temporal=is_temporal,
+            is_spatial=is_spatial,
+            owner=owner,
+            limit=limit,
+            skip=skip,
+        )
+        return CatalogSearchResponse(**result)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Internal server error: {str(e)}")
@@ -1,11 +1,14 @@
+import asyncio
 import uuid
 import mimetypes
 import pandas as pd
-from io import BytesIO
 from datetime import datetime, timezone
 from pymongo.collection import Collection
 from bson import ObjectId
-from fastapi import APIRouter, HTTPException, Depends
+from typing import List, Literal, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Header
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from app.auth.user_auth import get_current_user
 from app.schemas.models import (
     CreateDatasetInformationRequest,
@@ -15,10 +18,30 @@ from app.schemas.models import (
     ExtractAndStoreResponse,
     DatasetColumnsResponse,
     DatasetColumnsRequest,
+    DatasetColumnValuesResponse,
+    DatasetSnapshotResponse,
+    DatasetProfileResponse,
+    ApproximateStatsResponse,
+    IngestJobResponse,
+    ColumnSearchResponse,
+    ColumnDatasetsResponse,
 )
 from app.db.database import files as files_collection, datasets_collection, dataset_information_collection
-from app.services.storage.mongodb_service import store_to_mongodb
+from app.services.storage.mongodb_service import get_accessible_dataset_info, store_to_mongodb
 from app.services.storage.storage_factory import get_storage_service
+from app.services.storage.columnar_service import load_columns
+from app.services.storage.profile_service import get_dataset_profile
+from app.services.storage.sketch_service import get_approximate_stats
+from app.utils.response_cache import bump_catalog_version
+from app.utils.fast_json import trusted_response
+from app.utils.idempotency import run_idempotent, IdempotencyKeyReused, IdempotencyKeyInProgress
+from app.services.ingest.ingest_jobs import create_ingest_job, get_ingest_job, resolve_dataset_id, TERMINAL_STATUSES
+from app.services.storage.column_catalog_service import (
+    has_column_catalog,
+    get_catalog_columns,
+    search_columns,
+    find_datasets_with_column,
+)
 
 datasets_router = APIRouter()
 
@@ -32,104 +55,167 @@ def get_presigned_url(filename: str, current_user: dict = Depends(get_current_us
     return PresignedURLResponse(upload_url=url, object_name=object_name)
 
 
-@datasets_router.post("/datasets/create", response_model=CreateDatasetInformationResponse, operation_id="create_dataset")
-async def create_dataset(request: CreateDatasetInformationRequest, current_user: dict = Depends(get_current_user)) -> CreateDatasetInformationResponse:
+def _run_idempotent(scope: str, idempotency_key: Optional[str], current_user: dict, payload: dict, run) -> dict:
     try:
-        dataset_doc = datasets_collection.find_one(
-            {"_id": ObjectId(request.dataset_id)})
+        return run_idempotent(scope, idempotency_key, current_user.get("_id"), payload, run)
+    except IdempotencyKeyReused as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except IdempotencyKeyInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@datasets_router.post("/datasets/create", response_model=CreateDatasetInformationResponse, operation_id="create_dataset")
+async def create_dataset(
+    request: CreateDatasetInformationRequest,
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+    current_user: dict = Depends(get_current_user),
+) -> CreateDatasetInformationResponse:
+    """Create dataset information. Retries with the same Idempotency-Key return the original id."""
+    def create() -> dict:
+        try:
+            # Deduplicated uploads point at the dataset that holds the data
+            dataset_id = resolve_dataset_id(ObjectId(request.dataset_id))
+            dataset_doc = datasets_collection.find_one(
+                {"_id": dataset_id}, {"snapshot": 1, "columns": 1})
+
+            if not dataset_doc:
+                raise HTTPException(
+                    status_code=404, detail="Dataset not found in datasets_collection")
+
+            dataset_info = {
+                "_id": ObjectId(),
+                "dataset_id": dataset_id,
+                "file_id": ObjectId(request.file_id) if request.file_id else None,
+                "dataset_name": request.dataset_name,
+                "description": request.description,
+                "permission": request.permission,
+                "dataset_type": request.dataset_type,
+                "tags": request.tags,
+                "is_temporal": request.is_temporal,
+                "is_spatial": request.is_spatial,
+                "temporal_granularities": request.temporal_granularities,
+                "spatial_granularities": request.spatial_granularities,
+                "location_columns": request.location_columns,
+                "time_columns": request.time_columns,
+                "pulled_from_pipeline": False,
+                "pipeline_id": None,  # null for manual datasets
+                "snapshot": dataset_doc.get("snapshot"),
+                "columns": dataset_doc.get("columns", []),
+                "user_id": [ObjectId(current_user.get("_id"))],
+                "created_at": datetime.utcnow(),
+                "updated_at": datetime.utcnow(),
+            }
+
+            dataset_information_collection.insert_one(dataset_info)
+            bump_catalog_version()
 
-        if not dataset_doc:
+            return CreateDatasetInformationResponse(status="success", id=str(dataset_info["_id"])).model_dump()
+
+        except Exception as e:
             raise HTTPException(
-                status_code=404, detail="Dataset not found in datasets_collection")
-
-        dataset_info = {
-            "_id": ObjectId(),
-            "dataset_id": ObjectId(request.dataset_id),
-            "file_id": ObjectId(request.file_id) if request.file_id else None,
-            "dataset_name": request.dataset_name,
-            "description": request.description,
-            "permission": request.permission,
-            "dataset_type": request.dataset_type,
-            "tags": request.tags,
-            "is_temporal": request.is_temporal,
-            "is_spatial": request.is_spatial,
-            "temporal_granularities": request.temporal_granularities,
-            "spatial_granularities": request.spatial_granularities,
-            "location_columns": request.location_columns,
-            "time_columns": request.time_columns,
-            "pulled_from_pipeline": False,
-            "pipeline_id": None,  # null for manual datasets
-            "user_id": [ObjectId(current_user.get("_id"))],
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow(),
-        }
-
-        dataset_information_collection.insert_one(dataset_info)
-
-        return CreateDatasetInformationResponse(status="success", id=str(dataset_info["_id"]))
-
-    except Exception as e:
-        raise HTTPException(
-            status_code=500, detail=f"Internal server error: {str(e)}")
+                status_code=500, detail=f"Internal server error: {str(e)}")
 
+    # A repeated request may wait for the original one, so keep it off the event loop
+    response = await run_in_threadpool(
+        _run_idempotent, "datasets/create", idempotency_key, current_user, request.model_dump(), create)
+    return CreateDatasetInformationResponse(**response)
 
-@datasets_router.post("/datasets/extract", response_model=ExtractAndStoreResponse, operation_id="extract_dataset")
-def extract_csv(request: ExtractCsvDataRequest, current_user: dict = Depends(get_current_user)) -> ExtractAndStoreResponse:
-    new_file_id = ObjectId()
-    dataset_id = ObjectId()
-    storage_service = get_storage_service()
 
-    response = storage_service.get_object(object_name=request.file_object)
-    if not response:
-        raise HTTPException(status_code=404, detail="File not found in storage backend")
+@datasets_router.post("/datasets/extract", response_model=ExtractAndStoreResponse, operation_id="extract_dataset")
+def extract_csv(
+    request: ExtractCsvDataRequest,
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+    current_user: dict = Depends(get_current_user),
+) -> ExtractAndStoreResponse:
+    """
+    Start ingesting an uploaded file in the background.
 
-    file_content = response.read()
-    file_type = mimetypes.guess_type(request.file_object)[
-        0] or "application/octet-stream"
-    file_size = len(file_content)
+    The file and dataset IDs are returned immediately and can be used with
+    /datasets/create right away; progress is available from
+    /datasets/extract/{job_id} and /datasets/extract/{job_id}/events.
+    Retries with the same Idempotency-Key return the original job.
+    """
+    def start() -> dict:
+        try:
+            file_size = get_storage_service().get_object_size(request.file_object)
+        except Exception:
+            raise HTTPException(status_code=404, detail="File not found in storage backend")
 
-    response.close()
-    response.release_conn()
+        job = create_ingest_job(request.file_object, file_size, current_user.get("_id"))
+        return ExtractAndStoreResponse(status="queued", file_id=str(job["file_id"]),
+                                       dataset_id=str(job["dataset_id"]), job_id=str(job["_id"])).model_dump()
 
-    current_time = datetime.now(timezone.utc).isoformat()
-    file_metadata = {
-        "_id": new_file_id,
-        "file_location": request.file_object,
-        "file_type": file_type,
-        "file_size": file_size,
-        "user_id": current_user.get("_id"),
-        "created_at": current_time,
-        "updated_at": current_time,
-    }
+    return ExtractAndStoreResponse(
+        **_run_idempotent("datasets/extract", idempotency_key, current_user, request.model_dump(), start))
 
-    files_collection.insert_one(file_metadata)
 
-    try:
-        df = pd.read_csv(BytesIO(file_content))
-    except Exception as e:
-        raise HTTPException(
-            status_code=400, detail=f"Error parsing CSV: {str(e)}")
-
-    dataset_records = df.to_dict(orient="records")
-    current_time = datetime.now(timezone.utc).isoformat()
-    datasets_collection.insert_one(
-        {
-            "_id": ObjectId(dataset_id),
-            "data": dataset_records,
-            "columns": df.columns.to_list(),
-            "record_count": len(dataset_records),
-            "created_at": current_time,
-            "updated_at": current_time,
-        }
+def _job_response(job: dict) -> IngestJobResponse:
+    return IngestJobResponse(
+        job_id=str(job["_id"]),
+        status=job["status"],
+        phase=job.get("phase"),
+        file_object=job["file_object"],
+        file_id=str(job["file_id"]),
+        dataset_id=str(job["dataset_id"]),
+        duplicate_of=str(job["duplicate_of"]) if job.get("duplicate_of") else None,
+        file_size=job.get("file_size", 0),
+        bytes_read=job.get("bytes_read", 0),
+        rows_parsed=job.get("rows_parsed", 0),
+        rows_written=job.get("rows_written", 0),
+        error=job.get("error"),
+        created_at=job["created_at"],
+        updated_at=job["updated_at"],
     )
 
-    return ExtractAndStoreResponse(status="success", file_id=str(new_file_id), dataset_id=str(dataset_id))
+
+def _find_job(job_id: str, current_user: dict) -> dict:
+    job = get_ingest_job(ObjectId(job_id), current_user.get("_id")) if ObjectId.is_valid(job_id) else None
+    if not job:
+        raise HTTPException(status_code=404, detail="Ingest job not found")
+    return job
+
+
+@datasets_router.get("/datasets/extract/{job_id}", response_model=IngestJobResponse, operation_id="get_ingest_job")
+def get_extract_job(job_id: str, current_user: dict = Depends(get_current_user)) -> IngestJobResponse:
+    return _job_response(_find_job(job_id, current_user))
+
+
+@datasets_router.get("/datasets/extract/{job_id}/events", operation_id="stream_ingest_job")
+async def stream_extract_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Server-sent events with the job state whenever it changes, until the job finishes."""
+    job = await run_in_threadpool(_find_job, job_id, current_user)
+
+    async def events():
+        current = job
+        last_update = None
+        while True:
+            if current["updated_at"] != last_update:
+                last_update = current["updated_at"]
+                yield f"data: {_job_response(current).model_dump_json()}\n\n"
+            if current["status"] in TERMINAL_STATUSES:
+                return
+            await asyncio.sleep(0.5)
+            current = await run_in_threadpool(get_ingest_job, job["_id"], current_user.get("_id"))
+            if current is None:
+                # The job was deleted while it was being watched
+                return
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 
 @datasets_router.get("/datasets/columns", response_model=DatasetColumnsResponse, operation_id="get_dataset_columns")
 def get_dataset_columns(dataset_id: str, search: str = None, current_user: dict = Depends(get_current_user)) -> DatasetColumnsResponse:
-    # Fetch dataset metadata
-    dataset = datasets_collection.find_one({"_id": dataset_id})
+    if not ObjectId.is_valid(dataset_id):
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+    # Prefix match on the column catalog index
+    columns = get_catalog_columns(ObjectId(dataset_id), prefix=search, limit=10)
+    if columns or has_column_catalog(ObjectId(dataset_id)):
+        return DatasetColumnsResponse(columns=columns)
+
+    # Datasets ingested before the column catalog existed
+    dataset = datasets_collection.find_one(
+        {"_id": ObjectId(dataset_id)}, {"columns": 1})
     if not dataset:
         raise HTTPException(status_code=404, detail="Dataset not found")
 
@@ -137,8 +223,94 @@ def get_dataset_columns(dataset_id: str, search: str = None, current_user: dict
 
     # Apply filtering if search is provided
     if search:
-        filtered = [col for col in all_columns if search.lower()
-                    in col.lower()]
+        filtered = [col for col in all_columns if col.lower().startswith(search.lower())]
         filtered = filtered[:10]
         return DatasetColumnsResponse(columns=filtered)
     return DatasetColumnsResponse(columns=all_columns[:10])
+
+
+@datasets_router.get("/columns/search", response_model=ColumnSearchResponse, operation_id="search_columns")
+def search_catalog_columns(prefix: str = "", limit: int = Query(default=10, ge=1, le=100), current_user: dict = Depends(get_current_user)) -> ColumnSearchResponse:
+    return ColumnSearchResponse(columns=search_columns(prefix, limit=limit))
+
+
+@datasets_router.get("/columns/datasets", response_model=ColumnDatasetsResponse, operation_id="get_datasets_with_column")
+def get_datasets_with_column(column: str, limit: int = Query(default=100, ge=1, le=1000), current_user: dict = Depends(get_current_user)) -> ColumnDatasetsResponse:
+    return ColumnDatasetsResponse(datasets=find_datasets_with_column(column, limit=limit))
+
+
+@datasets_router.get("/datasets/{dataset_id}/column-values", response_model=DatasetColumnValuesResponse, operation_id="get_dataset_column_values")
+def get_dataset_column_values(dataset_id: str, columns: List[str] = Query(...), limit: Optional[int] = None, current_user: dict = Depends(get_current_user)) -> DatasetColumnValuesResponse:
+    if not get_accessible_dataset_info(dataset_id, str(current_user["_id"])):
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+    dataset = datasets_collection.find_one(
+        {"_id": ObjectId(dataset_id)}, {"columns": 1, "record_count": 1})
+    if not dataset:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+    unknown = [col for col in columns if col not in dataset.get("columns", [])]
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown columns: {', '.join(unknown)}")
+
+    values = load_columns(ObjectId(dataset_id), columns, max_rows=limit)
+    return trusted_response(DatasetColumnValuesResponse, {
+        "dataset_id": dataset_id, "record_count": dataset.get("record_count", 0), "columns": values})
+
+
+@datasets_router.get("/datasets/{dataset_id}/snapshot", response_model=DatasetSnapshotResponse, operation_id="get_dataset_snapshot")
+def get_dataset_snapshot(dataset_id: str, format: Literal["parquet", "arrow"] = "parquet", current_user: dict = Depends(get_current_user)) -> DatasetSnapshotResponse:
+    info_doc = get_accessible_dataset_info(
+        dataset_id, str(current_user["_id"]), {"snapshot": 1})
+    if not info_doc:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+    snapshot = info_doc.get("snapshot") or {}
+    object_name = snapshot.get(f"{format}_object")
+    if not object_name:
+        raise HTTPException(
+            status_code=404, detail=f"No {format} snapshot available for this dataset")
+
+    storage_service = get_storage_service()
+    return DatasetSnapshotResponse(
+        dataset_id=dataset_id,
+        format=format,
+        download_url=storage_service.generate_download_url(object_name),
+        record_count=snapshot.get("record_count", 0),
+        created_at=snapshot.get("created_at"),
+    )
+
+
+@datasets_router.get("/datasets/{dataset_id}/profile", response_model=DatasetProfileResponse, operation_id="get_dataset_profile")
+def get_dataset_profile_endpoint(dataset_id: str, current_user: dict = Depends(get_current_user)) -> DatasetProfileResponse:
+    if not get_accessible_dataset_info(dataset_id, str(current_user["_id"])):
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+    profile = get_dataset_profile(dataset_id)
+    if not profile:
+        raise HTTPException(
+            status_code=404, detail="No profile available for this dataset")
+
+    return DatasetProfileResponse(
+        dataset_id=dataset_id,
+        record_count=profile.get("record_count", 0),
+        created_at=profile.get("created_at"),
+        columns=profile.get("columns", []),
+    )
+
+
+@datasets_router.get("/datasets/{dataset_id}/approx-stats", response_model=ApproximateStatsResponse, operation_id="get_dataset_approx_stats")
+def get_dataset_approx_stats(dataset_id: str, column: str, quantiles: List[float] = Query(default=[]), current_user: dict = Depends(get_current_user)) -> ApproximateStatsResponse:
+    if not get_accessible_dataset_info(dataset_id, str(current_user["_id"])):
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    if any(q < 0 or q > 1 for q in quantiles):
+        raise HTTPException(
+            status_code=400, detail="Quantiles must be between 0 and 1")
+
+    stats = get_approximate_stats(ObjectId(dataset_id), column, quantiles)
+    if stats is None:
+        raise HTTPException(
+            status_code=404, detail="No statistics available for this column")
+
+    return ApproximateStatsResponse(dataset_id=dataset_id, column=column, **stats)
@@ -0,0 +1,106 @@
+import csv
+import io
+import json
+import math
+import re
+import unicodedata
+import zlib
+from typing import Any, Dict, Iterator, List, Literal
+from urllib.parse import quote
+from bson import ObjectId
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
+from app.auth.user_auth import get_current_user
+from app.config.settings import get_settings
+from app.db.database import datasets_collection
+from app.services.storage.columnar_service import iter_dataset_rows
+from app.services.storage.mongodb_service import get_accessible_dataset_info
+
+export_router = APIRouter()
+
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def _clean(value: Any) -> Any:
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _encode_csv(columns: List[str], batches: Iterator[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue().encode("utf-8")
+
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([[_clean(row.get(col)) for col in columns] for row in batch])
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _encode_ndjson(columns: List[str], batches: Iterator[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    for batch in batches:
+        lines = [json.dumps({col: _clean(row.get(col)) for col in columns}, default=str) for row in batch]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _content_disposition(filename: str) -> str:
+    """
+    Attachment header for a user-supplied file name.
+
+    Header values must be latin-1 and a quote or line break would end the
+    value early, so ``filename`` gets an ASCII-only copy and the full name is
+    sent percent-encoded in ``filename*`` (RFC 6266), which clients prefer.
+    """
+    filename = "".join(char for char in filename if char.isprintable())
+    fallback = unicodedata.normalize("NFKD", filename).encode("ascii", "ignore").decode("ascii")
+    fallback = re.sub(r"[^A-Za-z0-9 ._()-]", "_", fallback)
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
+def _gzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        # Sync-flush every batch so bytes reach the client as they are encoded
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+@export_router.get("/datasets/{dataset_id}/export", operation_id="export_dataset")
+def export_dataset(
+    dataset_id: str,
+    format: Literal["csv", "ndjson"] = "csv",
+    gzip: bool = False,
+    current_user: dict = Depends(get_current_user),
+) -> StreamingResponse:
+    """
+    Stream a full dataset as CSV or NDJSON.
+
+    Rows are read from a batched cursor and encoded batch by batch, so memory
+    use does not depend on the size of the dataset.
+    """
+    info_doc = get_accessible_dataset_info(
+        dataset_id, str(current_user["_id"]), {"dataset_name": 1})
+    if not info_doc:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+    data_doc = datasets_collection.find_one(
+        {"_id": ObjectId(dataset_id)}, {"columns": 1})
+    if not data_doc:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+    columns = data_doc.get("columns", [])
+    batches = iter_dataset_rows(
+        ObjectId(dataset_id), batch_size=get_settings().export_batch_size)
+    encoder = _encode_csv if format == "csv" else _encode_ndjson
+    body = encoder(columns, batches)
+
+    filename = f"{info_doc.get('dataset_name') or dataset_id}.{format}"
+    headers = {"Content-Disposition": _content_disposition(filename)}
+    if gzip:
+        body = _gzip(body)
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(body, media_type=MEDIA_TYPES[format], headers=headers)
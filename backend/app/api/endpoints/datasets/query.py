@@ -0,0 +1,90 @@
+from bson import ObjectId
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from app.auth.user_auth import get_current_user
+from app.db.database import datasets_collection, dataset_column_chunks_collection
+from app.schemas.models import SqlQueryRequest, SqlQueryResponse, RowsQueryRequest, RowsQueryResponse
+from app.services.query.sql_engine import run_sql_query, QueryError, DatasetAccessError
+from app.services.query.pipeline_builder import build_rows_pipeline, result_column_types, PipelineBuildError
+from app.services.query.raw_rows import aggregate_columns, aggregate_table
+from app.services.storage.mongodb_service import get_accessible_dataset_info
+from app.services.query.row_formats import (
+    ARROW_STREAM, JSON, NotAcceptableError, encode_arrow_table, encode_columns, encode_rows, negotiate_row_format,
+)
+from app.utils.fast_json import dumps, trusted_response
+
+query_router = APIRouter()
+
+
+def _row_format(fastapi_request: Request) -> str:
+    """Response format from the Accept header: JSON, columnar JSON, MessagePack or Arrow."""
+    try:
+        return negotiate_row_format(fastapi_request.headers.get("accept"))
+    except NotAcceptableError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+
+@query_router.post("/datasets/query", response_model=SqlQueryResponse, operation_id="query_datasets")
+def query_datasets(request: SqlQueryRequest, fastapi_request: Request, current_user: dict = Depends(get_current_user)) -> SqlQueryResponse:
+    media_type = _row_format(fastapi_request)
+    try:
+        result = run_sql_query(
+            sql=request.sql,
+            datasets=request.datasets,
+            user_id=str(current_user.get("_id")),
+            limit=request.limit,
+        )
+        if media_type != JSON:
+            fields = {key: result[key] for key in ("row_count", "truncated", "elapsed_ms")}
+            return Response(encode_rows(media_type, result["columns"], result["rows"], fields), media_type=media_type)
+        # Result rows come straight from the query engine
+        return trusted_response(SqlQueryResponse, result)
+    except DatasetAccessError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except QueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@query_router.post("/datasets/{dataset_id}/rows", response_model=RowsQueryResponse, operation_id="query_dataset_rows")
+def query_dataset_rows(dataset_id: str, request: RowsQueryRequest, fastapi_request: Request, current_user: dict = Depends(get_current_user)) -> RowsQueryResponse:
+    media_type = _row_format(fastapi_request)
+    info_doc = get_accessible_dataset_info(dataset_id, str(current_user.get("_id")))
+    if not info_doc:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+    data_doc = datasets_collection.find_one(
+        {"_id": ObjectId(dataset_id)}, {"columns": 1, "columnar": 1, "column_types": 1})
+    if not data_doc:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+    aggregates = [a.model_dump() for a in request.aggregates]
+    try:
+        pipeline, output_columns = build_rows_pipeline(
+            dataset_id=ObjectId(dataset_id),
+            dataset_columns=data_doc.get("columns", []),
+            filters=[f.model_dump() for f in request.filters],
+            sort=[s.model_dump() for s in request.sort],
+            group_by=request.group_by,
+            aggregates=aggregates,
+            columns=request.columns,
+            limit=request.limit,
+            offset=request.offset,
+            columnar=bool(data_doc.get("columnar")),
+        )
+    except PipelineBuildError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Results are decoded from raw BSON and encoded column by column, without
+    # a validated model in between
+    column_types = result_column_types(data_doc.get("column_types"), output_columns, request.group_by, aggregates)
+    collection = dataset_column_chunks_collection if data_doc.get("columnar") else datasets_collection
+    if media_type == ARROW_STREAM:
+        table = aggregate_table(collection, pipeline, output_columns, column_types)
+        return Response(encode_arrow_table(table, {"row_count": table.num_rows}), media_type=media_type)
+
+    values = aggregate_columns(collection, pipeline, output_columns, column_types)
+    row_count = len(values[0]) if values else 0
+    if media_type != JSON:
+        return Response(encode_columns(media_type, output_columns, values, {"row_count": row_count}),
+                        media_type=media_type)
+    rows = [dict(zip(output_columns, row)) for row in zip(*values)]
+    return Response(dumps({"columns": output_columns, "rows": rows, "row_count": row_count}), media_type=JSON)
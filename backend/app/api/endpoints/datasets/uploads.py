@@ -0,0 +1,100 @@
+import math
+from fastapi import APIRouter, HTTPException, Depends
+from app.auth.user_auth import get_current_user
+from app.config.settings import get_settings
+from app.schemas.models import (
+    MultipartUploadCreateRequest,
+    MultipartUploadCreateResponse,
+    MultipartPartUrlsRequest,
+    MultipartPartUrlsResponse,
+    MultipartPartUrl,
+    MultipartUploadedPartsResponse,
+    MultipartUploadCompleteRequest,
+    MultipartUploadCompleteResponse,
+    MultipartUploadAbortRequest,
+)
+from app.services.storage.base_storage import MAX_PART_COUNT, plan_part_size
+from app.services.storage.storage_factory import get_storage_service
+
+uploads_router = APIRouter()
+
+
+def _check_owner(object_name: str, current_user: dict) -> None:
+    if not object_name.startswith(f"{current_user.get('_id')}/"):
+        raise HTTPException(status_code=403, detail="Upload does not belong to this user")
+
+
+def _part_urls(storage_service, object_name: str, upload_id: str, part_numbers):
+    urls = storage_service.generate_part_upload_urls(object_name, upload_id, list(part_numbers))
+    return [MultipartPartUrl(part_number=number, url=url) for number, url in urls.items()]
+
+
+@uploads_router.post("/uploads/multipart", response_model=MultipartUploadCreateResponse, operation_id="create_multipart_upload")
+def create_multipart_upload(request: MultipartUploadCreateRequest, current_user: dict = Depends(get_current_user)) -> MultipartUploadCreateResponse:
+    """
+    Start a multipart upload and presign a PUT URL for every part.
+
+    The client uploads ``part_size`` byte slices of the file to the part URLs
+    in parallel, keeps the ETag response header of each part, and finishes
+    with /uploads/multipart/complete. The resulting object name is used with
+    /datasets/extract like a single-PUT upload.
+    """
+    part_size = plan_part_size(request.file_size, get_settings().multipart_part_size)
+    part_count = max(1, math.ceil(request.file_size / part_size))
+    if part_count > MAX_PART_COUNT:
+        raise HTTPException(status_code=400, detail="File is too large for a multipart upload")
+
+    storage_service = get_storage_service()
+    object_name = storage_service.build_object_name(request.filename, str(current_user.get("_id")))
+    upload_id = storage_service.create_multipart_upload(object_name)
+
+    return MultipartUploadCreateResponse(
+        object_name=object_name,
+        upload_id=upload_id,
+        part_size=part_size,
+        parts=_part_urls(storage_service, object_name, upload_id, range(1, part_count + 1)),
+    )
+
+
+@uploads_router.post("/uploads/multipart/urls", response_model=MultipartPartUrlsResponse, operation_id="get_multipart_part_urls")
+def get_multipart_part_urls(request: MultipartPartUrlsRequest, current_user: dict = Depends(get_current_user)) -> MultipartPartUrlsResponse:
+    """Presign fresh part URLs, e.g. to resume an upload after the first ones expired."""
+    _check_owner(request.object_name, current_user)
+    if any(number < 1 or number > MAX_PART_COUNT for number in request.part_numbers):
+        raise HTTPException(status_code=400, detail=f"Part numbers must be between 1 and {MAX_PART_COUNT}")
+    storage_service = get_storage_service()
+    return MultipartPartUrlsResponse(
+        parts=_part_urls(storage_service, request.object_name, request.upload_id, request.part_numbers))
+
+
+@uploads_router.get("/uploads/multipart/parts", response_model=MultipartUploadedPartsResponse, operation_id="list_multipart_parts")
+def list_multipart_parts(object_name: str, upload_id: str, current_user: dict = Depends(get_current_user)) -> MultipartUploadedPartsResponse:
+    """Parts already uploaded, so an interrupted upload only re-sends the missing ones."""
+    _check_owner(object_name, current_user)
+    try:
+        parts = get_storage_service().list_uploaded_parts(object_name, upload_id)
+    except Exception as e:
+        raise HTTPException(status_code=404, detail=f"Upload not found: {str(e)}")
+    return MultipartUploadedPartsResponse(parts=parts)
+
+
+@uploads_router.post("/uploads/multipart/complete", response_model=MultipartUploadCompleteResponse, operation_id="complete_multipart_upload")
+def complete_multipart_upload(request: MultipartUploadCompleteRequest, current_user: dict = Depends(get_current_user)) -> MultipartUploadCompleteResponse:
+    _check_owner(request.object_name, current_user)
+    storage_service = get_storage_service()
+    try:
+        location = storage_service.complete_multipart_upload(
+            request.object_name, request.upload_id, [part.model_dump() for part in request.parts])
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not complete upload: {str(e)}")
+    return MultipartUploadCompleteResponse(object_name=request.object_name, location=location)
+
+
+@uploads_router.post("/uploads/multipart/abort", operation_id="abort_multipart_upload")
+def abort_multipart_upload(request: MultipartUploadAbortRequest, current_user: dict = Depends(get_current_user)):
+    _check_owner(request.object_name, current_user)
+    try:
+        get_storage_service().abort_multipart_upload(request.object_name, request.upload_id)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not abort upload: {str(e)}")
+    return {"status": "aborted"}
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends, HTTPException, Response
+
+from app.auth.user_auth import require_admin
+from app.db.database import request_profiles_collection
+
+profiles_router = APIRouter()
+
+
+@profiles_router.get("/profiles/{request_id}", operation_id="get_request_profile")
+def get_request_profile(request_id: str, current_user: dict = Depends(require_admin)) -> Response:
+    """Profile of a request that was made with the X-Profile header or _profile parameter (admins only)."""
+    profile = request_profiles_collection.find_one({"_id": request_id}, {"content": 1, "media_type": 1})
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return Response(content=profile["content"], media_type=profile["media_type"])
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi import APIRouter, HTTPException, Depends, Request, Header
 from datetime import datetime
 from app.db.database import pipelines_collection, pipelines_history_collection, users_collection
 from app.services.storage.mongodb_service import get_pipelines
 from app.schemas.models import RunPipelineRequest, PipelineStatus, RunPipelineResponse, GetPipelinesResponse
 from app.services.tasks.task_executor import submit_task
 from app.auth.user_auth import get_current_user, get_user_details
+from app.utils.response_cache import cached_response
+from app.utils.idempotency import run_idempotent, IdempotencyKeyReused, IdempotencyKeyInProgress
 from typing import Optional
 from bson import ObjectId
 
@@ -12,22 +14,38 @@ run_router = APIRouter()
 
 
 @run_router.get("/pipelines", response_model=GetPipelinesResponse, operation_id="get_pipelines")
-def get_pipelines_endpoint(current_user: dict = Depends(get_current_user)) -> GetPipelinesResponse:
-    pipelines = get_pipelines()
-    return GetPipelinesResponse(data=pipelines)
+def get_pipelines_endpoint(request: Request, current_user: dict = Depends(get_current_user)) -> GetPipelinesResponse:
+    return cached_response(request, "pipelines", current_user.get("_id"), {},
+                           lambda: GetPipelinesResponse(data=get_pipelines()))
 
 
 @run_router.post("/pipelines/run", response_model=RunPipelineResponse, operation_id="run_pipeline")
-def run_pipeline(request: RunPipelineRequest, fastapi_request: Request, current_user: dict = Depends(get_current_user)) -> RunPipelineResponse:
-    result, exec_id = submit_task(
-        dataset_id=request.pipeline_id,
-        dataset_name=request.pipeline_name,
-        user_id=str(current_user.get("_id")),
-        pipeline_id=request.pipeline_id,
-    )
-    status = result.get("status", "running")
-    executed_at = result.get("executed_at")
-    return RunPipelineResponse(status=status, execution_id=exec_id, executed_at=executed_at)
+def run_pipeline(
+    request: RunPipelineRequest,
+    fastapi_request: Request,
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+    current_user: dict = Depends(get_current_user),
+) -> RunPipelineResponse:
+    """Start a pipeline run. Retries with the same Idempotency-Key return the original execution."""
+    def start() -> dict:
+        result, exec_id = submit_task(
+            dataset_id=request.pipeline_id,
+            dataset_name=request.pipeline_name,
+            user_id=str(current_user.get("_id")),
+            pipeline_id=request.pipeline_id,
+        )
+        status = result.get("status", "running")
+        executed_at = result.get("executed_at")
+        return RunPipelineResponse(status=status, execution_id=exec_id, executed_at=executed_at).model_dump()
+
+    try:
+        response = run_idempotent("pipelines/run", idempotency_key, current_user.get("_id"),
+                                  request.model_dump(), start)
+    except IdempotencyKeyReused as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except IdempotencyKeyInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return RunPipelineResponse(**response)
 
 
 @run_router.get("/pipeline/status", response_model=PipelineStatus, operation_id="get_pipeline_status")
@@ -0,0 +1,75 @@
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from app.services.storage.local_service import LocalStorageService
+from app.services.storage.storage_factory import get_storage_service
+
+# Stand-in for presigned object store URLs when STORAGE_BACKEND=local. The
+# signature in the query string authorizes the request, so these routes are
+# not behind the bearer token dependency.
+local_storage_router = APIRouter()
+
+# Body chunks are collected up to this size before each write to disk
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+def _local_storage() -> LocalStorageService:
+    storage_service = get_storage_service()
+    if not isinstance(storage_service, LocalStorageService):
+        raise HTTPException(status_code=404, detail="Local storage is not enabled")
+    return storage_service
+
+
+@local_storage_router.put("/storage/{object_name:path}", include_in_schema=False)
+async def put_local_object(
+    object_name: str,
+    request: Request,
+    expires: int,
+    signature: str,
+    upload_id: Optional[str] = None,
+    part_number: Optional[int] = None,
+):
+    storage_service = _local_storage()
+    if not storage_service.verify_signature("PUT", object_name, expires, signature,
+                                            upload_id or "", part_number or ""):
+        raise HTTPException(status_code=403, detail="Invalid or expired signature")
+
+    # File operations run in the threadpool so they do not block the event loop
+    try:
+        if upload_id:
+            writer = await run_in_threadpool(storage_service.part_writer, upload_id, part_number)
+        else:
+            writer = await run_in_threadpool(storage_service.object_writer, object_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Stream the body to disk
+    try:
+        buffer = bytearray()
+        async for chunk in request.stream():
+            buffer += chunk
+            if len(buffer) >= WRITE_BUFFER_SIZE:
+                await run_in_threadpool(writer.write, bytes(buffer))
+                buffer.clear()
+        if buffer:
+            await run_in_threadpool(writer.write, bytes(buffer))
+    except BaseException:
+        await run_in_threadpool(writer.abort)
+        raise
+    etag = await run_in_threadpool(writer.commit)
+    return Response(status_code=200, headers={"ETag": f'"{etag}"'})
+
+
+@local_storage_router.get("/storage/{object_name:path}", include_in_schema=False)
+def get_local_object(object_name: str, expires: int, signature: str):
+    storage_service = _local_storage()
+    if not storage_service.verify_signature("GET", object_name, expires, signature):
+        raise HTTPException(status_code=403, detail="Invalid or expired signature")
+    try:
+        path = storage_service.local_path(object_name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not storage_service.object_exists(object_name):
+        raise HTTPException(status_code=404, detail="Object not found")
+    return FileResponse(path)
@@ -1,5 +1,5 @@
-from fastapi import HTTPException, Request
-from app.db.crud import get_user_by_external_id
+from fastapi import Depends, HTTPException, Request
+from app.db.crud import get_user_by_external_id, get_role_by_id
 from app.db.database import users_collection
 from bson import ObjectId
 
@@ -17,6 +17,24 @@ def get_current_user(request: Request):
     return user
 
 
+ADMIN_ROLES = {"admin", "superadmin"}
+
+
+def is_admin(user: dict) -> bool:
+    """Whether the user's role is admin or superadmin"""
+    role = get_role_by_id(user.get("role_id"))
+    if not role:
+        return False
+    return (role.get("role_name") or role.get("role-name")) in ADMIN_ROLES
+
+
+def require_admin(current_user: dict = Depends(get_current_user)):
+    """Current user, if they are an admin"""
+    if not is_admin(current_user):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return current_user
+
+
 def get_user_details(user_id: str) -> dict:
     """Get user details by user ID from the database."""
     try:
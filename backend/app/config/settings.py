@@ -12,8 +12,84 @@ class Settings(BaseSettings):
     # When True we treat the app as running in developer/local mode and use MinIO.
     # When False (e.g. in production) we use AWS S3.
     dev_mode: bool = Field(default=True, env="DEV_MODE")
+    # Explicit storage backend ("minio", "s3" or "local"); empty selects by DEV_MODE.
+    storage_backend: str = Field(default="", env="STORAGE_BACKEND")
+    # Local filesystem backend. Presigned URLs point at this API's /storage routes
+    # and are signed with LOCAL_STORAGE_SECRET, which is required to issue them.
+    local_storage_directory: str = Field(default="storage/", env="LOCAL_STORAGE_DIRECTORY")
+    local_storage_bucket: str = Field(default="datasets", env="LOCAL_STORAGE_BUCKET")
+    local_storage_base_url: str = Field(default="http://localhost:8000", env="LOCAL_STORAGE_BASE_URL")
+    local_storage_secret: SecretStr | None = Field(default=None, env="LOCAL_STORAGE_SECRET")
+    local_presigned_url_expiry: int = Field(default=3600, env="LOCAL_PRESIGNED_URL_EXPIRY")
     logs_directory: str = "logs/"
     debug: bool = True
+    # Number of rows stored per column chunk document in the columnar layout.
+    columnar_chunk_size: int = Field(default=10000, env="COLUMNAR_CHUNK_SIZE")
+    # Rows kept in the ``data`` array of a dataset document as a preview; all
+    # rows are in the column chunks.
+    dataset_preview_rows: int = Field(default=100, env="DATASET_PREVIEW_ROWS")
+    # Parquet snapshots written to object storage after every ingest.
+    snapshot_compression: str = Field(default="zstd", env="SNAPSHOT_COMPRESSION")
+    snapshot_write_arrow: bool = Field(default=False, env="SNAPSHOT_WRITE_ARROW")
+    # Rows encoded per write by the streaming export endpoint.
+    export_batch_size: int = Field(default=1000, env="EXPORT_BATCH_SIZE")
+    # Embedded SQL engine (/datasets/query) over local copies of Parquet snapshots.
+    query_cache_directory: str = Field(default="cache/snapshots/", env="QUERY_CACHE_DIRECTORY")
+    query_max_rows: int = Field(default=10000, env="QUERY_MAX_ROWS")
+    query_timeout_seconds: float = Field(default=30, env="QUERY_TIMEOUT_SECONDS")
+    query_threads: int = Field(default=4, env="QUERY_THREADS")
+    query_memory_limit: str = Field(default="1GB", env="QUERY_MEMORY_LIMIT")
+    # Multipart uploads: part size for server-side and presigned part uploads,
+    # size above which upload_file switches to multipart, and parallel parts.
+    multipart_part_size: int = Field(default=16 * 1024 * 1024, env="MULTIPART_PART_SIZE")
+    multipart_threshold: int = Field(default=64 * 1024 * 1024, env="MULTIPART_THRESHOLD")
+    multipart_max_workers: int = Field(default=8, env="MULTIPART_MAX_WORKERS")
+    # Parallel ranged-GET downloads: bytes per range request and concurrent requests.
+    download_part_size: int = Field(default=8 * 1024 * 1024, env="DOWNLOAD_PART_SIZE")
+    download_max_workers: int = Field(default=8, env="DOWNLOAD_MAX_WORKERS")
+    # Uploads are hashed into a temporary copy that stays in memory up to this size.
+    ingest_spool_max_memory: int = Field(default=64 * 1024 * 1024, env="INGEST_SPOOL_MAX_MEMORY")
+    # Rows parsed and written per batch by background ingest jobs.
+    ingest_batch_rows: int = Field(default=50000, env="INGEST_BATCH_ROWS")
+    # Uncompressed CSV and JSON Lines are parsed in byte blocks of this size so
+    # interrupted jobs can resume from the last checkpointed byte offset.
+    ingest_block_bytes: int = Field(default=32 * 1024 * 1024, env="INGEST_BLOCK_BYTES")
+    # A running ingest job whose lease is not renewed for this long is taken
+    # over and resumed by the next process that starts.
+    ingest_lease_seconds: int = Field(default=300, env="INGEST_LEASE_SECONDS")
+    # Worker threads shared by pipeline runs and ingest jobs.
+    task_max_workers: int = Field(default=4, env="TASK_MAX_WORKERS")
+    # Idempotency-Key records: how long a key is remembered, and how long a
+    # repeated request waits for the original one to finish.
+    idempotency_ttl_seconds: int = Field(default=24 * 60 * 60, env="IDEMPOTENCY_TTL_SECONDS")
+    idempotency_wait_seconds: float = Field(default=10, env="IDEMPOTENCY_WAIT_SECONDS")
+    # A request holding a key renews its lock while it runs; a repeat takes
+    # the key over once the lock has not been renewed for this long.
+    idempotency_lease_seconds: int = Field(default=60, env="IDEMPOTENCY_LEASE_SECONDS")
+    # Serialized catalog responses (/datasets, /dataset, ...) kept per worker.
+    response_cache_max_entries: int = Field(default=1024, env="RESPONSE_CACHE_MAX_ENTRIES")
+    # Render JSON responses with orjson, and compress (brotli or gzip) textual
+    # responses of at least COMPRESSION_MINIMUM_SIZE bytes.
+    fast_json_responses: bool = Field(default=True, env="FAST_JSON_RESPONSES")
+    response_compression: bool = Field(default=True, env="RESPONSE_COMPRESSION")
+    compression_minimum_size: int = Field(default=1024, env="COMPRESSION_MINIMUM_SIZE")
+    # Prometheus metrics at /metrics. When METRICS_TOKEN is set, scrapers
+    # must send it as a Bearer token.
+    metrics_enabled: bool = Field(default=True, env="METRICS_ENABLED")
+    metrics_token: SecretStr | None = Field(default=None, env="METRICS_TOKEN")
+    # Per-request MongoDB command count and time (Server-Timing header and
+    # logs); a query shape repeated this often in one request is logged as a
+    # likely N+1 loop.
+    db_request_tracing: bool = Field(default=True, env="DB_REQUEST_TRACING")
+    db_repeated_query_threshold: int = Field(default=5, env="DB_REPEATED_QUERY_THRESHOLD")
+    # Admins can profile a single request with the X-Profile header or the
+    # _profile query parameter; profiles are kept for PROFILE_TTL_SECONDS.
+    request_profiling: bool = Field(default=True, env="REQUEST_PROFILING")
+    profile_ttl_seconds: int = Field(default=86400, env="PROFILE_TTL_SECONDS")
+    # HTTP connection pool of the shared storage client (MinIO or S3).
+    storage_max_pool_connections: int = Field(default=32, env="STORAGE_MAX_POOL_CONNECTIONS")
+    storage_connect_timeout: float = Field(default=5, env="STORAGE_CONNECT_TIMEOUT")
+    storage_read_timeout: float = Field(default=60, env="STORAGE_READ_TIMEOUT")
 
     class Config:
         env_file = ".env"
@@ -48,6 +124,8 @@ class MinIOSettings(BaseSettings):
     MINIO_SECRET_KEY: SecretStr = Field(..., env="MINIO_SECRET_KEY")
     MINIO_BUCKET_NAME: str = Field(default="datasets", env="MINIO_BUCKET_NAME")
     MINIO_PRESIGNED_URL_EXPIRY: int = 3600
+    # Known region, so presigning URLs never has to look up the bucket location
+    MINIO_REGION: str = Field(default="us-east-1", env="MINIO_REGION")
 
     class Config:
         env_file = ".env"
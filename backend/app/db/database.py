@@ -1,12 +1,20 @@
 import uuid
 from pymongo import MongoClient
-from ..config.settings import get_database_settings
+from ..config.settings import get_database_settings, get_settings
+from ..utils.db_tracing import RequestCommandListener
+from ..utils.metrics import MongoCommandMetrics
 
 settings = get_database_settings()
 
 # ------------------ MongoDB Setup ------------------
 MONGO_URI = str(settings.mongodb_uri)
-client = MongoClient(MONGO_URI)
+# Command latency per collection and operation for /metrics, and per request
+event_listeners = []
+if get_settings().metrics_enabled:
+    event_listeners.append(MongoCommandMetrics())
+if get_settings().db_request_tracing:
+    event_listeners.append(RequestCommandListener())
+client = MongoClient(MONGO_URI, event_listeners=event_listeners)
 db = client["fastapi_db"]
 
 users_collection = db["users"]
@@ -32,3 +40,55 @@ pipelines_history_collection = db["pipelines_history"]
 
 # Collection for endpoint access control
 endpoint_access_collection = db["endpoint_access"]
+
+# Collection for the columnar layout of datasets (one document per column chunk)
+dataset_column_chunks_collection = db["dataset_column_chunks"]
+
+# Collection for per-column statistics of datasets, keyed by dataset id
+dataset_profiles_collection = db["dataset_profiles"]
+
+# Collection for approximate-statistics sketches per column chunk
+dataset_sketches_collection = db["dataset_sketches"]
+
+# Collection for the global column catalog (one document per dataset column)
+column_catalog_collection = db["column_catalog"]
+
+# Collection for background ingest jobs started by /datasets/extract
+ingest_jobs_collection = db["ingest_jobs"]
+
+# Collection for Idempotency-Key records of POST endpoints (expired by a TTL index)
+idempotency_keys_collection = db["idempotency_keys"]
+
+# Collection for named counters, e.g. the catalog version behind response ETags
+counters_collection = db["counters"]
+
+# Collection for on-demand request profiles, keyed by request id (expired by a TTL index)
+request_profiles_collection = db["request_profiles"]
+
+
+def ensure_indexes() -> None:
+    """Create the indexes the application relies on. Safe to call repeatedly."""
+    files.create_index([("sha256", 1)])
+    ingest_jobs_collection.create_index([("user_id", 1), ("created_at", -1)])
+    ingest_jobs_collection.create_index([("status", 1), ("lease_expires_at", 1)])
+    idempotency_keys_collection.create_index([("scope", 1), ("user_id", 1), ("key", 1)], unique=True)
+    idempotency_keys_collection.create_index("expires_at", expireAfterSeconds=0)
+    request_profiles_collection.create_index("expires_at", expireAfterSeconds=0)
+    dataset_column_chunks_collection.create_index(
+        [("dataset_id", 1), ("column", 1), ("chunk", 1)], unique=True)
+    dataset_column_chunks_collection.create_index(
+        [("dataset_id", 1), ("chunk", 1), ("position", 1)])
+    dataset_sketches_collection.create_index(
+        [("dataset_id", 1), ("column", 1), ("chunk", 1)], unique=True)
+    column_catalog_collection.create_index(
+        [("dataset_id", 1), ("position", 1)], unique=True)
+    column_catalog_collection.create_index(
+        [("column_name_lower", 1), ("dataset_id", 1)])
+    dataset_information_collection.create_index(
+        [("dataset_name", "text"), ("description", "text"), ("tags", "text"),
+         ("dataset_type", "text"), ("columns", "text")],
+        name="catalog_text",
+        weights={"dataset_name": 10, "tags": 5, "dataset_type": 3, "columns": 2, "description": 1},
+    )
+    dataset_information_collection.create_index([("dataset_id", 1)])
+    dataset_information_collection.create_index([("user_id", 1)])
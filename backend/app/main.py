@@ -1,14 +1,32 @@
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.api.endpoints.pipelines.pipeline import run_router
 from app.api.endpoints.datasets.datasets import datasets_router
 from app.api.endpoints.datasets.manage import manage_router
 from app.api.endpoints.datasets.dataset_info import dataset_info_router
+from app.api.endpoints.datasets.export import export_router
+from app.api.endpoints.datasets.query import query_router
+from app.api.endpoints.datasets.uploads import uploads_router
+from app.api.endpoints.monitoring.metrics import metrics_router
+from app.api.endpoints.monitoring.profiles import profiles_router
+from app.api.endpoints.storage.local_storage import local_storage_router
 from app.api.endpoints.users.users import router as user_router
 from app.api.endpoints.users.role_check import router as role_check_router
 from app.auth.token_middleware import TokenAuthMiddleware
 from app.auth.security import require_bearer_token
+from app.config.settings import get_settings
 from app.dashboards.streamlit_integration import mount_all_dashboards
+from app.db.database import ensure_indexes
+from app.services.storage.storage_factory import bootstrap_storage
+from app.services.ingest.ingest_jobs import resume_ingest_jobs
+from app.utils.compression_middleware import CompressionMiddleware
+from app.utils.fast_json import FastJSONResponse
+from app.utils.db_tracing_middleware import DbTracingMiddleware
+from app.utils.metrics_middleware import MetricsMiddleware
+from app.utils.profiling import profile_sync_endpoints
+from app.utils.profiling_middleware import ProfilingMiddleware
+from contextlib import asynccontextmanager
 import logging
 import sys
 
@@ -18,7 +36,35 @@ logging.basicConfig(
     handlers=[logging.StreamHandler(sys.stdout)],
 )
 
-app = FastAPI()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        ensure_indexes()
+    except Exception as e:
+        logging.error(f"Failed to create MongoDB indexes: {e}")
+    try:
+        bootstrap_storage()
+    except Exception as e:
+        logging.error(f"Failed to initialize storage bucket: {e}")
+    try:
+        resume_ingest_jobs()
+    except Exception as e:
+        logging.error(f"Failed to resume ingest jobs: {e}")
+    yield
+
+
+settings = get_settings()
+
+app = FastAPI(
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse if settings.fast_json_responses else JSONResponse,
+)
+
+# Compress large JSON/NDJSON/CSV responses
+if settings.response_compression:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_minimum_size)
 
 # Configure CORS
 app.add_middleware(
@@ -29,9 +75,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Profile single requests for admins; inside TokenAuthMiddleware, which identifies them
+if settings.request_profiling:
+    app.add_middleware(ProfilingMiddleware, ttl_seconds=settings.profile_ttl_seconds)
+
 # Attach middleware that extracts external_id from Bearer token
 app.add_middleware(TokenAuthMiddleware)
 
+# MongoDB commands per request, in a Server-Timing header and the logs
+if settings.db_request_tracing:
+    app.add_middleware(DbTracingMiddleware, repeated_query_threshold=settings.db_repeated_query_threshold)
+
+# Request latency and in-flight metrics; added last so it times the whole stack
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers; protect selected routers with Bearer auth dependency
 app.include_router(run_router, dependencies=[Depends(require_bearer_token)])
 app.include_router(datasets_router, dependencies=[
@@ -39,9 +97,21 @@ app.include_router(datasets_router, dependencies=[
 app.include_router(manage_router, dependencies=[Depends(require_bearer_token)])
 app.include_router(dataset_info_router, dependencies=[
                    Depends(require_bearer_token)])
+app.include_router(export_router, dependencies=[Depends(require_bearer_token)])
+app.include_router(query_router, dependencies=[Depends(require_bearer_token)])
+app.include_router(uploads_router, dependencies=[Depends(require_bearer_token)])
 app.include_router(user_router)
+# Scraped by Prometheus, which authenticates with METRICS_TOKEN instead
+app.include_router(metrics_router)
+# Signed URLs of the local storage backend carry their own authorization
+app.include_router(local_storage_router)
 app.include_router(role_check_router, dependencies=[
                    Depends(require_bearer_token)])
+app.include_router(profiles_router, dependencies=[Depends(require_bearer_token)])
+
+# Sync endpoints run in the threadpool and profile themselves there
+if settings.request_profiling:
+    profile_sync_endpoints(app.routes)
 
 # Mount all Streamlit dashboards
 try:
@@ -74,6 +74,31 @@ class ManageResponse(BaseModel):
     data: List[DatasetCardInfo]
 
 
+class FacetCount(BaseModel):
+    value: Union[str, bool, None] = Field(..., description="Facet value")
+    count: int = Field(..., description="Number of matching datasets")
+
+
+class CatalogFacets(BaseModel):
+    tags: List[FacetCount] = Field(..., description="Counts by tag")
+    dataset_type: List[FacetCount] = Field(...,
+                                           description="Counts by dataset type")
+    is_temporal: List[FacetCount] = Field(...,
+                                          description="Counts by temporal flag")
+    is_spatial: List[FacetCount] = Field(...,
+                                         description="Counts by spatial flag")
+    owners: List[FacetCount] = Field(...,
+                                     description="Counts by owner user ID")
+
+
+class CatalogSearchResponse(BaseModel):
+    """Schema representing a page of catalog search results with facet counts"""
+
+    total: int = Field(..., description="Number of matching datasets")
+    results: List[DatasetCardInfo]
+    facets: CatalogFacets
+
+
 # --------------------------------- /datasets/create ---------------------------------
 
 
@@ -260,6 +285,68 @@ class PresignedURLResponse(BaseModel):
     object_name: str = Field(..., description="Object name in storage")
 
 
+# --------------------------------- /uploads/multipart ---------------------------------
+
+
+class MultipartUploadCreateRequest(BaseModel):
+    filename: str = Field(..., description="Name of the file being uploaded")
+    file_size: int = Field(..., gt=0, description="File size in bytes")
+
+
+class MultipartPartUrl(BaseModel):
+    part_number: int = Field(..., description="Part number, starting at 1")
+    url: str = Field(..., description="Presigned URL to PUT the part to")
+
+
+class MultipartUploadCreateResponse(BaseModel):
+    object_name: str = Field(..., description="Object name in storage")
+    upload_id: str = Field(..., description="Multipart upload ID")
+    part_size: int = Field(...,
+                           description="Size in bytes of every part except the last")
+    parts: List[MultipartPartUrl]
+
+
+class MultipartPartUrlsRequest(BaseModel):
+    object_name: str = Field(..., description="Object name in storage")
+    upload_id: str = Field(..., description="Multipart upload ID")
+    part_numbers: List[int] = Field(..., description="Parts to presign")
+
+
+class MultipartPartUrlsResponse(BaseModel):
+    parts: List[MultipartPartUrl]
+
+
+class MultipartUploadedPart(BaseModel):
+    part_number: int = Field(..., description="Part number")
+    etag: str = Field(..., description="ETag returned when the part was uploaded")
+    size: Optional[int] = Field(None, description="Part size in bytes")
+
+
+class MultipartUploadedPartsResponse(BaseModel):
+    parts: List[MultipartUploadedPart]
+
+
+class MultipartCompletedPart(BaseModel):
+    part_number: int = Field(..., description="Part number")
+    etag: str = Field(..., description="ETag returned when the part was uploaded")
+
+
+class MultipartUploadCompleteRequest(BaseModel):
+    object_name: str = Field(..., description="Object name in storage")
+    upload_id: str = Field(..., description="Multipart upload ID")
+    parts: List[MultipartCompletedPart]
+
+
+class MultipartUploadCompleteResponse(BaseModel):
+    object_name: str = Field(..., description="Object name in storage")
+    location: str = Field(..., description="Bucket and object name of the uploaded file")
+
+
+class MultipartUploadAbortRequest(BaseModel):
+    object_name: str = Field(..., description="Object name in storage")
+    upload_id: str = Field(..., description="Multipart upload ID")
+
+
 # --------------------------------- /datasets/extract ---------------------------------
 
 
@@ -273,6 +360,32 @@ class ExtractAndStoreResponse(BaseModel):
     file_id: str = Field(..., description="File ID from files collection")
     dataset_id: str = Field(...,
                             description="Dataset ID from datasets collection")
+    job_id: Optional[str] = Field(
+        None, description="Background ingest job ID")
+
+
+# --------------------------------- /datasets/extract/{job_id} ---------------------------------
+
+
+class IngestJobResponse(BaseModel):
+    job_id: str = Field(..., description="Ingest job ID")
+    status: Literal["queued", "running", "completed", "error"] = Field(
+        ..., description="Job status")
+    phase: Optional[str] = Field(
+        None, description="Current step of a running job (downloading, parsing, finalizing)")
+    file_object: str = Field(..., description="Object name of the uploaded file")
+    file_id: str = Field(..., description="File ID from files collection")
+    dataset_id: str = Field(...,
+                            description="Dataset ID holding the ingested rows")
+    duplicate_of: Optional[str] = Field(
+        None, description="File ID of an identical, already ingested file whose dataset was reused")
+    file_size: int = Field(..., description="Size of the upload in bytes")
+    bytes_read: int = Field(..., description="Bytes downloaded so far")
+    rows_parsed: int = Field(..., description="Rows parsed so far")
+    rows_written: int = Field(..., description="Rows written so far")
+    error: Optional[str] = Field(None, description="Error message if the job failed")
+    created_at: str
+    updated_at: str
 
 
 # --------------------------------- /datasets/columns ---------------------------------
@@ -289,6 +402,176 @@ class DatasetColumnsResponse(BaseModel):
                                description="List of dataset column names (filtered)")
 
 
+# --------------------------------- /columns ---------------------------------
+
+
+class ColumnSearchResult(BaseModel):
+    column_name: str = Field(..., description="Column name")
+    inferred_types: List[str] = Field(...,
+                                      description="Types inferred for this column across datasets")
+    dataset_count: int = Field(...,
+                               description="Number of datasets with this column")
+
+
+class ColumnSearchResponse(BaseModel):
+    columns: List[ColumnSearchResult]
+
+
+class ColumnDatasetEntry(BaseModel):
+    dataset_id: str = Field(..., description="Dataset ID")
+    column_name: str = Field(..., description="Column name as stored in the dataset")
+    inferred_type: str = Field(..., description="Inferred column type")
+    position: int = Field(..., description="Zero-based column position")
+
+
+class ColumnDatasetsResponse(BaseModel):
+    datasets: List[ColumnDatasetEntry]
+
+
+# --------------------------------- /datasets/{dataset_id}/column-values ---------------------------------
+
+
+class DatasetColumnValuesResponse(BaseModel):
+    dataset_id: str = Field(..., description="Dataset identifier")
+    record_count: int = Field(...,
+                              description="Number of records in the dataset")
+    columns: Dict[str, List[Any]] = Field(...,
+                                          description="Values of each requested column, in row order")
+
+
+# --------------------------------- /datasets/{dataset_id}/snapshot ---------------------------------
+
+
+class DatasetSnapshotResponse(BaseModel):
+    dataset_id: str = Field(..., description="Dataset identifier")
+    format: Literal["parquet", "arrow"] = Field(...,
+                                                description="Snapshot file format")
+    download_url: str = Field(...,
+                              description="Presigned URL to download the snapshot")
+    record_count: int = Field(...,
+                              description="Number of records in the snapshot")
+    created_at: datetime = Field(...,
+                                 description="Timestamp when the snapshot was written")
+
+
+# --------------------------------- /datasets/query ---------------------------------
+
+
+class SqlQueryRequest(BaseModel):
+    sql: str = Field(..., description="A single read-only SELECT statement")
+    datasets: Dict[str, str] = Field(
+        ..., description="Mapping of view name used in the SQL to dataset ID")
+    limit: int = Field(default=1000, ge=1,
+                       description="Maximum number of rows to return")
+
+
+class SqlQueryResponse(BaseModel):
+    columns: List[str] = Field(..., description="Result column names")
+    rows: List[List[Any]] = Field(..., description="Result rows")
+    row_count: int = Field(..., description="Number of rows returned")
+    truncated: bool = Field(...,
+                            description="Whether the result was cut off at the row limit")
+    elapsed_ms: float = Field(...,
+                              description="Query execution time in milliseconds")
+
+
+# --------------------------------- /datasets/{dataset_id}/rows ---------------------------------
+
+
+class RowFilter(BaseModel):
+    column: str = Field(..., description="Column to filter on")
+    op: Literal["eq", "ne", "gt", "gte", "lt", "lte", "in", "contains"] = Field(
+        ..., description="Comparison operator")
+    value: Any = Field(None, description="Value to compare against (a list for 'in')")
+
+
+class RowSort(BaseModel):
+    column: str = Field(...,
+                        description="Column (or aggregate alias) to sort by")
+    direction: Literal["asc", "desc"] = Field(
+        default="asc", description="Sort direction")
+
+
+class RowAggregate(BaseModel):
+    func: Literal["sum", "count", "avg", "min", "max"] = Field(
+        ..., description="Aggregate function")
+    column: Optional[str] = Field(
+        None, description="Column to aggregate; omit for a row count")
+    alias: Optional[str] = Field(
+        None, description="Name of the result column")
+
+
+class RowsQueryRequest(BaseModel):
+    filters: List[RowFilter] = Field(
+        default_factory=list, description="Filters, combined with AND")
+    sort: List[RowSort] = Field(
+        default_factory=list, description="Sort order")
+    group_by: List[str] = Field(
+        default_factory=list, description="Columns to group by")
+    aggregates: List[RowAggregate] = Field(
+        default_factory=list, description="Aggregates computed per group")
+    columns: Optional[List[str]] = Field(
+        None, description="Columns to return for ungrouped queries")
+    limit: int = Field(default=100, ge=1, le=10000,
+                       description="Maximum number of rows to return")
+    offset: int = Field(default=0, ge=0,
+                        description="Number of rows to skip")
+
+
+class RowsQueryResponse(BaseModel):
+    columns: List[str] = Field(..., description="Result column names")
+    rows: List[Dict[str, Any]] = Field(..., description="Result rows")
+    row_count: int = Field(..., description="Number of rows returned")
+
+
+# --------------------------------- /datasets/{dataset_id}/profile ---------------------------------
+
+
+class ValueCount(BaseModel):
+    value: Union[str, int, float, bool, None] = Field(..., description="Column value")
+    count: int = Field(..., description="Number of occurrences")
+
+
+class Histogram(BaseModel):
+    edges: List[float] = Field(..., description="Bin edges (one more than counts)")
+    counts: List[int] = Field(..., description="Number of values per bin")
+
+
+class ColumnProfile(BaseModel):
+    name: str = Field(..., description="Column name")
+    dtype: str = Field(..., description="Inferred data type")
+    count: int = Field(..., description="Number of non-null values")
+    nulls: int = Field(..., description="Number of null values")
+    null_fraction: float = Field(..., description="Fraction of null values")
+    distinct: Optional[int] = Field(None, description="Number of distinct values")
+    min: Union[str, int, float, bool, None] = Field(None, description="Minimum value")
+    max: Union[str, int, float, bool, None] = Field(None, description="Maximum value")
+    mean: Optional[float] = Field(None, description="Mean of numeric columns")
+    std: Optional[float] = Field(None, description="Standard deviation of numeric columns")
+    top_values: List[ValueCount] = Field(..., description="Most frequent values")
+    histogram: Optional[Histogram] = Field(None, description="Histogram of numeric columns")
+
+
+class DatasetProfileResponse(BaseModel):
+    dataset_id: str = Field(..., description="Dataset identifier")
+    record_count: int = Field(..., description="Number of records profiled")
+    created_at: datetime = Field(..., description="Timestamp when the profile was computed")
+    columns: List[ColumnProfile] = Field(..., description="Per-column statistics")
+
+
+# --------------------------------- /datasets/{dataset_id}/approx-stats ---------------------------------
+
+
+class ApproximateStatsResponse(BaseModel):
+    dataset_id: str = Field(..., description="Dataset identifier")
+    column: str = Field(..., description="Column name")
+    count: int = Field(..., description="Number of non-null values")
+    approx_distinct: int = Field(...,
+                                 description="Approximate number of distinct values (HyperLogLog)")
+    quantiles: Optional[Dict[str, Optional[float]]] = Field(
+        None, description="Approximate quantiles keyed by fraction (numeric columns only)")
+
+
 class Tag(BaseModel):
     id: int = Field(..., description="Unique identifier of the tag", example=123)
     name: str = Field(..., description="Name of the tag")
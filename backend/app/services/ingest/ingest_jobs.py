@@ -0,0 +1,453 @@
+"""
+Background ingest jobs for uploaded files.
+
+``/datasets/extract`` only records a job and returns; the download, parsing
+and writes run on the shared task pool. Each job document in ``ingest_jobs``
+carries its status, phase and progress counters (bytes read, rows parsed,
+rows written), so clients can poll it or follow it as a stream of events.
+
+The dataset id is allocated when the job is created and a placeholder
+``datasets`` document is inserted right away, so the usual
+extract -> ``/datasets/create`` flow works before ingest has finished. If the
+upload turns out to duplicate an already ingested file, the placeholder is
+marked with ``duplicate_of`` and dataset information documents are pointed at
+the original dataset.
+
+Rows are written to the column chunks only. The ``data`` array of the dataset
+document keeps the first ``dataset_preview_rows`` rows as a preview, so the
+document stays far below MongoDB's 16 MB limit however large the file is.
+
+Jobs are resumable. After every committed batch the job stores a checkpoint:
+the byte offset reached in the file (for uncompressed CSV and JSON Lines,
+which are parsed in blocks cut on record boundaries), the next column chunk
+number, the rows written so far and the column types merged over the batches
+so far. A job holds a lease that each progress write renews; at startup, jobs
+whose lease expired are resumed from their checkpoint. Preview rows pushed
+after the last checkpoint are trimmed off again and column chunks are
+upserts, so replaying a batch never duplicates data.
+"""
+import mimetypes
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from app.config.logging import get_logger
+from app.config.settings import get_settings
+from app.db.database import (
+    files as files_collection,
+    datasets_collection,
+    dataset_information_collection,
+    ingest_jobs_collection,
+)
+from app.services.ingest.readers import (
+    BLOCK_FORMATS,
+    SNIFF_BYTES,
+    apply_column_types,
+    column_types_schema,
+    iter_dataframes,
+    iter_record_blocks,
+    merge_column_types,
+    sniff_compression,
+    sniff_format,
+)
+from app.services.storage.column_catalog_service import TYPE_SAMPLE_SIZE, store_column_catalog
+from app.services.storage.columnar_service import (
+    delete_columnar,
+    iter_dataset_rows,
+    load_columns,
+    store_columnar_chunk,
+)
+from app.services.storage.profile_service import write_dataset_profile_by_column
+from app.services.storage.snapshot_service import write_dataset_snapshot_batches
+from app.services.storage.storage_factory import get_storage_service
+from app.services.tasks.task_executor import task_pool
+from app.utils.file_utils import spool_with_sha256
+from app.utils.response_cache import bump_catalog_version
+
+logger = get_logger("services.ingest")
+
+TERMINAL_STATUSES = {"completed", "error"}
+
+# Minimum seconds between progress writes while bytes are streaming in
+PROGRESS_INTERVAL = 0.5
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _lease_expiry() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=get_settings().ingest_lease_seconds)
+
+
+def _lease_expired() -> Dict[str, Any]:
+    return {"$or": [{"lease_expires_at": None}, {"lease_expires_at": {"$lt": datetime.now(timezone.utc)}}]}
+
+
+def _update_job(job_id: ObjectId, fields: Dict[str, Any]) -> None:
+    # Every progress write also renews the lease of the running process
+    ingest_jobs_collection.update_one(
+        {"_id": job_id}, {"$set": {**fields, "updated_at": _now(), "lease_expires_at": _lease_expiry()}})
+
+
+@contextmanager
+def _renewing_lease(job_id: ObjectId) -> Iterator[None]:
+    """Keep renewing the lease of a job while steps that write no progress run."""
+    stop = threading.Event()
+    interval = max(get_settings().ingest_lease_seconds / 3, 1)
+
+    def renew() -> None:
+        while not stop.wait(interval):
+            ingest_jobs_collection.update_one({"_id": job_id}, {"$set": {"lease_expires_at": _lease_expiry()}})
+
+    thread = threading.Thread(target=renew, name=f"ingest-lease-{job_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def find_ingested_file(file_hash: str, file_size: int) -> Optional[dict]:
+    """Earliest ingested file with the same content whose dataset still exists."""
+    candidates = files_collection.find(
+        {"sha256": file_hash, "file_size": file_size, "dataset_id": {"$exists": True}, "duplicate_of": {"$exists": False}},
+        {"file_location": 1, "dataset_id": 1},
+    ).sort("_id", 1)
+    for candidate in candidates:
+        dataset = datasets_collection.find_one({"_id": candidate["dataset_id"]}, {"ingest_status": 1})
+        if dataset and dataset.get("ingest_status", "completed") == "completed":
+            return candidate
+    return None
+
+
+def resolve_dataset_id(dataset_id: ObjectId) -> ObjectId:
+    """Follow ``duplicate_of`` from a deduplicated placeholder to the dataset holding the data."""
+    dataset = datasets_collection.find_one({"_id": dataset_id}, {"duplicate_of": 1})
+    if dataset and dataset.get("duplicate_of"):
+        return dataset["duplicate_of"]
+    return dataset_id
+
+
+def create_ingest_job(file_object: str, file_size: int, user_id: Any) -> Dict[str, Any]:
+    """
+    Record an ingest job with a placeholder dataset and queue it on the task pool.
+
+    Returns:
+        The job document
+    """
+    current_time = _now()
+    job = {
+        "_id": ObjectId(),
+        "file_object": file_object,
+        "file_id": ObjectId(),
+        "dataset_id": ObjectId(),
+        "user_id": user_id,
+        "status": "queued",
+        "phase": None,
+        "file_size": file_size,
+        "bytes_read": 0,
+        "rows_parsed": 0,
+        "rows_written": 0,
+        "duplicate_of": None,
+        "error": None,
+        "created_at": current_time,
+        "updated_at": current_time,
+    }
+    datasets_collection.insert_one({
+        "_id": job["dataset_id"],
+        "data": [],
+        "columns": [],
+        "record_count": 0,
+        # Readers go to the column chunks, also while the job is running
+        "columnar": True,
+        "ingest_job_id": job["_id"],
+        "ingest_status": "queued",
+        "created_at": current_time,
+        "updated_at": current_time,
+    })
+    ingest_jobs_collection.insert_one(job)
+    task_pool.submit(run_ingest_job, job["_id"])
+    return job
+
+
+def get_ingest_job(job_id: ObjectId, user_id: Any) -> Optional[Dict[str, Any]]:
+    return ingest_jobs_collection.find_one({"_id": job_id, "user_id": user_id})
+
+
+def resume_ingest_jobs() -> int:
+    """
+    Queue unfinished jobs whose lease has expired, e.g. after a crash or redeploy.
+
+    Called at startup. Each job continues from its last checkpoint.
+
+    Returns:
+        Number of jobs queued
+    """
+    stale = ingest_jobs_collection.find(
+        {"status": {"$in": ["queued", "running"]}, **_lease_expired()}, {"_id": 1})
+    count = 0
+    for job in stale:
+        task_pool.submit(run_ingest_job, job["_id"])
+        count += 1
+    if count:
+        logger.info(f"Resuming {count} interrupted ingest job(s)")
+    return count
+
+
+def _claim_job(job_id: ObjectId) -> Optional[Dict[str, Any]]:
+    """Take the lease of an unfinished job unless another process holds a live one."""
+    return ingest_jobs_collection.find_one_and_update(
+        {"_id": job_id, "status": {"$nin": list(TERMINAL_STATUSES)}, **_lease_expired()},
+        {"$set": {"status": "running", "lease_expires_at": _lease_expiry(), "updated_at": _now()},
+         "$inc": {"attempts": 1}},
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def run_ingest_job(job_id: ObjectId) -> None:
+    job = _claim_job(job_id)
+    if not job:
+        return
+    dataset_id = job["dataset_id"]
+
+    try:
+        datasets_collection.update_one({"_id": dataset_id}, {"$set": {"ingest_status": "running"}})
+        _ingest(job)
+    except Exception as e:
+        logger.error(f"Ingest job {job_id} failed: {e}", exc_info=True)
+        _update_job(job_id, {"status": "error", "error": str(e)})
+        datasets_collection.update_one({"_id": dataset_id}, {"$set": {"ingest_status": "error"}})
+
+
+def _ingest(job: Dict[str, Any]) -> None:
+    settings = get_settings()
+    storage_service = get_storage_service()
+    job_id, dataset_id, file_object = job["_id"], job["dataset_id"], job["file_object"]
+
+    spool = None
+    if not job.get("sha256"):
+        spool = _download(job)
+        if spool is None:
+            return
+    _update_job(job_id, {"phase": "parsing"})
+
+    checkpoint = job["checkpoint"]
+    byte_offset, chunk, rows_written = checkpoint["byte_offset"], checkpoint["chunk"], checkpoint["rows_written"]
+    columns: List[str] = list(checkpoint["columns"])
+    column_types: Dict[str, str] = dict(checkpoint.get("column_types") or {})
+    resumed = rows_written > 0
+    if resumed:
+        logger.info(f"Resuming ingest job {job_id} at row {rows_written} (byte offset {byte_offset})")
+    else:
+        delete_columnar(dataset_id)
+
+    # Preview rows pushed after the last checkpoint belong to a batch that is
+    # written again below; column chunks and sketches are upserts, so they need no cleanup
+    preview_rows = settings.dataset_preview_rows
+    datasets_collection.update_one(
+        {"_id": dataset_id},
+        {"$push": {"data": {"$each": [], "$slice": min(rows_written, preview_rows)}},
+         "$set": {"record_count": rows_written}},
+    )
+
+    if spool is None:
+        spool = storage_service.open_reader(file_object, size=job["file_size"], start=byte_offset or 0)
+
+    chunk_size = settings.columnar_chunk_size
+    first_batch = not resumed
+    with spool:
+        for batch, consumed, header in _iter_batches(spool, job, checkpoint, settings):
+            records = batch.to_dict(orient="records")
+            columns += [str(column) for column in batch.columns if str(column) not in columns]
+            column_types = merge_column_types(column_types, batch)
+            update: Dict[str, Any] = {"$inc": {"record_count": len(records)}}
+            preview = records[:max(preview_rows - rows_written, 0)]
+            if preview:
+                update["$push"] = {"data": {"$each": preview}}
+            datasets_collection.update_one({"_id": dataset_id}, update)
+            for offset in range(0, len(records), chunk_size):
+                store_columnar_chunk(dataset_id, chunk, rows_written + offset,
+                                     records[offset:offset + chunk_size], columns)
+                chunk += 1
+            rows_written += len(records)
+            if byte_offset is not None:
+                byte_offset += consumed
+
+            # The batch is committed; a restart continues after it
+            checkpoint = {"byte_offset": byte_offset, "chunk": chunk, "rows_written": rows_written,
+                          "columns": columns, "column_types": column_types, "header": header}
+            _update_job(job_id, {"checkpoint": checkpoint, "rows_parsed": rows_written, "rows_written": rows_written})
+            if first_batch:
+                # Dataset previews show the first rows as soon as they are written
+                bump_catalog_version()
+                first_batch = False
+
+    _update_job(job_id, {"phase": "finalizing"})
+    # Nothing reports progress while the snapshot and profile are built
+    column_types = {column: column_types.get(column, "string") for column in columns}
+    with _renewing_lease(job_id):
+        datasets_collection.update_one(
+            {"_id": dataset_id},
+            {"$set": {"columns": columns, "column_types": column_types, "columnar": True,
+                      "columnar_chunks": chunk, "updated_at": _now()}},
+        )
+        # The catalog, snapshot and profile are read back from the column
+        # chunks a batch or a column at a time, which also covers rows written
+        # by earlier attempts. Batches were typed one by one, so each gets the
+        # merged column types.
+        sample = next(iter_dataset_rows(dataset_id, batch_size=TYPE_SAMPLE_SIZE), [])
+        store_column_catalog(
+            dataset_id, _typed_rows(sample, columns, column_types).to_dict(orient="records"), columns)
+        write_dataset_snapshot_batches(
+            dataset_id, column_types_schema(columns, column_types),
+            (_typed_rows(rows, columns, column_types)
+             for rows in iter_dataset_rows(dataset_id, batch_size=chunk_size)))
+        write_dataset_profile_by_column(
+            dataset_id, rows_written, _typed_columns(dataset_id, columns, column_types, rows_written))
+    files_collection.update_one({"_id": job["file_id"]}, {"$set": {"dataset_id": dataset_id}})
+
+    # Dataset information created while the job was running still has no columns
+    dataset_information_collection.update_many({"dataset_id": dataset_id}, {"$set": {"columns": columns}})
+    datasets_collection.update_one({"_id": dataset_id}, {"$set": {"ingest_status": "completed"}})
+    bump_catalog_version()
+    _update_job(job_id, {"status": "completed", "phase": None})
+
+
+def _typed_rows(rows: List[Dict[str, Any]], columns: List[str], column_types: Dict[str, str]) -> pd.DataFrame:
+    return apply_column_types(pd.DataFrame(rows, columns=columns), column_types)
+
+
+def _typed_columns(
+    dataset_id: ObjectId, columns: List[str], column_types: Dict[str, str], record_count: int
+) -> Iterator[pd.Series]:
+    """Columns of an ingested dataset, read one at a time from the column chunks."""
+    for column in columns:
+        values = load_columns(dataset_id, [column]).get(column, [])
+        # Chunks written before a column first appeared do not hold it
+        values = [None] * (record_count - len(values)) + values
+        yield apply_column_types(pd.DataFrame({column: values}), column_types)[column]
+
+
+def _download(job: Dict[str, Any]) -> Optional[BinaryIO]:
+    """
+    Hash the upload into a temporary copy and record the file.
+
+    Returns:
+        The temporary copy positioned at the start, or None if the upload
+        duplicated an ingested file and was linked to it instead
+    """
+    settings = get_settings()
+    job_id, file_object = job["_id"], job["file_object"]
+    _update_job(job_id, {"phase": "downloading"})
+
+    last_report = [0.0]
+
+    def report_bytes(bytes_read: int) -> None:
+        if time.monotonic() - last_report[0] >= PROGRESS_INTERVAL:
+            last_report[0] = time.monotonic()
+            _update_job(job_id, {"bytes_read": bytes_read})
+
+    # One pass over parallel ranged downloads both hashes the upload and
+    # keeps a temporary copy for parsing
+    with get_storage_service().open_reader(file_object, size=job["file_size"]) as reader:
+        spool, file_hash = spool_with_sha256(reader, settings.ingest_spool_max_memory, on_progress=report_bytes)
+    _update_job(job_id, {"bytes_read": job["file_size"]})
+
+    current_time = _now()
+    file_metadata = {
+        "_id": job["file_id"],
+        "file_location": file_object,
+        "file_type": mimetypes.guess_type(file_object)[0] or "application/octet-stream",
+        "file_size": job["file_size"],
+        "sha256": file_hash,
+        "user_id": job["user_id"],
+        "created_at": current_time,
+        "updated_at": current_time,
+    }
+
+    original = find_ingested_file(file_hash, job["file_size"])
+    if original:
+        spool.close()
+        _link_duplicate(job, file_metadata, original)
+        return None
+
+    files_collection.replace_one({"_id": job["file_id"]}, file_metadata, upsert=True)
+
+    head = spool.read(SNIFF_BYTES)
+    spool.seek(0)
+    compression = sniff_compression(head)
+    file_format = None if compression else sniff_format(head, file_object)
+    # Only files that split into byte blocks can resume from a byte offset;
+    # the others are parsed again from the start, skipping committed rows
+    checkpoint = {"byte_offset": 0 if file_format in BLOCK_FORMATS else None, "chunk": 0, "rows_written": 0,
+                  "columns": [], "column_types": {}, "header": None}
+    job.update({"sha256": file_hash, "format": file_format, "checkpoint": checkpoint})
+    _update_job(job_id, {"sha256": file_hash, "format": file_format, "checkpoint": checkpoint})
+    return spool
+
+
+def _iter_batches(
+    stream: BinaryIO, job: Dict[str, Any], checkpoint: Dict[str, Any], settings: Any
+) -> Iterator[Tuple[pd.DataFrame, int, Optional[bytes]]]:
+    """Batches still to be written as (DataFrame, bytes consumed, CSV header)."""
+    if checkpoint["byte_offset"] is not None:
+        yield from iter_record_blocks(stream, job["format"], settings.ingest_block_bytes, checkpoint["header"])
+        return
+
+    skip = checkpoint["rows_written"]
+    for batch in iter_dataframes(stream, job["file_object"], batch_rows=settings.ingest_batch_rows):
+        if skip:
+            skipped = min(skip, len(batch))
+            skip -= skipped
+            batch = batch.iloc[skipped:]
+            if batch.empty:
+                continue
+        yield batch, 0, None
+
+
+def _link_duplicate(job: Dict[str, Any], file_metadata: Dict[str, Any], original: Dict[str, Any]) -> None:
+    """Reuse the dataset of an identical, already ingested file instead of storing another copy."""
+    dataset_id, original_dataset_id = job["dataset_id"], original["dataset_id"]
+
+    file_metadata.update({
+        "file_location": original["file_location"],
+        "dataset_id": original_dataset_id,
+        "duplicate_of": original["_id"],
+    })
+    files_collection.replace_one({"_id": file_metadata["_id"]}, file_metadata, upsert=True)
+
+    # Mark the placeholder first so /datasets/create resolves it from now on,
+    # then move dataset information created in the meantime
+    datasets_collection.update_one(
+        {"_id": dataset_id}, {"$set": {"duplicate_of": original_dataset_id, "ingest_status": "completed"}})
+    original_dataset = datasets_collection.find_one({"_id": original_dataset_id}, {"snapshot": 1, "columns": 1}) or {}
+    dataset_information_collection.update_many(
+        {"dataset_id": dataset_id},
+        {"$set": {
+            "dataset_id": original_dataset_id,
+            "snapshot": original_dataset.get("snapshot"),
+            "columns": original_dataset.get("columns", []),
+        }},
+    )
+    bump_catalog_version()
+
+    if job["file_object"] != original["file_location"]:
+        try:
+            get_storage_service().delete_object(job["file_object"])
+        except Exception as e:
+            logger.warning(f"Could not delete duplicate upload {job['file_object']}: {e}")
+
+    _update_job(job["_id"], {
+        "status": "completed",
+        "phase": None,
+        "dataset_id": original_dataset_id,
+        "duplicate_of": original["_id"],
+    })
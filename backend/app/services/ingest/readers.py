@@ -0,0 +1,436 @@
+"""
+Format sniffing and streaming readers for ingest.
+
+Uploaded files are identified by their leading bytes (falling back to the
+file extension), so a renamed or extension-less file still parses:
+
+- gzip (``1f 8b``) and zstd (``28 b5 2f fd``) are decompressed on the fly
+  and the decompressed stream is sniffed again
+- Parquet (``PAR1``) is read one row group batch at a time
+- XLSX (a zip archive) is read with openpyxl in read-only streaming mode
+- JSON Lines (first non-blank byte ``{``) and CSV are read in row chunks;
+  a JSON array (``[``) is read whole
+
+``iter_dataframes`` yields DataFrame batches without materializing the whole
+file; ``read_dataframe`` returns a single DataFrame. Uncompressed CSV and JSON
+Lines can also be read in byte blocks cut on record boundaries
+(``iter_record_blocks``), so a reader can report exactly how far into the file
+each batch ends and later continue from that offset.
+
+Each batch infers its own column types, so the same column can come out as
+integers in one batch and floats or strings in the next. ``merge_column_types``
+folds the types of every batch into one type per column (integers and floats
+widen to floats, any other mix becomes strings), ``apply_column_types`` casts
+data to them and ``column_types_schema`` gives the matching Arrow schema.
+"""
+import gzip
+import io
+import json
+import os
+import tempfile
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+SNIFF_BYTES = 4096
+SPOOL_MAX_MEMORY = 64 * 1024 * 1024
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+PARQUET_MAGIC = b"PAR1"
+ZIP_MAGIC = b"PK\x03\x04"
+
+EXTENSION_FORMATS = {
+    ".csv": "csv",
+    ".txt": "csv",
+    ".jsonl": "ndjson",
+    ".ndjson": "ndjson",
+    ".json": "json",
+    ".parquet": "parquet",
+    ".xlsx": "xlsx",
+}
+COMPRESSION_EXTENSIONS = {".gz": "gzip", ".gzip": "gzip", ".zst": "zstd", ".zstd": "zstd"}
+
+
+class UnsupportedFormatError(ValueError):
+    """Raised when an uploaded file cannot be read by any ingest reader."""
+
+
+class EmptyFileError(ValueError):
+    """Raised when an uploaded file holds no data, not even a CSV header."""
+
+
+class _PrefixedStream(io.RawIOBase):
+    """Replays already-read leading bytes in front of a non-seekable stream."""
+
+    def __init__(self, prefix: bytes, stream: BinaryIO):
+        super().__init__()
+        self._prefix = memoryview(prefix)
+        self._stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._prefix:
+            count = min(len(buffer), len(self._prefix))
+            buffer[:count] = self._prefix[:count]
+            self._prefix = self._prefix[count:]
+            return count
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _is_seekable(stream: BinaryIO) -> bool:
+    # GzipFile claims to be seekable but seeks backwards by decompressing
+    # again, which fails when the compressed stream itself cannot seek
+    return getattr(stream, "seekable", lambda: False)() and not isinstance(stream, gzip.GzipFile)
+
+
+def _peek(stream: BinaryIO, size: int = SNIFF_BYTES) -> Tuple[bytes, BinaryIO]:
+    """Leading bytes of ``stream`` and a stream that still starts at them."""
+    if _is_seekable(stream):
+        position = stream.tell()
+        head = stream.read(size)
+        stream.seek(position)
+        return head, stream
+    head = stream.read(size)
+    return head, io.BufferedReader(_PrefixedStream(head, stream), buffer_size=1024 * 1024)
+
+
+def _seekable(stream: BinaryIO) -> BinaryIO:
+    """Random-access copy of a stream (Parquet footers and XLSX archives need seeking)."""
+    if _is_seekable(stream):
+        return stream
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    for chunk in iter(lambda: stream.read(1024 * 1024), b""):
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+
+def _split_extension(filename: str) -> Tuple[Optional[str], Optional[str]]:
+    """(compression, format) implied by a file name such as ``data.csv.gz``."""
+    name, extension = os.path.splitext(filename.lower())
+    compression = COMPRESSION_EXTENSIONS.get(extension)
+    if compression:
+        extension = os.path.splitext(name)[1]
+    return compression, EXTENSION_FORMATS.get(extension)
+
+
+def sniff_format(head: bytes, filename: str = "") -> str:
+    """Format ("csv", "ndjson", "json", "parquet" or "xlsx") of an uncompressed stream."""
+    if head.startswith(PARQUET_MAGIC):
+        return "parquet"
+    if head.startswith(ZIP_MAGIC):
+        return "xlsx"
+    text_head = head.lstrip(b"\xef\xbb\xbf \t\r\n")
+    if text_head.startswith(b"{"):
+        return "ndjson"
+    if text_head.startswith(b"["):
+        return "json"
+    return _split_extension(filename)[1] or "csv"
+
+
+def sniff_compression(head: bytes) -> Optional[str]:
+    if head.startswith(GZIP_MAGIC):
+        return "gzip"
+    if head.startswith(ZSTD_MAGIC):
+        return "zstd"
+    return None
+
+
+def open_decompressed(stream: BinaryIO, compression: Optional[str]) -> BinaryIO:
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=stream, mode="rb")
+    if compression == "zstd":
+        # pyarrow ships the zstd codec, so no extra dependency is needed
+        return pa.CompressedInputStream(pa.PythonFile(stream, mode="r"), "zstd")
+    return stream
+
+
+def detect(stream: BinaryIO, filename: str = "") -> Tuple[str, Optional[str], BinaryIO]:
+    """
+    Identify the format of ``stream``.
+
+    Returns:
+        Tuple of (format, compression, decompressed stream positioned at the start)
+    """
+    head, stream = _peek(stream)
+    compression = sniff_compression(head)
+    if compression:
+        head, stream = _peek(open_decompressed(stream, compression))
+    return sniff_format(head, filename), compression, stream
+
+
+def _iter_csv(stream: BinaryIO, batch_rows: int) -> Iterator[pd.DataFrame]:
+    with pd.read_csv(stream, chunksize=batch_rows) as reader:
+        yield from reader
+
+
+def _iter_ndjson(stream: BinaryIO, batch_rows: int) -> Iterator[pd.DataFrame]:
+    with pd.read_json(io.TextIOWrapper(stream, encoding="utf-8-sig"), lines=True, chunksize=batch_rows) as reader:
+        yield from reader
+
+
+def _iter_json(stream: BinaryIO, batch_rows: int) -> Iterator[pd.DataFrame]:
+    df = pd.read_json(io.TextIOWrapper(stream, encoding="utf-8-sig"))
+    for start in range(0, len(df), batch_rows):
+        yield df.iloc[start:start + batch_rows]
+
+
+def _iter_parquet(stream: BinaryIO, batch_rows: int) -> Iterator[pd.DataFrame]:
+    parquet_file = pq.ParquetFile(_seekable(stream))
+    for batch in parquet_file.iter_batches(batch_size=batch_rows):
+        yield batch.to_pandas()
+
+
+def _iter_xlsx(stream: BinaryIO, batch_rows: int) -> Iterator[pd.DataFrame]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise UnsupportedFormatError("Excel files require the openpyxl package")
+
+    workbook = load_workbook(_seekable(stream), read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(name) if name is not None else f"column_{i}" for i, name in enumerate(header)]
+        batch = []
+        yielded = False
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_rows:
+                yield pd.DataFrame.from_records(batch, columns=columns)
+                batch = []
+                yielded = True
+        if batch or not yielded:
+            # A sheet with only a header still yields its columns
+            yield pd.DataFrame.from_records(batch, columns=columns)
+    finally:
+        workbook.close()
+
+
+# Formats that can be split into independently parseable byte blocks
+BLOCK_FORMATS = {"csv", "ndjson"}
+
+
+def _last_record_end(data: bytes, quotechar: Optional[bytes]) -> int:
+    """
+    Length of the longest prefix of ``data`` ending on a record boundary.
+
+    A newline inside a quoted CSV field does not end a record; since ``data``
+    starts on a boundary, a newline is outside quotes when an even number of
+    quote characters precedes it. Returns 0 if ``data`` holds no complete record.
+    """
+    position = data.rfind(b"\n")
+    if quotechar is None or position < 0:
+        return position + 1
+    quotes = data.count(quotechar, 0, position)
+    while position >= 0 and quotes % 2:
+        previous = data.rfind(b"\n", 0, position)
+        quotes -= data.count(quotechar, previous + 1, position)
+        position = previous
+    return position + 1
+
+
+def _first_record_end(data: bytes, quotechar: bytes) -> int:
+    """Length of the first complete record in ``data``, or 0 if it is incomplete."""
+    quotes = 0
+    start = 0
+    while True:
+        position = data.find(b"\n", start)
+        if position < 0:
+            return 0
+        quotes += data.count(quotechar, start, position)
+        if quotes % 2 == 0:
+            return position + 1
+        start = position + 1
+
+
+def _parse_block(file_format: str, header: bytes, block: bytes) -> pd.DataFrame:
+    if file_format == "csv":
+        return pd.read_csv(io.BytesIO(header + block))
+    block = block.lstrip(b"\xef\xbb\xbf")
+    if not block.strip():
+        return pd.DataFrame()
+    return pd.read_json(io.BytesIO(block), lines=True)
+
+
+def iter_record_blocks(
+    stream: BinaryIO, file_format: str, block_size: int, header: Optional[bytes] = None
+) -> Iterator[Tuple[pd.DataFrame, int, bytes]]:
+    """
+    Read an uncompressed CSV or JSON Lines stream in blocks of about ``block_size`` bytes.
+
+    Every block is cut after the last complete record it contains, so the
+    byte count consumed by each batch is exact. To continue an earlier read,
+    pass a stream positioned at a block boundary together with the CSV header
+    returned by the earlier read.
+
+    Yields:
+        Tuples of (DataFrame, bytes consumed from the stream, CSV header)
+
+    Raises:
+        EmptyFileError: If a CSV stream ends before any header
+    """
+    quotechar = b'"' if file_format == "csv" else None
+    header = header or b""
+    pending = b""
+    consumed = 0
+    while True:
+        chunk = stream.read(block_size)
+        data = pending + chunk
+        if file_format == "csv" and not header:
+            if not chunk and not data.strip():
+                raise EmptyFileError("The file is empty")
+            end = _first_record_end(data, quotechar) or (0 if chunk else len(data))
+            if not end:
+                pending = data
+                continue
+            header, data, consumed = data[:end], data[end:], consumed + end
+            if not header.strip():
+                # Blank lines before the header
+                header, pending = b"", data
+                continue
+        if not chunk:
+            # A header that was just read still yields a batch, so a CSV
+            # without rows keeps its columns
+            if data.strip() or consumed:
+                yield _parse_block(file_format, header, data), consumed + len(data), header
+            return
+        end = _last_record_end(data, quotechar)
+        if not end:
+            pending = data
+            continue
+        yield _parse_block(file_format, header, data[:end]), consumed + end, header
+        pending = data[end:]
+        consumed = 0
+
+
+def _column_type(series: pd.Series) -> str:
+    if series.isna().all():
+        return "null"
+    if pd.api.types.is_bool_dtype(series):
+        return "bool"
+    if pd.api.types.is_integer_dtype(series):
+        return "int"
+    if pd.api.types.is_float_dtype(series):
+        return "float"
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "datetime"
+    return "string"
+
+
+def _merge_type(current: str, new: str) -> str:
+    if current == new:
+        return current
+    # A missing value turns an integer column into floats, as in pandas
+    if "null" in (current, new):
+        other = new if current == "null" else current
+        return "float" if other == "int" else other
+    if {current, new} == {"int", "float"}:
+        return "float"
+    return "string"
+
+
+def merge_column_types(column_types: Dict[str, str], batch: pd.DataFrame) -> Dict[str, str]:
+    """
+    Fold the column types of ``batch`` into those of the batches before it.
+
+    Types are "null" (no values yet), "bool", "int", "float", "datetime" or
+    "string". A column missing from a batch counts as null there.
+    """
+    merged = dict(column_types)
+    first = not merged
+    for column in batch.columns:
+        name = str(column)
+        batch_type = _column_type(batch[column])
+        if name in merged:
+            merged[name] = _merge_type(merged[name], batch_type)
+        else:
+            merged[name] = batch_type if first else _merge_type("null", batch_type)
+    for name in set(merged) - {str(column) for column in batch.columns}:
+        merged[name] = _merge_type(merged[name], "null")
+    return merged
+
+
+def _as_string(value: Any) -> Optional[str]:
+    if hasattr(value, "tolist"):
+        # NumPy scalars, and arrays from Parquet list columns
+        value = value.tolist()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    if value is None or pd.isna(value):
+        return None
+    return str(value)
+
+
+def apply_column_types(df: pd.DataFrame, column_types: Dict[str, str]) -> pd.DataFrame:
+    """Cast the columns of ``df`` to types from ``merge_column_types``; unknown columns are left as they are."""
+    df = df.copy()
+    for column in df.columns:
+        column_type = column_types.get(str(column))
+        if column_type == "int":
+            df[column] = df[column].astype("Int64" if df[column].isna().any() else "int64")
+        elif column_type == "float":
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype("float64")
+        elif column_type == "datetime":
+            # MongoDB returns naive datetimes in UTC
+            df[column] = pd.to_datetime(df[column], errors="coerce", utc=True)
+        elif column_type == "string":
+            df[column] = df[column].map(_as_string).astype(object)
+    return df
+
+
+ARROW_TYPES = {
+    "null": pa.null(),
+    "bool": pa.bool_(),
+    "int": pa.int64(),
+    "float": pa.float64(),
+    "datetime": pa.timestamp("ns", tz="UTC"),
+    "string": pa.string(),
+}
+
+
+def column_types_schema(columns: List[str], column_types: Dict[str, str]) -> pa.Schema:
+    """Arrow schema of data cast by ``apply_column_types``; columns without a type are strings."""
+    return pa.schema([(column, ARROW_TYPES[column_types.get(column, "string")]) for column in columns])
+
+
+READERS = {
+    "csv": _iter_csv,
+    "ndjson": _iter_ndjson,
+    "json": _iter_json,
+    "parquet": _iter_parquet,
+    "xlsx": _iter_xlsx,
+}
+
+
+def iter_dataframes(stream: BinaryIO, filename: str = "", batch_rows: int = 50000) -> Iterator[pd.DataFrame]:
+    """Yield the rows of an uploaded file as DataFrames of at most ``batch_rows`` rows."""
+    file_format, _, stream = detect(stream, filename)
+    yield from READERS[file_format](stream, batch_rows)
+
+
+def read_dataframe(stream: BinaryIO, filename: str = "") -> pd.DataFrame:
+    """
+    Read a whole uploaded file into one DataFrame.
+
+    CSV is parsed in a single pass so column types are inferred over the whole
+    file rather than per batch.
+    """
+    file_format, _, stream = detect(stream, filename)
+    if file_format == "csv":
+        return pd.read_csv(stream)
+    if file_format == "parquet":
+        return pq.read_table(_seekable(stream)).to_pandas()
+    batches = list(READERS[file_format](stream, 50000))
+    if not batches:
+        return pd.DataFrame()
+    return pd.concat(batches, ignore_index=True)
@@ -0,0 +1,274 @@
+"""
+Compile structured row queries into MongoDB aggregation pipelines.
+
+Columnar datasets keep their rows only in ``dataset_column_chunks``, so
+their pipelines run on that collection and start by zipping the chunks of
+the referenced columns back into rows; older datasets unwind the ``data``
+array of their ``datasets`` document instead. Filters, grouping, sorting and
+paging are then applied on the server and only the final page of results is
+sent back.
+
+Column names come straight from user CSV headers and may contain dots or a
+leading ``$``, so fields are always read with ``$getField`` and results are
+projected onto positional keys (``c0``, ``c1``...) that are mapped back to
+the real column names by ``map_result_rows`` (or, on the raw read path,
+``raw_rows.aggregate_table``).
+"""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+COMPARISON_OPERATORS = {
+    "eq": "$eq",
+    "ne": "$ne",
+    "gt": "$gt",
+    "gte": "$gte",
+    "lt": "$lt",
+    "lte": "$lte",
+}
+
+AGGREGATE_FUNCTIONS = {"sum", "count", "avg", "min", "max"}
+
+
+class PipelineBuildError(ValueError):
+    """Raised when a row query cannot be compiled."""
+
+
+def field(column: str) -> Dict[str, Any]:
+    return {"$getField": {"field": {"$literal": column}, "input": "$$CURRENT"}}
+
+
+def build_filter(filter_spec: Dict[str, Any]) -> Dict[str, Any]:
+    column = filter_spec["column"]
+    op = filter_spec["op"]
+    value = filter_spec.get("value")
+
+    if op in COMPARISON_OPERATORS:
+        return {COMPARISON_OPERATORS[op]: [field(column), {"$literal": value}]}
+    if op == "in":
+        if not isinstance(value, list):
+            raise PipelineBuildError(f"Filter 'in' on {column} expects a list")
+        return {"$in": [field(column), {"$literal": value}]}
+    if op == "contains":
+        return {
+            "$regexMatch": {
+                "input": {"$toString": {"$ifNull": [field(column), ""]}},
+                "regex": re.escape(str(value)),
+                "options": "i",
+            }
+        }
+    raise PipelineBuildError(f"Unsupported filter operator: {op}")
+
+
+def build_accumulator(aggregate: Dict[str, Any]) -> Dict[str, Any]:
+    func = aggregate["func"]
+    column = aggregate.get("column")
+
+    if func not in AGGREGATE_FUNCTIONS:
+        raise PipelineBuildError(f"Unsupported aggregate function: {func}")
+    if func == "count":
+        if column is None:
+            return {"$sum": 1}
+        return {"$sum": {"$cond": [{"$eq": [{"$ifNull": [field(column), None]}, None]}, 0, 1]}}
+    if column is None:
+        raise PipelineBuildError(f"Aggregate '{func}' requires a column")
+    return {f"${func}": field(column)}
+
+
+def aggregate_alias(aggregate: Dict[str, Any]) -> str:
+    if aggregate.get("alias"):
+        return aggregate["alias"]
+    if aggregate.get("column") is None:
+        return aggregate["func"]
+    return f"{aggregate['func']}_{aggregate['column']}"
+
+
+def chunk_rows_stages(
+    dataset_id: Any, columns: List[str], row_limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Stages that rebuild rows of ``columns`` from ``dataset_column_chunks``.
+
+    Each chunk index is grouped into one document holding the values of every
+    requested column, which is then expanded into one document per row. Rows
+    come out in dataset order. With ``row_limit`` only the chunks that hold
+    the first ``row_limit`` rows are read.
+    """
+    match: Dict[str, Any] = {"dataset_id": dataset_id, "column": {"$in": list(columns)}}
+    if row_limit is not None:
+        match["row_offset"] = {"$lt": row_limit}
+    row = {
+        "$arrayToObject": {
+            "$map": {
+                "input": "$columns",
+                "as": "c",
+                "in": {"k": "$$c.k", "v": {"$arrayElemAt": ["$$c.v", "$$i"]}},
+            }
+        }
+    }
+    return [
+        {"$match": match},
+        {"$group": {
+            "_id": "$chunk",
+            "row_count": {"$first": "$row_count"},
+            "columns": {"$push": {"k": "$column", "v": "$values"}},
+        }},
+        {"$sort": {"_id": 1}},
+        {"$project": {"_id": 0, "rows": {"$map": {"input": {"$range": [0, "$row_count"]}, "as": "i", "in": row}}}},
+        {"$unwind": "$rows"},
+        {"$replaceRoot": {"newRoot": "$rows"}},
+    ]
+
+
+def build_rows_pipeline(
+    dataset_id: Any,
+    dataset_columns: List[str],
+    filters: Optional[List[Dict[str, Any]]] = None,
+    sort: Optional[List[Dict[str, Any]]] = None,
+    group_by: Optional[List[str]] = None,
+    aggregates: Optional[List[Dict[str, Any]]] = None,
+    columns: Optional[List[str]] = None,
+    limit: int = 100,
+    offset: int = 0,
+    columnar: bool = False,
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Build the aggregation pipeline for a row query.
+
+    The pipeline runs on ``dataset_column_chunks`` when ``columnar`` is set
+    and on the datasets collection otherwise.
+
+    Args:
+        dataset_id: ``_id`` of the document in the datasets collection
+        dataset_columns: Known columns of the dataset, used for validation
+        filters: ``{"column", "op", "value"}`` dicts, combined with AND
+        sort: ``{"column", "direction"}`` dicts, direction "asc" or "desc"
+        group_by: Columns to group by
+        aggregates: ``{"func", "column", "alias"}`` dicts
+        columns: Columns to return for ungrouped queries (default: all)
+        limit: Maximum number of result rows
+        offset: Number of result rows to skip
+        columnar: Whether the dataset is stored in column chunks
+
+    Returns:
+        Tuple of (pipeline, output column names)
+    """
+    filters = filters or []
+    sort = sort or []
+    group_by = group_by or []
+    aggregates = aggregates or []
+
+    known = set(dataset_columns)
+    referenced = [f["column"] for f in filters] + list(group_by) + [a["column"] for a in aggregates if a.get("column")]
+    if not (group_by or aggregates):
+        referenced += list(columns or []) + [s["column"] for s in sort]
+    unknown = sorted({column for column in referenced if column not in known})
+    if unknown:
+        raise PipelineBuildError(f"Unknown columns: {', '.join(unknown)}")
+
+    grouped = bool(group_by or aggregates)
+    if columnar:
+        needed = list(dict.fromkeys(
+            referenced if grouped else referenced + list(columns or dataset_columns)))
+        # Row counts alone still need one column to come from
+        needed = needed or list(dataset_columns[:1])
+        # Without filters or sorting, the page only touches the leading chunks
+        row_limit = offset + limit if not (grouped or filters or sort) else None
+        pipeline = chunk_rows_stages(dataset_id, needed, row_limit)
+    else:
+        pipeline = [
+            {"$match": {"_id": dataset_id}},
+            {"$unwind": "$data"},
+            {"$replaceRoot": {"newRoot": "$data"}},
+        ]
+    if filters:
+        pipeline.append({"$match": {"$expr": {"$and": [build_filter(f) for f in filters]}}})
+
+    if grouped:
+        output_columns = list(group_by) + [aggregate_alias(a) for a in aggregates]
+        if len(set(output_columns)) != len(output_columns):
+            raise PipelineBuildError("Group-by columns and aggregate aliases must be unique")
+
+        group_stage: Dict[str, Any] = {
+            "_id": {f"g{i}": field(column) for i, column in enumerate(group_by)} if group_by else None
+        }
+        for i, aggregate in enumerate(aggregates):
+            group_stage[f"a{i}"] = build_accumulator(aggregate)
+        pipeline.append({"$group": group_stage})
+
+        projection: Dict[str, Any] = {"_id": 0}
+        for i in range(len(group_by)):
+            projection[f"c{i}"] = f"$_id.g{i}"
+        for i in range(len(aggregates)):
+            projection[f"c{len(group_by) + i}"] = f"$a{i}"
+        pipeline.append({"$project": projection})
+
+        sort_stage = {}
+        for spec in sort:
+            if spec["column"] not in output_columns:
+                raise PipelineBuildError(
+                    f"Grouped queries can only sort by group-by columns or aggregates, not {spec['column']}")
+            sort_stage[f"c{output_columns.index(spec['column'])}"] = -1 if spec.get("direction") == "desc" else 1
+        if sort_stage:
+            pipeline.append({"$sort": sort_stage})
+        pipeline += [{"$skip": offset}, {"$limit": limit}]
+    else:
+        output_columns = list(columns) if columns else list(dataset_columns)
+        if sort:
+            pipeline.append({"$set": {f"s{i}": field(spec["column"]) for i, spec in enumerate(sort)}})
+            pipeline.append({"$sort": {f"s{i}": -1 if spec.get("direction") == "desc" else 1
+                                       for i, spec in enumerate(sort)}})
+        pipeline += [
+            {"$skip": offset},
+            {"$limit": limit},
+            {"$project": {"_id": 0, **{f"c{i}": field(column) for i, column in enumerate(output_columns)}}},
+        ]
+
+    return pipeline, output_columns
+
+
+def result_column_types(
+    column_types: Optional[Dict[str, str]],
+    output_columns: List[str],
+    group_by: Optional[List[str]] = None,
+    aggregates: Optional[List[Dict[str, Any]]] = None,
+) -> Optional[List[str]]:
+    """
+    Types of the output columns of a row query.
+
+    Args:
+        column_types: Column types of the dataset (see
+            ``readers.merge_column_types``), None when they are not known
+        output_columns: Output column names from ``build_rows_pipeline``
+        group_by: Columns the query groups by
+        aggregates: Aggregates of the query
+
+    Returns:
+        One type per output column, or None if any of them is unknown
+    """
+    if not column_types:
+        return None
+    group_by = group_by or []
+    aggregates = aggregates or []
+    if not (group_by or aggregates):
+        types = [column_types.get(column) for column in output_columns]
+    else:
+        types = [column_types.get(column) for column in group_by]
+        for aggregate in aggregates:
+            func = aggregate["func"]
+            column_type = column_types.get(aggregate["column"]) if aggregate.get("column") else None
+            if func == "count":
+                types.append("int")
+            elif func == "avg":
+                types.append("float")
+            elif func == "sum":
+                # $sum skips values that are not numbers
+                types.append("float" if column_type == "float" else "int")
+            else:
+                types.append(column_type)
+    return None if None in types else types
+
+
+def map_result_rows(documents: List[Dict[str, Any]], output_columns: List[str]) -> List[Dict[str, Any]]:
+    """Map positional result keys back to the output column names."""
+    keys = [f"c{i}" for i in range(len(output_columns))]
+    return [{column: doc.get(key) for column, key in zip(output_columns, keys)} for doc in documents]
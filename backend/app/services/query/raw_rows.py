@@ -0,0 +1,123 @@
+"""
+Raw BSON read path for row queries.
+
+When the types of the result columns are known, ``pymongoarrow`` decodes the
+raw BSON results straight into Arrow arrays with an explicit schema built from
+those types, so no Python object is created per row or per value. The schema
+is never inferred: pymongoarrow would infer it from the first document and
+turn values of any other type into nulls.
+
+Results without known types, and results that hold a value of another type
+than the schema says (e.g. numbers in early chunks of a column that later
+became a string column), are fetched with ``aggregate_raw_batches`` instead.
+Each raw batch is decoded into documents and split into columns right away,
+so only one batch of decoded documents is alive at a time.
+"""
+import math
+from typing import Any, Dict, List, Optional
+
+import bson
+import pyarrow as pa
+from pymongo.collection import Collection
+
+from app.config.logging import get_logger
+from app.services.query.row_formats import arrow_array, null_non_finite
+
+from pymongoarrow.api import Schema, aggregate_arrow_all
+
+logger = get_logger("services.raw_rows")
+
+DEFAULT_BATCH_SIZE = 5000
+
+# Arrow types of the column types from ``readers.merge_column_types``;
+# MongoDB datetimes have millisecond resolution
+RESULT_TYPES = {
+    "null": pa.null(),
+    "bool": pa.bool_(),
+    "int": pa.int64(),
+    "float": pa.float64(),
+    "datetime": pa.timestamp("ms"),
+    "string": pa.string(),
+}
+
+
+def _keys(output_columns: List[str]) -> List[str]:
+    return [f"c{i}" for i in range(len(output_columns))]
+
+
+def _native_table(
+    collection: Collection, pipeline: List[Dict[str, Any]], output_columns: List[str],
+    column_types: Optional[List[str]],
+) -> Optional[pa.Table]:
+    if column_types is None:
+        return None
+    keys = _keys(output_columns)
+    schema = Schema({key: RESULT_TYPES[column_type] for key, column_type in zip(keys, column_types)})
+    try:
+        table = aggregate_arrow_all(collection, pipeline, schema=schema, allowDiskUse=True)
+    except (pa.ArrowException, TypeError, ValueError) as e:
+        # A value that does not match the schema
+        logger.warning(f"Native BSON decoding failed, decoding raw batches instead: {e}")
+        return None
+    return null_non_finite(table.select(keys).rename_columns(output_columns))
+
+
+def _raw_columns(
+    collection: Collection, pipeline: List[Dict[str, Any]], output_columns: List[str], batch_size: int
+) -> List[List[Any]]:
+    keys = _keys(output_columns)
+    values: List[List[Any]] = [[] for _ in keys]
+    for batch in collection.aggregate_raw_batches(pipeline, batchSize=batch_size, allowDiskUse=True):
+        documents = bson.decode_all(batch)
+        for key, column in zip(keys, values):
+            column.extend([document.get(key) for document in documents])
+    return values
+
+
+def aggregate_columns(
+    collection: Collection,
+    pipeline: List[Dict[str, Any]],
+    output_columns: List[str],
+    column_types: Optional[List[str]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> List[List[Any]]:
+    """
+    Run a row pipeline and return its results column by column.
+
+    Args:
+        collection: Collection to aggregate
+        pipeline: Pipeline from ``build_rows_pipeline``, whose results are on
+            positional keys (``c0``, ``c1``...)
+        output_columns: Column names for the positional keys, in order
+        column_types: Types of the output columns from
+            ``pipeline_builder.result_column_types``, None if unknown
+        batch_size: Documents per raw batch
+
+    Returns:
+        One list of values per output column; NaN and infinities are None
+    """
+    table = _native_table(collection, pipeline, output_columns, column_types)
+    if table is not None:
+        return [column.to_pylist() for column in table.columns]
+    return [[None if isinstance(value, float) and not math.isfinite(value) else value for value in column]
+            for column in _raw_columns(collection, pipeline, output_columns, batch_size)]
+
+
+def aggregate_table(
+    collection: Collection,
+    pipeline: List[Dict[str, Any]],
+    output_columns: List[str],
+    column_types: Optional[List[str]] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> pa.Table:
+    """
+    Run a row pipeline and return its results as an Arrow table.
+
+    Takes the same arguments as ``aggregate_columns``. Columns whose values do
+    not share one type are returned as strings; NaN and infinities are null.
+    """
+    table = _native_table(collection, pipeline, output_columns, column_types)
+    if table is not None:
+        return table
+    arrays = [arrow_array(column) for column in _raw_columns(collection, pipeline, output_columns, batch_size)]
+    return null_non_finite(pa.Table.from_arrays(arrays, names=output_columns))
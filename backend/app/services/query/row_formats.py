@@ -0,0 +1,200 @@
+"""
+Alternative encodings for row-returning endpoints, chosen through ``Accept``.
+
+Row endpoints answer ``application/json`` in their usual shape (a list of
+row objects). Clients that ask for one of the following get the same rows
+without repeating every column name on every row:
+
+- ``application/vnd.columnar+json``: ``{..., "columns": [...], "data": [[...], ...]}``
+- ``application/msgpack``: the columnar structure encoded as MessagePack
+  (requires the optional ``msgpack`` package)
+- ``application/vnd.apache.arrow.stream``: an Arrow IPC stream of the rows;
+  the other response fields are stored as JSON in the schema metadata under
+  ``response``
+"""
+import io
+import json
+import math
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from bson import ObjectId
+
+from app.utils.fast_json import dumps
+
+try:
+    import msgpack
+except ImportError:  # optional dependency, MessagePack is not offered without it
+    msgpack = None
+
+JSON = "application/json"
+COLUMNAR_JSON = "application/vnd.columnar+json"
+MSGPACK = "application/msgpack"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+MEDIA_TYPE_ALIASES = {"application/x-msgpack": MSGPACK}
+
+Row = Union[Dict[str, Any], Sequence[Any]]
+
+
+class NotAcceptableError(ValueError):
+    """None of the media types in the Accept header can be produced."""
+
+
+def supported_media_types() -> List[str]:
+    media_types = [JSON, COLUMNAR_JSON, ARROW_STREAM]
+    if msgpack is not None:
+        media_types.append(MSGPACK)
+    return media_types
+
+
+def negotiate_row_format(accept: Optional[str]) -> str:
+    """
+    Media type to answer with, by the client's preference (``q``) and then by Accept order.
+
+    Raises:
+        NotAcceptableError: If the header only lists types that cannot be produced
+    """
+    if not accept:
+        return JSON
+    supported = supported_media_types()
+    candidates = []
+    for index, part in enumerate(accept.split(",")):
+        media_type, *params = [piece.strip() for piece in part.split(";")]
+        media_type = MEDIA_TYPE_ALIASES.get(media_type.lower(), media_type.lower())
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality <= 0:
+            continue
+        if media_type in ("*/*", "application/*"):
+            media_type = JSON
+        if media_type in supported:
+            candidates.append((-quality, index, media_type))
+    if not candidates:
+        raise NotAcceptableError(f"Supported media types: {', '.join(supported)}")
+    return min(candidates)[2]
+
+
+def row_columns(rows: Sequence[Dict[str, Any]]) -> List[str]:
+    """Union of the keys of ``rows`` in first-seen order."""
+    columns: Dict[str, None] = {}
+    for row in rows:
+        for column in row:
+            columns.setdefault(column, None)
+    return list(columns)
+
+
+def to_columnar(columns: List[str], rows: Sequence[Row]) -> List[List[Any]]:
+    return [[row.get(column) for column in columns] if isinstance(row, dict) else list(row) for row in rows]
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Type is not MessagePack serializable: {type(value).__name__}")
+
+
+def arrow_array(values: List[Any]) -> pa.Array:
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Mixed types (e.g. numbers and strings in one column) are sent as strings
+        return pa.array([None if value is None else str(value) for value in values], type=pa.string())
+
+
+def _clean_floats(values: List[List[Any]]) -> List[List[Any]]:
+    # Non-finite floats are null in every encoding, as in JSON responses
+    return [[None if isinstance(value, float) and not math.isfinite(value) else value for value in row]
+            for row in values]
+
+
+def null_non_finite(table: pa.Table) -> pa.Table:
+    """Replace NaN and infinities in the float columns of ``table`` with nulls."""
+    for index, column in enumerate(table.columns):
+        if pa.types.is_floating(column.type):
+            cleaned = pc.if_else(pc.is_finite(column), column, pa.scalar(None, column.type))
+            table = table.set_column(index, table.field(index), cleaned)
+    return table
+
+
+def _ipc_stream(table: pa.Table) -> bytes:
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def _encode_columnar(media_type: str, columns: List[str], data: Sequence[Sequence[Any]],
+                     fields: Dict[str, Any]) -> bytes:
+    if media_type == COLUMNAR_JSON:
+        return dumps({**fields, "columns": columns, "data": data})
+    if media_type == MSGPACK:
+        return msgpack.packb({**fields, "columns": columns, "data": data},
+                             default=_msgpack_default, use_bin_type=True)
+    raise ValueError(f"Unsupported row media type: {media_type}")
+
+
+def encode_rows(
+    media_type: str, columns: List[str], rows: Sequence[Row], fields: Optional[Dict[str, Any]] = None
+) -> bytes:
+    """
+    Encode rows (dicts or sequences in ``columns`` order) and other response fields.
+
+    Args:
+        media_type: One of the non-JSON media types returned by ``negotiate_row_format``
+        columns: Column names, in output order
+        rows: Row dicts or value sequences
+        fields: Other response fields (e.g. row_count), placed next to ``columns`` and ``data``
+    """
+    fields = fields or {}
+    data = _clean_floats(to_columnar(columns, rows))
+
+    if media_type == ARROW_STREAM:
+        arrays = [arrow_array([row[index] for row in data]) for index in range(len(columns))]
+        # from_arrays (unlike from_pandas) keeps duplicate column names of SQL results
+        return encode_arrow_table(pa.Table.from_arrays(arrays, names=columns), fields)
+    return _encode_columnar(media_type, columns, data, fields)
+
+
+def encode_columns(
+    media_type: str, columns: List[str], values: List[List[Any]], fields: Optional[Dict[str, Any]] = None
+) -> bytes:
+    """
+    ``encode_rows`` for results that were read column by column.
+
+    Args:
+        values: One list of values per column, all of the same length; NaN
+            and infinities are expected to be None already
+    """
+    fields = fields or {}
+    if media_type == ARROW_STREAM:
+        return encode_arrow_table(pa.Table.from_arrays([arrow_array(column) for column in values], names=columns),
+                                  fields)
+    return _encode_columnar(media_type, columns, list(zip(*values)), fields)
+
+
+def encode_arrow_table(table: pa.Table, fields: Optional[Dict[str, Any]] = None) -> bytes:
+    """
+    Arrow stream response for rows that are already in an Arrow table.
+
+    The table is written from its buffers without touching individual values.
+    """
+    table = null_non_finite(table)
+    return _ipc_stream(table.replace_schema_metadata({"response": json.dumps(fields or {}, default=str)}))
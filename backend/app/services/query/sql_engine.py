@@ -0,0 +1,184 @@
+"""
+Embedded SQL analytics over dataset snapshots.
+
+Queries run in an in-process DuckDB database. Each dataset referenced by a
+query is registered as a view over its Parquet snapshot (see
+``snapshot_service``), downloaded once into a local cache directory, so
+aggregations never touch MongoDB.
+
+Queries are restricted to a single SELECT statement without table functions,
+the connection cannot reach any file other than the registered snapshots,
+and results are capped by a row limit and a timeout.
+"""
+import os
+import re
+import json
+import shutil
+import threading
+import time
+from typing import Any, Dict
+
+import duckdb
+
+from app.config.logging import get_logger
+from app.config.settings import get_settings
+from app.services.storage.mongodb_service import get_accessible_dataset_info
+from app.services.storage.storage_factory import get_storage_service
+
+logger = get_logger("services.sql_engine")
+
+VIEW_NAME_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]{0,62}$")
+
+_cache_lock = threading.Lock()
+
+
+class QueryError(ValueError):
+    """Raised when a query is rejected or fails to execute."""
+
+
+class DatasetAccessError(QueryError):
+    """Raised when a query references a dataset the user cannot read."""
+
+
+def _contains_table_function(node: Any) -> bool:
+    if isinstance(node, dict):
+        if node.get("type") == "TABLE_FUNCTION":
+            return True
+        return any(_contains_table_function(value) for value in node.values())
+    if isinstance(node, list):
+        return any(_contains_table_function(value) for value in node)
+    return False
+
+
+def validate_sql(connection: duckdb.DuckDBPyConnection, sql: str) -> None:
+    """
+    Reject anything other than a single SELECT over registered views.
+
+    ``json_serialize_sql`` only accepts SELECT statements, and walking the
+    parse tree rules out table functions such as ``read_csv``.
+    """
+    try:
+        statements = duckdb.extract_statements(sql)
+    except duckdb.Error as e:
+        raise QueryError(str(e))
+    if len(statements) != 1:
+        raise QueryError("Exactly one SQL statement is allowed")
+    if statements[0].type != duckdb.StatementType.SELECT:
+        raise QueryError("Only SELECT statements are allowed")
+
+    serialized = connection.execute("SELECT json_serialize_sql(?)", [sql]).fetchone()[0]
+    tree = json.loads(serialized)
+    if tree.get("error"):
+        raise QueryError(tree.get("error_message", "Invalid SQL"))
+    if _contains_table_function(tree.get("statements")):
+        raise QueryError("Table functions are not allowed; query the registered dataset views")
+
+
+def get_local_snapshot(object_name: str) -> str:
+    """
+    Return the local path of a snapshot, downloading it on first use.
+
+    Snapshot object names are unique per write, so a cached file never goes
+    stale; a new snapshot simply gets a new cache entry.
+    """
+    # Local storage already keeps the snapshot as a file
+    storage_path = get_storage_service().local_path(object_name)
+    if storage_path is not None:
+        return storage_path
+
+    cache_directory = get_settings().query_cache_directory
+    local_path = os.path.join(cache_directory, object_name)
+    if os.path.exists(local_path):
+        return local_path
+
+    with _cache_lock:
+        if os.path.exists(local_path):
+            return local_path
+
+        os.makedirs(os.path.dirname(local_path), exist_ok=True)
+        temporary_path = f"{local_path}.part"
+        response = get_storage_service().get_object(object_name=object_name)
+        try:
+            with open(temporary_path, "wb") as f:
+                shutil.copyfileobj(response, f, length=1024 * 1024)
+        finally:
+            response.close()
+            if hasattr(response, "release_conn"):
+                response.release_conn()
+        os.replace(temporary_path, local_path)
+        logger.info(f"Cached snapshot {object_name} at {local_path}")
+
+    return local_path
+
+
+def run_sql_query(sql: str, datasets: Dict[str, str], user_id: str, limit: int) -> Dict[str, Any]:
+    """
+    Run a read-only SQL query over dataset snapshots.
+
+    Args:
+        sql: A single SELECT statement
+        datasets: Mapping of view name to dataset ID, e.g. {"soil": "66a..."}
+        user_id: ID of the requesting user, used for permission checks
+        limit: Maximum number of rows returned
+
+    Returns:
+        Dictionary with columns, rows, row_count, truncated and elapsed_ms
+    """
+    settings = get_settings()
+    limit = max(1, min(limit, settings.query_max_rows))
+    sql = sql.strip().rstrip(";")
+
+    paths: Dict[str, str] = {}
+    for view_name, dataset_id in datasets.items():
+        if not VIEW_NAME_PATTERN.match(view_name):
+            raise QueryError(f"Invalid view name: {view_name}")
+
+        info_doc = get_accessible_dataset_info(dataset_id, user_id, {"snapshot": 1})
+        if not info_doc:
+            raise DatasetAccessError(f"Dataset {dataset_id} not found or not accessible")
+
+        object_name = (info_doc.get("snapshot") or {}).get("parquet_object")
+        if not object_name:
+            raise QueryError(f"Dataset {dataset_id} has no snapshot yet")
+        paths[view_name] = os.path.abspath(get_local_snapshot(object_name))
+
+    connection = duckdb.connect(":memory:", config={"threads": settings.query_threads,
+                                                     "memory_limit": settings.query_memory_limit})
+    try:
+        validate_sql(connection, sql)
+
+        # Only the registered snapshots stay reachable once external access is off
+        allowed_paths = ", ".join("'" + path.replace("'", "''") + "'" for path in paths.values())
+        connection.execute(f"SET allowed_paths = [{allowed_paths}]")
+        connection.execute("SET enable_external_access = false")
+        for view_name, path in paths.items():
+            escaped_path = path.replace("'", "''")
+            connection.execute(f"CREATE VIEW \"{view_name}\" AS SELECT * FROM read_parquet('{escaped_path}')")
+        connection.execute("SET lock_configuration = true")
+
+        timer = threading.Timer(settings.query_timeout_seconds, connection.interrupt)
+        started = time.perf_counter()
+        timer.start()
+        try:
+            relation = connection.sql(sql)
+            columns = list(relation.columns)
+            rows = relation.limit(limit + 1).fetchall()
+        except duckdb.InterruptException:
+            raise QueryError(f"Query exceeded the {settings.query_timeout_seconds}s timeout")
+        except duckdb.Error as e:
+            raise QueryError(str(e))
+        finally:
+            timer.cancel()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    finally:
+        connection.close()
+
+    truncated = len(rows) > limit
+    rows = [list(row) for row in rows[:limit]]
+    return {
+        "columns": columns,
+        "rows": rows,
+        "row_count": len(rows),
+        "truncated": truncated,
+        "elapsed_ms": round(elapsed_ms, 2),
+    }
@@ -1,7 +1,216 @@
+import io
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+# S3 limits: parts are 5 MiB..5 GiB (except the last) and at most 10000 per upload
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PART_COUNT = 10000
+
+
+def plan_part_size(total_size: int, part_size: int) -> int:
+    """Smallest part size >= ``part_size`` that keeps ``total_size`` within the part count limit."""
+    part_size = max(part_size, MIN_PART_SIZE)
+    while -(-total_size // part_size) > MAX_PART_COUNT:
+        part_size *= 2
+    return part_size
+
+
+def _read_exactly(source: BinaryIO, size: int) -> bytes:
+    """Read ``size`` bytes, or fewer only at end of stream."""
+    buffer = bytearray()
+    while len(buffer) < size:
+        data = source.read(size - len(buffer))
+        if not data:
+            break
+        buffer += data
+    return bytes(buffer)
+
+
+class ParallelRangeReader(io.RawIOBase):
+    """
+    Sequential reader over an object that downloads it with concurrent ranged GETs.
+
+    Up to ``max_workers`` parts of ``part_size`` bytes are fetched ahead of the
+    read position and handed out in order, so a consumer such as a CSV parser
+    reads at the combined speed of several connections while holding at most
+    ``max_workers + 1`` parts in memory. Reading begins at byte ``start``.
+    """
+
+    def __init__(self, fetch_range: Callable[[int, int], bytes], size: int, part_size: int, max_workers: int,
+                 start: int = 0):
+        super().__init__()
+        self.size = size
+        self._fetch_range = fetch_range
+        self._max_workers = max(1, max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=self._max_workers)
+        self._ranges = iter([(offset, min(offset + part_size, size) - 1) for offset in range(start, size, part_size)])
+        self._pending = deque()
+        self._buffer = memoryview(b"")
+        self._schedule()
+
+    def _schedule(self) -> None:
+        while len(self._pending) < self._max_workers:
+            byte_range = next(self._ranges, None)
+            if byte_range is None:
+                return
+            self._pending.append(self._executor.submit(self._fetch_range, *byte_range))
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._buffer:
+            if not self._pending:
+                return 0
+            self._buffer = memoryview(self._pending.popleft().result())
+            self._schedule()
+        count = min(len(buffer), len(self._buffer))
+        buffer[:count] = self._buffer[:count]
+        self._buffer = self._buffer[count:]
+        return count
+
+    def close(self) -> None:
+        if not self.closed:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._pending.clear()
+        super().close()
 
 
 class BaseStorage(ABC):
     @abstractmethod
     def upload_file(self, file_bytes: bytes, file_name: str) -> str:
         pass
+
+    @abstractmethod
+    def delete_object(self, object_name: str) -> None:
+        pass
+
+    def ensure_bucket(self) -> None:
+        """Create and configure the bucket if needed. Called once at startup."""
+
+    def local_path(self, object_name: str) -> Optional[str]:
+        """Filesystem path of an object for backends that store objects as local files."""
+        return None
+
+    # ----- Reads -----
+
+    @abstractmethod
+    def get_object_size(self, object_name: str) -> int:
+        """Size of an object in bytes."""
+
+    @abstractmethod
+    def get_object_range(self, object_name: str, start: int, end: int) -> bytes:
+        """Bytes ``start`` through ``end`` (inclusive) of an object."""
+
+    def open_reader(self, object_name: str, size: Optional[int] = None,
+                    part_size: Optional[int] = None, max_workers: Optional[int] = None,
+                    start: int = 0) -> BinaryIO:
+        """
+        Buffered, file-like reader over an object, downloaded with parallel ranged GETs.
+
+        The part size and concurrency default to the DOWNLOAD_PART_SIZE and
+        DOWNLOAD_MAX_WORKERS settings. ``start`` skips the leading bytes, e.g.
+        to resume an interrupted read. Close the reader when done.
+        """
+        from app.config.settings import get_settings
+
+        settings = get_settings()
+        if size is None:
+            size = self.get_object_size(object_name)
+        raw = ParallelRangeReader(
+            lambda start, end: self.get_object_range(object_name, start, end),
+            size,
+            part_size or settings.download_part_size,
+            max_workers or settings.download_max_workers,
+            start,
+        )
+        return io.BufferedReader(raw, buffer_size=1024 * 1024)
+
+    # ----- Multipart uploads -----
+    #
+    # A multipart upload is created, its parts are uploaded (in any order and
+    # in parallel, either by the server through upload_part or by clients
+    # through presigned part URLs), and then completed with the part ETags.
+    # Already uploaded parts can be listed to resume an interrupted upload.
+
+    @abstractmethod
+    def create_multipart_upload(self, object_name: str) -> str:
+        """Start a multipart upload and return its upload ID."""
+
+    @abstractmethod
+    def upload_part(self, object_name: str, upload_id: str, part_number: int, data: bytes) -> str:
+        """Upload one part and return its ETag."""
+
+    @abstractmethod
+    def generate_part_upload_url(self, object_name: str, upload_id: str, part_number: int) -> str:
+        """Presigned PUT URL for one part of a multipart upload."""
+
+    @abstractmethod
+    def list_uploaded_parts(self, object_name: str, upload_id: str) -> List[Dict[str, Union[int, str]]]:
+        """Parts uploaded so far, as ``{"part_number", "etag", "size"}`` dicts."""
+
+    @abstractmethod
+    def complete_multipart_upload(self, object_name: str, upload_id: str, parts: List[Dict[str, Union[int, str]]]) -> str:
+        """Assemble the uploaded ``{"part_number", "etag"}`` parts into the object."""
+
+    @abstractmethod
+    def abort_multipart_upload(self, object_name: str, upload_id: str) -> None:
+        """Abort a multipart upload and discard its uploaded parts."""
+
+    def generate_part_upload_urls(self, object_name: str, upload_id: str, part_numbers: List[int]) -> Dict[int, str]:
+        return {number: self.generate_part_upload_url(object_name, upload_id, number) for number in part_numbers}
+
+    def upload_multipart(
+        self,
+        source: Union[bytes, BinaryIO],
+        object_name: str,
+        part_size: int,
+        max_workers: int,
+        total_size: Optional[int] = None,
+    ) -> str:
+        """
+        Upload ``source`` as a multipart upload with parts sent in parallel.
+
+        At most ``max_workers`` parts are held in memory at a time. The upload
+        is aborted if any part fails.
+        """
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            total_size = len(source)
+        if total_size is not None:
+            part_size = plan_part_size(total_size, part_size)
+
+        upload_id = self.create_multipart_upload(object_name)
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                pending = []
+                parts = []
+                for part_number, data in self._iter_parts(source, part_size):
+                    pending.append((part_number, executor.submit(
+                        self.upload_part, object_name, upload_id, part_number, data)))
+                    if len(pending) >= max_workers:
+                        number, future = pending.pop(0)
+                        parts.append({"part_number": number, "etag": future.result()})
+                parts += [{"part_number": number, "etag": future.result()} for number, future in pending]
+            return self.complete_multipart_upload(object_name, upload_id, parts)
+        except Exception:
+            self.abort_multipart_upload(object_name, upload_id)
+            raise
+
+    @staticmethod
+    def _iter_parts(source: Union[bytes, BinaryIO], part_size: int) -> Iterator[Tuple[int, bytes]]:
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            view = memoryview(source)
+            for part_number, offset in enumerate(range(0, max(len(view), 1), part_size), start=1):
+                yield part_number, bytes(view[offset:offset + part_size])
+            return
+        part_number = 1
+        while True:
+            data = _read_exactly(source, part_size)
+            if not data and part_number > 1:
+                return
+            yield part_number, data
+            part_number += 1
+            if len(data) < part_size:
+                return
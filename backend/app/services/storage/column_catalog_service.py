@@ -0,0 +1,99 @@
+"""
+Global column catalog.
+
+Every ingested dataset gets one ``column_catalog`` document per column with
+its name, position and inferred type. The lowercased name is indexed, so
+column autocomplete and "which datasets have this column" lookups are
+anchored-prefix index scans that never touch the ``datasets`` documents.
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from app.db.database import column_catalog_collection
+
+# Rows inspected per column when inferring its type
+TYPE_SAMPLE_SIZE = 1000
+
+
+def infer_column_type(values: List[Any]) -> str:
+    """Infer a column type name (e.g. "integer", "floating", "string") from sample values."""
+    return pd.api.types.infer_dtype(values, skipna=True)
+
+
+def store_column_catalog(dataset_id: Any, records: List[Dict[str, Any]], columns: List[str]) -> None:
+    """Replace the catalog entries of a dataset."""
+    sample = records[:TYPE_SAMPLE_SIZE]
+    entries = [
+        {
+            "dataset_id": dataset_id,
+            "column_name": column,
+            "column_name_lower": column.lower(),
+            "inferred_type": infer_column_type([record.get(column) for record in sample]),
+            "position": position,
+        }
+        for position, column in enumerate(columns)
+    ]
+    delete_column_catalog(dataset_id)
+    if entries:
+        column_catalog_collection.insert_many(entries, ordered=False)
+
+
+def delete_column_catalog(dataset_id: Any) -> None:
+    column_catalog_collection.delete_many({"dataset_id": dataset_id})
+
+
+def _prefix_query(prefix: Optional[str]) -> Dict[str, Any]:
+    if not prefix:
+        return {}
+    # Anchored, case-sensitive regex on the lowercased name can use the index
+    return {"column_name_lower": {"$regex": f"^{re.escape(prefix.lower())}"}}
+
+
+def has_column_catalog(dataset_id: Any) -> bool:
+    return column_catalog_collection.find_one({"dataset_id": dataset_id}, {"_id": 1}) is not None
+
+
+def get_catalog_columns(dataset_id: Any, prefix: Optional[str] = None, limit: int = 10) -> List[str]:
+    """Column names of one dataset in column order, optionally filtered by prefix."""
+    query = {"dataset_id": dataset_id, **_prefix_query(prefix)}
+    cursor = column_catalog_collection.find(query, {"_id": 0, "column_name": 1}).sort("position", 1).limit(limit)
+    return [doc["column_name"] for doc in cursor]
+
+
+def search_columns(prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    Column names across all datasets starting with ``prefix`` (case-insensitive).
+
+    Returns:
+        List of dicts with column_name, inferred_types and dataset_count,
+        ordered by the number of datasets that have the column
+    """
+    pipeline = [
+        {"$match": _prefix_query(prefix)},
+        {"$group": {
+            "_id": "$column_name_lower",
+            "column_name": {"$first": "$column_name"},
+            "inferred_types": {"$addToSet": "$inferred_type"},
+            "dataset_count": {"$sum": 1},
+        }},
+        {"$sort": {"dataset_count": -1, "_id": 1}},
+        {"$limit": limit},
+        {"$project": {"_id": 0, "column_name": 1, "inferred_types": 1, "dataset_count": 1}},
+    ]
+    return list(column_catalog_collection.aggregate(pipeline))
+
+
+def find_datasets_with_column(column_name: str, limit: int = 100) -> List[Dict[str, Any]]:
+    """
+    Datasets that have a column named ``column_name`` (case-insensitive).
+
+    Returns:
+        List of dicts with dataset_id, column_name, inferred_type and position
+    """
+    cursor = column_catalog_collection.find(
+        {"column_name_lower": column_name.lower()},
+        {"_id": 0, "dataset_id": 1, "column_name": 1, "inferred_type": 1, "position": 1},
+    ).limit(limit)
+    return [{**doc, "dataset_id": str(doc["dataset_id"])} for doc in cursor]
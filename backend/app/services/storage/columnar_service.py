@@ -0,0 +1,216 @@
+"""
+Columnar layout for datasets.
+
+The rows of every ingested dataset are written to ``dataset_column_chunks``
+as one document per (column, chunk). A chunk holds ``columnar_chunk_size``
+consecutive values of a single column, so analytical readers can fetch a
+handful of columns without loading any of the others. The ``data`` array of
+the ``datasets`` document only keeps a short preview of the first rows;
+datasets written before the columnar layout still have all their rows there.
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+from pymongo import ReplaceOne
+
+from app.config.settings import get_settings
+from app.db.database import datasets_collection, dataset_column_chunks_collection
+from app.services.ingest.readers import merge_column_types
+from app.services.storage.sketch_service import store_chunk_sketches, delete_sketches
+from app.services.storage.column_catalog_service import store_column_catalog, delete_column_catalog
+
+
+def store_columnar_chunk(
+    dataset_id: Any, chunk_index: int, row_offset: int, records: List[Dict[str, Any]], columns: List[str]
+) -> None:
+    """
+    Write one chunk of rows as per-column documents.
+
+    Writes are upserts keyed on (dataset_id, column, chunk), so re-writing a
+    chunk replaces it instead of duplicating it. Approximate-statistics
+    sketches for the chunk are written alongside.
+    """
+    if not records:
+        return
+
+    operations = []
+    for position, column in enumerate(columns):
+        operations.append(
+            ReplaceOne(
+                {"dataset_id": dataset_id, "column": column, "chunk": chunk_index},
+                {
+                    "dataset_id": dataset_id,
+                    "column": column,
+                    "position": position,
+                    "chunk": chunk_index,
+                    "row_offset": row_offset,
+                    "row_count": len(records),
+                    "values": [record.get(column) for record in records],
+                },
+                upsert=True,
+            )
+        )
+    dataset_column_chunks_collection.bulk_write(operations, ordered=False)
+    store_chunk_sketches(dataset_id, chunk_index, records, columns)
+
+
+def store_columnar(dataset_id: Any, records: List[Dict[str, Any]], columns: Optional[List[str]] = None) -> int:
+    """
+    Replace the columnar copy of a dataset with ``records``.
+
+    Returns:
+        Number of chunks written
+    """
+    if columns is None:
+        columns = list(records[0].keys()) if records else []
+
+    chunk_size = get_settings().columnar_chunk_size
+    delete_columnar(dataset_id)
+
+    chunk_count = 0
+    for chunk_index, row_offset in enumerate(range(0, len(records), chunk_size)):
+        store_columnar_chunk(dataset_id, chunk_index, row_offset,
+                             records[row_offset:row_offset + chunk_size], columns)
+        chunk_count += 1
+    store_column_catalog(dataset_id, records, columns)
+
+    # Lets row queries decode results with an explicit Arrow schema
+    column_types = merge_column_types({}, pd.DataFrame(records, columns=columns))
+    datasets_collection.update_one(
+        {"_id": dataset_id},
+        {"$set": {"columnar": True, "columnar_chunks": chunk_count, "column_types": column_types}})
+    return chunk_count
+
+
+def delete_columnar(dataset_id: Any) -> None:
+    dataset_column_chunks_collection.delete_many({"dataset_id": dataset_id})
+    delete_sketches(dataset_id)
+    delete_column_catalog(dataset_id)
+
+
+def load_columns(dataset_id: Any, columns: Iterable[str], max_rows: Optional[int] = None) -> Dict[str, List[Any]]:
+    """
+    Read whole columns of a dataset.
+
+    Uses the columnar layout when the dataset has one and falls back to a
+    server-side projection of the ``data`` array for older datasets. In both
+    cases only the requested columns leave the database.
+
+    Args:
+        dataset_id: ``_id`` of the document in the datasets collection
+        columns: Column names to read
+        max_rows: Optional cap on the number of values returned per column
+
+    Returns:
+        Dictionary mapping each requested column to its list of values
+    """
+    columns = list(columns)
+    data_doc = datasets_collection.find_one({"_id": dataset_id}, {"columnar": 1})
+    if not data_doc:
+        return {}
+
+    if data_doc.get("columnar"):
+        query: Dict[str, Any] = {"dataset_id": dataset_id, "column": {"$in": columns}}
+        if max_rows is not None:
+            query["row_offset"] = {"$lt": max_rows}
+
+        values: Dict[str, List[Any]] = {column: [] for column in columns}
+        cursor = dataset_column_chunks_collection.find(
+            query, {"_id": 0, "column": 1, "values": 1}).sort([("column", 1), ("chunk", 1)])
+        for chunk in cursor:
+            values[chunk["column"]].extend(chunk["values"])
+    else:
+        # A sub-field projection and $slice on the same array collide, so a
+        # capped read slices whole rows (which is small) instead.
+        if max_rows is not None:
+            projection: Dict[str, Any] = {"data": {"$slice": max_rows}}
+        else:
+            projection = {f"data.{column}": 1 for column in columns}
+        legacy_doc = datasets_collection.find_one({"_id": dataset_id}, projection) or {}
+        rows = legacy_doc.get("data", [])
+        values = {column: [row.get(column) for row in rows] for column in columns}
+
+    if max_rows is not None:
+        values = {column: column_values[:max_rows] for column, column_values in values.items()}
+    return values
+
+
+def preview_rows(dataset_id: Any, max_rows: int = 10) -> List[Dict[str, Any]]:
+    """
+    Read the first ``max_rows`` rows of a dataset.
+
+    Columnar datasets are read from their first chunk with the values sliced
+    server-side; older datasets slice their ``data`` array.
+    """
+    data_doc = datasets_collection.find_one({"_id": dataset_id}, {"columnar": 1})
+    if not data_doc:
+        return []
+
+    if not data_doc.get("columnar"):
+        legacy_doc = datasets_collection.find_one({"_id": dataset_id}, {"data": {"$slice": max_rows}}) or {}
+        return legacy_doc.get("data", [])[:max_rows]
+
+    cursor = dataset_column_chunks_collection.find(
+        {"dataset_id": dataset_id, "chunk": 0}, {"_id": 0, "column": 1, "values": {"$slice": max_rows}}
+    ).sort("position", 1)
+    columns: List[str] = []
+    values: List[List[Any]] = []
+    for chunk in cursor:
+        columns.append(chunk["column"])
+        values.append(chunk["values"])
+    return [dict(zip(columns, row)) for row in zip(*values)]
+
+
+def iter_dataset_rows(dataset_id: Any, batch_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Stream the rows of a dataset in batches without materializing it.
+
+    Columnar datasets are rebuilt one chunk at a time from a cursor over
+    ``dataset_column_chunks``; older datasets are unwound server-side by an
+    aggregation, so only ``batch_size`` rows are held in memory at once.
+    """
+    data_doc = datasets_collection.find_one({"_id": dataset_id}, {"columnar": 1, "columns": 1})
+    if not data_doc:
+        return
+
+    if not data_doc.get("columnar"):
+        cursor = datasets_collection.aggregate(
+            [
+                {"$match": {"_id": dataset_id}},
+                {"$unwind": "$data"},
+                {"$replaceRoot": {"newRoot": "$data"}},
+            ],
+            batchSize=batch_size,
+            allowDiskUse=True,
+        )
+        batch: List[Dict[str, Any]] = []
+        for row in cursor:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+        return
+
+    columns = data_doc.get("columns", [])
+    cursor = dataset_column_chunks_collection.find(
+        {"dataset_id": dataset_id}, {"_id": 0, "chunk": 1, "column": 1, "values": 1}
+    ).sort([("chunk", 1), ("position", 1)]).batch_size(max(len(columns), 1))
+
+    def rows_of(chunk_values: Dict[str, List[Any]]) -> Iterator[List[Dict[str, Any]]]:
+        names = [column for column in columns if column in chunk_values]
+        rows = [dict(zip(names, values)) for values in zip(*(chunk_values[name] for name in names))]
+        for start in range(0, len(rows), batch_size):
+            yield rows[start:start + batch_size]
+
+    current_chunk = None
+    chunk_values: Dict[str, List[Any]] = {}
+    for chunk in cursor:
+        if chunk["chunk"] != current_chunk and chunk_values:
+            yield from rows_of(chunk_values)
+            chunk_values = {}
+        current_chunk = chunk["chunk"]
+        chunk_values[chunk["column"]] = chunk["values"]
+    if chunk_values:
+        yield from rows_of(chunk_values)
@@ -0,0 +1,279 @@
+"""
+Local filesystem storage backend.
+
+Objects are plain files under ``LOCAL_STORAGE_DIRECTORY/<bucket>/``, so
+development, on-prem installs and benchmarks need no object store. Reads are
+memory-mapped. Presigned URLs point at the ``/storage`` routes of this API
+and carry an HMAC signature, so clients use exactly the same upload and
+download flow as with MinIO or S3. The signing key is LOCAL_STORAGE_SECRET,
+shared by every worker process; without it no presigned URLs are issued.
+"""
+import hashlib
+import hmac
+import mmap
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Union
+from urllib.parse import quote, urlencode
+
+from app.config.settings import get_settings
+from .base_storage import BaseStorage
+
+MULTIPART_DIRECTORY = ".multipart"
+
+
+class MappedObject:
+    """
+    Read-only, file-like view of a memory-mapped object.
+
+    ``getbuffer()`` exposes the mapping without copying; ``read()`` behaves
+    like the streaming bodies returned by the MinIO and S3 backends.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # Zero-length files cannot be mapped
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self._position = 0
+        self.size = size
+
+    def getbuffer(self) -> memoryview:
+        return memoryview(self._map) if self._map is not None else memoryview(b"")
+
+    def read(self, size: int = -1) -> bytes:
+        if self._map is None:
+            return b""
+        end = self.size if size is None or size < 0 else min(self.size, self._position + size)
+        data = self._map[self._position:end]
+        self._position = end
+        return data
+
+    def readable(self) -> bool:
+        return True
+
+    def seek(self, offset: int) -> int:
+        self._position = max(0, min(offset, self.size))
+        return self._position
+
+    def __len__(self) -> int:
+        return self.size
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def release_conn(self) -> None:
+        """No connection to release; present for parity with MinIO responses."""
+
+    def __enter__(self) -> "MappedObject":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class AtomicWriter:
+    """Write a file through a temporary path, computing its MD5 ETag on the way."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._temporary_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        self._file = open(self._temporary_path, "wb")
+        self._digest = hashlib.md5()
+
+    def write(self, data: bytes) -> None:
+        self._digest.update(data)
+        self._file.write(data)
+
+    def commit(self) -> str:
+        self._file.close()
+        os.replace(self._temporary_path, self.path)
+        return self._digest.hexdigest()
+
+    def abort(self) -> None:
+        self._file.close()
+        if os.path.exists(self._temporary_path):
+            os.remove(self._temporary_path)
+
+
+class LocalStorageService(BaseStorage):
+    def __init__(self):
+        settings = get_settings()
+        self.root = os.path.abspath(settings.local_storage_directory)
+        self.bucket = settings.local_storage_bucket
+        self.base_url = settings.local_storage_base_url.rstrip("/")
+        self.presigned_url_expiry = settings.local_presigned_url_expiry
+        # A per-process secret would make URLs fail on every other worker
+        secret = settings.local_storage_secret
+        self._secret = secret.get_secret_value().encode() if secret else None
+
+    def ensure_bucket(self) -> None:
+        os.makedirs(os.path.join(self.root, self.bucket, MULTIPART_DIRECTORY), exist_ok=True)
+
+    # ----- Paths -----
+
+    def _resolve(self, object_name: str, bucket_name: Optional[str] = None) -> str:
+        bucket_root = os.path.join(self.root, bucket_name or self.bucket)
+        path = os.path.abspath(os.path.join(bucket_root, object_name))
+        if not path.startswith(bucket_root + os.sep) or MULTIPART_DIRECTORY in object_name.split("/"):
+            raise ValueError(f"Invalid object name: {object_name}")
+        return path
+
+    def _part_directory(self, upload_id: str) -> str:
+        if not upload_id.isalnum():
+            raise ValueError("Invalid upload ID")
+        return os.path.join(self.root, self.bucket, MULTIPART_DIRECTORY, upload_id)
+
+    def local_path(self, object_name: str) -> Optional[str]:
+        return self._resolve(object_name)
+
+    def object_exists(self, object_name: str) -> bool:
+        return os.path.isfile(self._resolve(object_name))
+
+    @staticmethod
+    def _write_atomic(path: str, chunks) -> str:
+        writer = AtomicWriter(path)
+        try:
+            for chunk in chunks:
+                writer.write(chunk)
+        except BaseException:
+            writer.abort()
+            raise
+        return writer.commit()
+
+    # ----- Objects -----
+
+    def upload_file(self, file_bytes: bytes, file_name: str) -> str:
+        self._write_atomic(self._resolve(file_name), [file_bytes])
+        return f"{self.bucket}/{file_name}"
+
+    def object_writer(self, object_name: str) -> "AtomicWriter":
+        """Writer for streaming an object to disk; nothing is visible until commit()."""
+        return AtomicWriter(self._resolve(object_name))
+
+    def get_object(self, object_name: str, bucket_name: str = None) -> MappedObject:
+        """Memory-map an object. The caller closes the returned object."""
+        try:
+            return MappedObject(self._resolve(object_name, bucket_name))
+        except Exception as e:
+            raise ValueError(f"Error getting object from local storage: {str(e)}")
+
+    def delete_object(self, object_name: str) -> None:
+        path = self._resolve(object_name)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def get_object_size(self, object_name: str) -> int:
+        return os.path.getsize(self._resolve(object_name))
+
+    def get_object_range(self, object_name: str, start: int, end: int) -> bytes:
+        with open(self._resolve(object_name), "rb") as f:
+            f.seek(start)
+            return f.read(end - start + 1)
+
+    def open_reader(self, object_name: str, size: Optional[int] = None,
+                    part_size: Optional[int] = None, max_workers: Optional[int] = None,
+                    start: int = 0) -> MappedObject:
+        """Local files are read through the memory map; there is nothing to parallelize."""
+        mapped = self.get_object(object_name)
+        mapped.seek(start)
+        return mapped
+
+    def build_object_name(self, filename: str, user_id: str | None = None) -> str:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        name, extension = os.path.splitext(filename)
+        new_filename = f"{name}_{timestamp}{extension}"
+        if user_id:
+            return f"{user_id}/{new_filename}"
+        return new_filename
+
+    # ----- Presigned URLs -----
+
+    def _signature(self, method: str, object_name: str, expires: int,
+                   upload_id: str = "", part_number: Union[int, str] = "") -> str:
+        if self._secret is None:
+            raise RuntimeError("LOCAL_STORAGE_SECRET must be set to issue presigned URLs")
+        message = f"{method}\n{object_name}\n{expires}\n{upload_id}\n{part_number}".encode()
+        return hmac.new(self._secret, message, hashlib.sha256).hexdigest()
+
+    def _presign(self, method: str, object_name: str, **params) -> str:
+        expires = int(time.time()) + self.presigned_url_expiry
+        query = {**params, "expires": expires,
+                 "signature": self._signature(method, object_name, expires, **params)}
+        return f"{self.base_url}/storage/{quote(object_name)}?{urlencode(query)}"
+
+    def verify_signature(self, method: str, object_name: str, expires: int, signature: str,
+                         upload_id: str = "", part_number: Union[int, str] = "") -> bool:
+        if self._secret is None or expires < time.time():
+            return False
+        expected = self._signature(method, object_name, expires, upload_id, part_number)
+        return hmac.compare_digest(expected, signature)
+
+    def generate_presigned_url(self, filename: str, user_id: str | None = None):
+        """Returns (url, object_name) like the MinIO and S3 services."""
+        object_name = self.build_object_name(filename, user_id)
+        return self._presign("PUT", object_name), object_name
+
+    def generate_download_url(self, filename: str):
+        return self._presign("GET", filename)
+
+    # ----- Multipart uploads -----
+
+    def create_multipart_upload(self, object_name: str) -> str:
+        self._resolve(object_name)
+        upload_id = uuid.uuid4().hex
+        os.makedirs(self._part_directory(upload_id))
+        return upload_id
+
+    def upload_part(self, object_name: str, upload_id: str, part_number: int, data: bytes) -> str:
+        writer = self.part_writer(upload_id, part_number)
+        writer.write(data)
+        return writer.commit()
+
+    def part_writer(self, upload_id: str, part_number: int) -> "AtomicWriter":
+        part_directory = self._part_directory(upload_id)
+        if not os.path.isdir(part_directory):
+            raise ValueError(f"Unknown upload ID: {upload_id}")
+        return AtomicWriter(os.path.join(part_directory, f"{int(part_number):05d}"))
+
+    def generate_part_upload_url(self, object_name: str, upload_id: str, part_number: int) -> str:
+        return self._presign("PUT", object_name, upload_id=upload_id, part_number=part_number)
+
+    def list_uploaded_parts(self, object_name: str, upload_id: str) -> List[Dict[str, Union[int, str]]]:
+        part_directory = self._part_directory(upload_id)
+        parts = []
+        for name in sorted(os.listdir(part_directory)):
+            if not name.isdigit():
+                continue
+            path = os.path.join(part_directory, name)
+            with open(path, "rb") as f:
+                etag = hashlib.md5(f.read()).hexdigest()
+            parts.append({"part_number": int(name), "etag": etag, "size": os.path.getsize(path)})
+        return parts
+
+    def complete_multipart_upload(self, object_name: str, upload_id: str, parts: List[Dict[str, Union[int, str]]]) -> str:
+        part_directory = self._part_directory(upload_id)
+        uploaded = {part["part_number"]: part["etag"] for part in self.list_uploaded_parts(object_name, upload_id)}
+        ordered = sorted(parts, key=lambda part: int(part["part_number"]))
+        for part in ordered:
+            if uploaded.get(int(part["part_number"])) != str(part["etag"]).strip('"'):
+                raise ValueError(f"Part {part['part_number']} is missing or its ETag does not match")
+
+        def chunks():
+            for part in ordered:
+                with open(os.path.join(part_directory, f"{int(part['part_number']):05d}"), "rb") as f:
+                    yield from iter(lambda: f.read(1024 * 1024), b"")
+
+        self._write_atomic(self._resolve(object_name), chunks())
+        shutil.rmtree(part_directory, ignore_errors=True)
+        return f"{self.bucket}/{object_name}"
+
+    def abort_multipart_upload(self, object_name: str, upload_id: str) -> None:
+        shutil.rmtree(self._part_directory(upload_id), ignore_errors=True)
@@ -1,8 +1,11 @@
 import os
+import urllib3
 from minio import Minio
 from io import BytesIO
 from datetime import datetime, timedelta
-from app.config.settings import MinIOSettings
+from typing import Dict, List, Union
+from minio.datatypes import Part
+from app.config.settings import MinIOSettings, get_settings
 from .base_storage import BaseStorage
 
 settings = MinIOSettings()
@@ -10,16 +13,28 @@ settings = MinIOSettings()
 
 class MinioStorageService(BaseStorage):
     def __init__(self):
+        app_settings = get_settings()
+        # Shared, thread-safe connection pool; constructing the client makes no requests
+        http_client = urllib3.PoolManager(
+            maxsize=app_settings.storage_max_pool_connections,
+            timeout=urllib3.Timeout(connect=app_settings.storage_connect_timeout,
+                                    read=app_settings.storage_read_timeout),
+            retries=urllib3.Retry(total=3, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]),
+        )
         self.client = Minio(
             settings.MINIO_ENDPOINT,
             access_key=settings.MINIO_ACCESS_KEY.get_secret_value(),
             secret_key=settings.MINIO_SECRET_KEY.get_secret_value(),
             secure=False,
+            region=settings.MINIO_REGION,
+            http_client=http_client,
         )
         self.bucket = settings.MINIO_BUCKET_NAME
+        self.minio_presigned_url_expiry = settings.MINIO_PRESIGNED_URL_EXPIRY
+
+    def ensure_bucket(self) -> None:
         if not self.client.bucket_exists(self.bucket):
             self.client.make_bucket(self.bucket)
-        self.minio_presigned_url_expiry = settings.MINIO_PRESIGNED_URL_EXPIRY
 
         # Set the bucket policy with dynamic bucket name
         policy = f"""
@@ -39,22 +54,30 @@ class MinioStorageService(BaseStorage):
         self.client.set_bucket_policy(self.bucket, policy)
 
     def upload_file(self, file_bytes: bytes, file_name: str) -> str:
-        self.client.put_object(self.bucket, file_name, BytesIO(file_bytes), length=len(file_bytes))
+        app_settings = get_settings()
+        if len(file_bytes) > app_settings.multipart_threshold:
+            self.upload_multipart(file_bytes, file_name, app_settings.multipart_part_size,
+                                  app_settings.multipart_max_workers)
+        else:
+            self.client.put_object(self.bucket, file_name, BytesIO(file_bytes), length=len(file_bytes))
         return f"{self.bucket}/{file_name}"
 
+    def build_object_name(self, filename: str, user_id: str | None = None) -> str:
+        """Timestamped object name for an upload, under the user's prefix if given."""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        name, extension = os.path.splitext(filename)
+        new_filename = f"{name}_{timestamp}{extension}"
+        if user_id:
+            return f"{user_id}/{new_filename}"
+        return new_filename
+
     def generate_presigned_url(self, filename: str, user_id: str | None = None):
         """
         Generate a presigned URL for uploading to MinIO.
 
         Returns (url, object_name) to keep compatibility with S3StorageService.
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        name, extension = os.path.splitext(filename)
-        new_filename = f"{name}_{timestamp}{extension}"
-        if user_id:
-            object_name = f"{user_id}/{new_filename}"
-        else:
-            object_name = new_filename
+        object_name = self.build_object_name(filename, user_id)
 
         url = self.client.presigned_put_object(
             self.bucket, object_name, expires=timedelta(seconds=self.minio_presigned_url_expiry)
@@ -77,6 +100,58 @@ class MinioStorageService(BaseStorage):
         except Exception as e:
             raise ValueError(f"Error getting object from MinIO: {str(e)}")
 
+    def delete_object(self, object_name: str) -> None:
+        self.client.remove_object(self.bucket, object_name)
+
+    def get_object_size(self, object_name: str) -> int:
+        return self.client.stat_object(self.bucket, object_name).size
+
+    def get_object_range(self, object_name: str, start: int, end: int) -> bytes:
+        response = self.client.get_object(self.bucket, object_name, offset=start, length=end - start + 1)
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    # The MinIO SDK only exposes multipart uploads through put_object, so the
+    # individual S3 multipart calls use its underlying request methods. Their
+    # signatures are not part of the public API, hence the minio<8 pin.
+
+    def create_multipart_upload(self, object_name: str) -> str:
+        return self.client._create_multipart_upload(
+            self.bucket, object_name, {"Content-Type": "application/octet-stream"})
+
+    def upload_part(self, object_name: str, upload_id: str, part_number: int, data: bytes) -> str:
+        return self.client._upload_part(self.bucket, object_name, data, None, upload_id, part_number)
+
+    def generate_part_upload_url(self, object_name: str, upload_id: str, part_number: int) -> str:
+        return self.client.get_presigned_url(
+            "PUT",
+            self.bucket,
+            object_name,
+            expires=timedelta(seconds=self.minio_presigned_url_expiry),
+            extra_query_params={"uploadId": upload_id, "partNumber": str(part_number)},
+        )
+
+    def list_uploaded_parts(self, object_name: str, upload_id: str) -> List[Dict[str, Union[int, str]]]:
+        parts = []
+        marker = None
+        while True:
+            result = self.client._list_parts(self.bucket, object_name, upload_id, part_number_marker=marker)
+            parts += [{"part_number": part.part_number, "etag": part.etag, "size": part.size}
+                      for part in result.parts]
+            if not result.is_truncated:
+                return parts
+            marker = result.next_part_number_marker
+
+    def complete_multipart_upload(self, object_name: str, upload_id: str, parts: List[Dict[str, Union[int, str]]]) -> str:
+        ordered = sorted(parts, key=lambda part: int(part["part_number"]))
+        self.client._complete_multipart_upload(
+            self.bucket, object_name, upload_id,
+            [Part(int(part["part_number"]), str(part["etag"])) for part in ordered],
+        )
+        return f"{self.bucket}/{object_name}"
 
-def get_minio_service():
-    return MinioStorageService()
+    def abort_multipart_upload(self, object_name: str, upload_id: str) -> None:
+        self.client._abort_multipart_upload(self.bucket, object_name, upload_id)
@@ -7,6 +7,9 @@ from bson import ObjectId
 from app.schemas.models import CreateDatasetInformationRequest
 from app.db.database import datasets_collection, dataset_information_collection, users_collection, pipelines_collection, pipelines_history_collection
 from app.schemas.models import PipelineStatus
+from app.config.settings import get_settings
+from app.services.storage.columnar_service import preview_rows, store_columnar
+from app.utils.response_cache import bump_catalog_version
 
 
 def get_user_info(user_id: str) -> Dict[str, str]:
@@ -46,6 +49,8 @@ def store_to_mongodb(
     pipeline_id: Optional[str] = None,
 ) -> Dict[str, Any]:
     current_time = datetime.now(timezone.utc).isoformat()
+    # All rows go to the column chunks; the dataset document keeps a preview
+    preview = dataset_records[:get_settings().dataset_preview_rows]
 
     # First check if dataset_id already exists in datasets_collection
     existing_data_doc = datasets_collection.find_one({"_id": dataset_id})
@@ -56,9 +61,10 @@ def store_to_mongodb(
 
         datasets_collection.update_one(
             {"_id": dataset_id},
-            {"$set": {"data": dataset_records, "columns": columns,
+            {"$set": {"data": preview, "columns": columns,
                       "record_count": len(dataset_records), "updated_at": current_time}},
         )
+        store_columnar(dataset_id, dataset_records, columns)
 
         # Check if dataset information exists for this dataset_id
         existing_info = dataset_information_collection.find_one(
@@ -68,7 +74,7 @@ def store_to_mongodb(
             # Update dataset information
             dataset_information_collection.update_one(
                 {"_id": existing_info["_id"]}, {
-                    "$set": {"updated_at": current_time, "pulled_from_pipeline": True}}
+                    "$set": {"updated_at": current_time, "pulled_from_pipeline": True, "columns": columns}}
             )
 
             # Add user_id to array (using addToSet operation)
@@ -97,6 +103,7 @@ def store_to_mongodb(
                 "created_at": current_time,
                 "updated_at": current_time,
                 "user_id": [ObjectId(user_id)],
+                "columns": columns,
             }
             dataset_information_collection.insert_one(dataset_info_doc)
 
@@ -122,14 +129,15 @@ def store_to_mongodb(
 
             datasets_collection.update_one(
                 {"_id": existing_info["dataset_id"]},
-                {"$set": {"data": dataset_records, "columns": columns,
+                {"$set": {"data": preview, "columns": columns,
                           "record_count": len(dataset_records), "updated_at": current_time}},
             )
+            store_columnar(existing_info["dataset_id"], dataset_records, columns)
 
             # Update information document
             dataset_information_collection.update_one(
                 {"_id": existing_info["_id"]}, {
-                    "$set": {"updated_at": current_time, "pulled_from_pipeline": True}}
+                    "$set": {"updated_at": current_time, "pulled_from_pipeline": True, "columns": columns}}
             )
 
             # Add user_id only (no username or user_email)
@@ -155,7 +163,7 @@ def store_to_mongodb(
 
             dataset_doc = {
                 "_id": ObjectId(dataset_id),  # Convert string to ObjectId
-                "data": dataset_records,
+                "data": preview,
                 "columns": columns,
                 "record_count": len(dataset_records),
                 "created_at": current_time,
@@ -163,6 +171,7 @@ def store_to_mongodb(
             }
 
             datasets_collection.insert_one(dataset_doc)
+            store_columnar(dataset_doc["_id"], dataset_records, columns)
 
             # Create new dataset information document
             info_doc_id = ObjectId()
@@ -187,6 +196,7 @@ def store_to_mongodb(
                 "created_at": current_time,
                 "updated_at": current_time,
                 "user_id": [ObjectId(user_id)],
+                "columns": columns,
             }
 
             dataset_information_collection.insert_one(dataset_info_doc)
@@ -202,6 +212,48 @@ def store_to_mongodb(
             }
 
 
+def as_dataset_id(dataset_id: Any) -> Any:
+    """Return ``dataset_id`` as an ObjectId when it is a valid ObjectId string."""
+    if isinstance(dataset_id, str) and ObjectId.is_valid(dataset_id):
+        return ObjectId(dataset_id)
+    return dataset_id
+
+
+def get_accessible_dataset_info(
+    dataset_id: str, user_id: str, projection: Optional[Dict[str, Any]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Fetch the information document of a dataset the user may read.
+
+    A dataset is readable when it is public or when the user is one of its
+    owners in ``user_id``. Deduplicated uploads point several information
+    documents at one dataset, so the check matches against all of them and
+    returns one that grants access.
+
+    Args:
+        dataset_id: Dataset ID (the ``dataset_id`` of the information document)
+        user_id: ID of the requesting user
+        projection: Optional extra fields to return
+
+    Returns:
+        The information document, or None if it does not exist or is not readable
+    """
+    if not ObjectId.is_valid(dataset_id):
+        return None
+
+    fields = {"user_id": 1, "permission": 1, "permissions": 1, "dataset_id": 1}
+    fields.update(projection or {})
+    # ``permissions`` takes precedence; ``permission`` counts only when it is unset
+    readable: List[Dict[str, Any]] = [
+        {"permissions": "public"},
+        {"permissions": {"$in": [None, ""]}, "permission": "public"},
+    ]
+    if ObjectId.is_valid(user_id):
+        readable.append({"user_id": ObjectId(user_id)})
+    return dataset_information_collection.find_one(
+        {"dataset_id": ObjectId(dataset_id), "$or": readable}, fields)
+
+
 def sanitize_document(doc: Dict[str, Any]) -> Dict[str, Any]:
     def sanitize_value(value: Any) -> Any:
         if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
@@ -229,17 +281,15 @@ def get_data_from_collection(
             if user_id and user_id not in info_doc.get("user_id", []):
                 return {}
 
-            data_doc = datasets_collection.find_one(
-                {"_id": info_doc["dataset_id"]})
+            # Only the first 10 rows are needed for the preview
+            rows = preview_rows(info_doc["dataset_id"], 10)
             data_rows: List[Dict[str, Any]] = []
 
-            if data_doc and "data" in data_doc:
-                rows = data_doc["data"][:10]
-                if rows:
-                    selected_columns = list(rows[0].keys())[:10]
-                    for row in rows:
-                        data_rows.append({col: row.get(col)
-                                         for col in selected_columns})
+            if rows:
+                selected_columns = list(rows[0].keys())[:10]
+                for row in rows:
+                    data_rows.append({col: row.get(col)
+                                     for col in selected_columns})
 
             # Get user information from user_ids
             user_ids = info_doc.get("user_id", [])
@@ -286,17 +336,14 @@ def get_data_from_collection(
 
             results = []
             for doc in info_documents:
-                data_doc = datasets_collection.find_one(
-                    {"_id": doc["dataset_id"]})
+                rows = preview_rows(doc["dataset_id"], 10)
                 data_rows: List[Dict[str, Any]] = []
 
-                if data_doc and "data" in data_doc:
-                    rows = data_doc["data"][:10]
-                    if rows:
-                        selected_columns = list(rows[0].keys())[:10]
-                        for row in rows:
-                            data_rows.append({col: row.get(col)
-                                             for col in selected_columns})
+                if rows:
+                    selected_columns = list(rows[0].keys())[:10]
+                    for row in rows:
+                        data_rows.append({col: row.get(col)
+                                         for col in selected_columns})
 
                 # Get user information from user_ids
                 user_ids = doc.get("user_id", [])
@@ -440,6 +487,7 @@ def create_manual_dataset(request: CreateDatasetInformationRequest) -> Dict[str,
 
         # Insert the information document
         dataset_information_collection.insert_one(dataset_info_doc)
+        bump_catalog_version()
 
         return {
             "success": True,
@@ -499,3 +547,103 @@ def get_pipelines() -> List[Dict[str, Any]]:
 
     except Exception as e:
         raise RuntimeError(f"Error fetching pipelines: {e}")
+
+
+def _facet_counts(field: str, unwind: bool = False, limit: int = 20) -> List[Dict[str, Any]]:
+    stages: List[Dict[str, Any]] = [{"$unwind": f"${field}"}] if unwind else []
+    return stages + [
+        {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1, "_id": 1}},
+        {"$limit": limit},
+        {"$project": {"_id": 0, "value": "$_id", "count": 1}},
+    ]
+
+
+def search_dataset_catalog(
+    query: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    dataset_type: Optional[str] = None,
+    is_temporal: Optional[bool] = None,
+    is_spatial: Optional[bool] = None,
+    owner: Optional[str] = None,
+    limit: int = 20,
+    skip: int = 0,
+) -> Dict[str, Any]:
+    """
+    Search the dataset catalog with facet counts in a single aggregation.
+
+    Free text is matched through the ``catalog_text`` index over name,
+    description, tags, type and column names; the other arguments narrow the
+    result set. Facet counts are computed over the matching datasets.
+
+    Returns:
+        Dictionary with total, results (dataset card fields) and facets
+    """
+    match: Dict[str, Any] = {}
+    if query:
+        match["$text"] = {"$search": query}
+    if tags:
+        match["tags"] = {"$all": tags}
+    if dataset_type:
+        match["dataset_type"] = dataset_type
+    if is_temporal is not None:
+        match["is_temporal"] = is_temporal
+    if is_spatial is not None:
+        match["is_spatial"] = is_spatial
+    if owner:
+        match["user_id"] = ObjectId(owner)
+
+    results_pipeline: List[Dict[str, Any]] = [
+        {"$sort": {"score": -1, "updated_at": -1} if query else {"updated_at": -1}},
+        {"$skip": skip},
+        {"$limit": limit},
+        {"$lookup": {
+            "from": users_collection.name,
+            "localField": "user_id",
+            "foreignField": "_id",
+            "as": "owners",
+            "pipeline": [{"$project": {"email": 1, "first_name": 1, "last_name": 1}}],
+        }},
+    ]
+
+    pipeline: List[Dict[str, Any]] = [{"$match": match}]
+    if query:
+        pipeline.append({"$addFields": {"score": {"$meta": "textScore"}}})
+    pipeline.append({"$facet": {
+        "results": results_pipeline,
+        "total": [{"$count": "count"}],
+        "tags": _facet_counts("tags", unwind=True),
+        "dataset_type": _facet_counts("dataset_type"),
+        "is_temporal": _facet_counts("is_temporal"),
+        "is_spatial": _facet_counts("is_spatial"),
+        "owners": _facet_counts("user_id", unwind=True),
+    }})
+
+    try:
+        faceted = next(dataset_information_collection.aggregate(pipeline), {})
+    except Exception as e:
+        raise RuntimeError(f"Error searching dataset catalog: {e}")
+
+    results = []
+    for doc in faceted.get("results", []):
+        owners = doc.get("owners", [])
+        results.append({
+            "dataset_id": str(doc.get("dataset_id", "")),
+            "dataset_name": doc.get("dataset_name", ""),
+            "description": doc.get("description", ""),
+            "pulled_from_pipeline": doc.get("pulled_from_pipeline", False),
+            "updated_at": doc.get("updated_at"),
+            "user_emails": [owner.get("email", "") for owner in owners],
+            "user_names": [f"{owner.get('first_name', '')} {owner.get('last_name', '')}".strip() for owner in owners],
+        })
+
+    facets = {name: faceted.get(name, []) for name in ("tags", "dataset_type", "is_temporal", "is_spatial", "owners")}
+    for bucket in facets["owners"]:
+        bucket["value"] = str(bucket["value"])
+
+    total = faceted.get("total", [])
+    return {
+        "total": total[0]["count"] if total else 0,
+        "results": results,
+        "facets": facets,
+    }
@@ -0,0 +1,68 @@
+"""
+Column profiles of datasets.
+
+The profile of a dataset is computed once at ingest (see
+``app.utils.column_profile``) and stored in the ``dataset_profiles``
+collection under the dataset's ID, so serving it is a single primary-key
+lookup regardless of the size of the dataset.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional
+
+import pandas as pd
+
+from app.config.logging import get_logger
+from app.db.database import dataset_profiles_collection
+from app.services.storage.mongodb_service import as_dataset_id
+from app.utils.column_profile import profile_dataframe, profile_series
+
+logger = get_logger("services.profile")
+
+
+def write_dataset_profile(dataset_id: Any, df: pd.DataFrame) -> Optional[Dict[str, Any]]:
+    """
+    Profile ``df`` and store the result for ``dataset_id``.
+
+    Profiling failures are logged and never fail the ingest that triggered them.
+    """
+    dataset_id = as_dataset_id(dataset_id)
+    try:
+        profile = {
+            "_id": dataset_id,
+            "record_count": len(df),
+            "columns": profile_dataframe(df),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        dataset_profiles_collection.replace_one({"_id": dataset_id}, profile, upsert=True)
+        return profile
+    except Exception as e:
+        logger.error(f"Failed to profile dataset {dataset_id}: {e}", exc_info=True)
+        return None
+
+
+def write_dataset_profile_by_column(
+    dataset_id: Any, record_count: int, columns: Iterable[pd.Series]
+) -> Optional[Dict[str, Any]]:
+    """
+    Profile a dataset one column at a time and store the result for ``dataset_id``.
+
+    ``columns`` yields the full columns in order; only the column being
+    profiled needs to be in memory. Failures are logged like in ``write_dataset_profile``.
+    """
+    dataset_id = as_dataset_id(dataset_id)
+    try:
+        profile = {
+            "_id": dataset_id,
+            "record_count": record_count,
+            "columns": [profile_series(series) for series in columns],
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        dataset_profiles_collection.replace_one({"_id": dataset_id}, profile, upsert=True)
+        return profile
+    except Exception as e:
+        logger.error(f"Failed to profile dataset {dataset_id}: {e}", exc_info=True)
+        return None
+
+
+def get_dataset_profile(dataset_id: Any) -> Optional[Dict[str, Any]]:
+    return dataset_profiles_collection.find_one({"_id": as_dataset_id(dataset_id)})
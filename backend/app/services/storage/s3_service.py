@@ -1,10 +1,12 @@
 from io import BytesIO
 from datetime import datetime
+from typing import Dict, List, Union
 
 import boto3
 from botocore.client import Config
 
 from app.config.aws_settings import get_aws_settings
+from app.config.settings import get_settings
 from .base_storage import BaseStorage
 
 aws_settings = get_aws_settings()
@@ -12,26 +14,34 @@ aws_settings = get_aws_settings()
 
 class S3StorageService(BaseStorage):
     def __init__(self):
+        app_settings = get_settings()
         self.client = boto3.client(
             "s3",
             region_name=aws_settings.aws_region,
             aws_access_key_id=aws_settings.aws_access_key_id.get_secret_value(),
             aws_secret_access_key=aws_settings.aws_secret_access_key.get_secret_value(),
-            config=Config(signature_version="s3v4"),
+            config=Config(
+                signature_version="s3v4",
+                max_pool_connections=app_settings.storage_max_pool_connections,
+                connect_timeout=app_settings.storage_connect_timeout,
+                read_timeout=app_settings.storage_read_timeout,
+                retries={"max_attempts": 3, "mode": "standard"},
+            ),
         )
         self.bucket = aws_settings.s3_bucket_name
         self.s3_presigned_url_expiry = aws_settings.s3_presigned_url_expiry
 
     def upload_file(self, file_bytes: bytes, file_name: str) -> str:
-        self.client.put_object(Bucket=self.bucket, Key=file_name, Body=BytesIO(file_bytes))
+        app_settings = get_settings()
+        if len(file_bytes) > app_settings.multipart_threshold:
+            self.upload_multipart(file_bytes, file_name, app_settings.multipart_part_size,
+                                  app_settings.multipart_max_workers)
+        else:
+            self.client.put_object(Bucket=self.bucket, Key=file_name, Body=BytesIO(file_bytes))
         return f"{self.bucket}/{file_name}"
 
-    def generate_presigned_url(self, filename: str, user_id: str | None = None):
-        """
-        Generate a presigned URL for uploading to S3.
-
-        Returns (url, object_name) to match the MinIO service interface.
-        """
+    def build_object_name(self, filename: str, user_id: str | None = None) -> str:
+        """Timestamped object name for an upload, under the user's prefix if given."""
         timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
         if "." in filename:
             name, extension = filename.rsplit(".", 1)
@@ -40,9 +50,16 @@ class S3StorageService(BaseStorage):
             new_filename = f"{filename}_{timestamp}"
 
         if user_id:
-            object_name = f"{user_id}/{new_filename}"
-        else:
-            object_name = new_filename
+            return f"{user_id}/{new_filename}"
+        return new_filename
+
+    def generate_presigned_url(self, filename: str, user_id: str | None = None):
+        """
+        Generate a presigned URL for uploading to S3.
+
+        Returns (url, object_name) to match the MinIO service interface.
+        """
+        object_name = self.build_object_name(filename, user_id)
 
         url = self.client.generate_presigned_url(
             ClientMethod="put_object",
@@ -67,8 +84,50 @@ class S3StorageService(BaseStorage):
         response = self.client.get_object(Bucket=bucket_name, Key=object_name)
         return response["Body"]
 
+    def delete_object(self, object_name: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=object_name)
+
+    def get_object_size(self, object_name: str) -> int:
+        return self.client.head_object(Bucket=self.bucket, Key=object_name)["ContentLength"]
+
+    def get_object_range(self, object_name: str, start: int, end: int) -> bytes:
+        response = self.client.get_object(Bucket=self.bucket, Key=object_name, Range=f"bytes={start}-{end}")
+        return response["Body"].read()
 
-def get_s3_service():
-    return S3StorageService()
+    def create_multipart_upload(self, object_name: str) -> str:
+        response = self.client.create_multipart_upload(Bucket=self.bucket, Key=object_name)
+        return response["UploadId"]
 
+    def upload_part(self, object_name: str, upload_id: str, part_number: int, data: bytes) -> str:
+        response = self.client.upload_part(
+            Bucket=self.bucket, Key=object_name, UploadId=upload_id, PartNumber=part_number, Body=data)
+        return response["ETag"]
+
+    def generate_part_upload_url(self, object_name: str, upload_id: str, part_number: int) -> str:
+        return self.client.generate_presigned_url(
+            ClientMethod="upload_part",
+            Params={"Bucket": self.bucket, "Key": object_name, "UploadId": upload_id, "PartNumber": part_number},
+            ExpiresIn=self.s3_presigned_url_expiry,
+        )
+
+    def list_uploaded_parts(self, object_name: str, upload_id: str) -> List[Dict[str, Union[int, str]]]:
+        paginator = self.client.get_paginator("list_parts")
+        parts = []
+        for page in paginator.paginate(Bucket=self.bucket, Key=object_name, UploadId=upload_id):
+            parts += [{"part_number": part["PartNumber"], "etag": part["ETag"], "size": part["Size"]}
+                      for part in page.get("Parts", [])]
+        return parts
+
+    def complete_multipart_upload(self, object_name: str, upload_id: str, parts: List[Dict[str, Union[int, str]]]) -> str:
+        ordered = sorted(parts, key=lambda part: int(part["part_number"]))
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=object_name,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": [{"PartNumber": int(part["part_number"]), "ETag": str(part["etag"])}
+                                       for part in ordered]},
+        )
+        return f"{self.bucket}/{object_name}"
 
+    def abort_multipart_upload(self, object_name: str, upload_id: str) -> None:
+        self.client.abort_multipart_upload(Bucket=self.bucket, Key=object_name, UploadId=upload_id)
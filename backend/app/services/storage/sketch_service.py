@@ -0,0 +1,148 @@
+"""
+Per-chunk column sketches for approximate statistics.
+
+Every column chunk written by ``columnar_service`` also gets a HyperLogLog
+(distinct count) and, for numeric columns, a KLL (quantile) sketch in the
+``dataset_sketches`` collection. A running merge of all chunks is kept per
+column under ``MERGED_CHUNK``, so reads are a single document lookup and
+appending a chunk only merges that chunk into the running sketch.
+"""
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+from bson import Binary
+from pymongo import ReplaceOne
+
+from app.db.database import dataset_sketches_collection
+from app.utils.sketches import HyperLogLog, KLLSketch, hash_values
+
+MERGED_CHUNK = -1
+
+
+def _build_sketches(values: List[Any]) -> Dict[str, Any]:
+    series = pd.Series(values)
+    hll = HyperLogLog()
+    hll.update_hashes(hash_values(series))
+
+    kll = None
+    numeric = pd.to_numeric(series.dropna(), errors="coerce")
+    if len(numeric) and numeric.notna().all():
+        kll = KLLSketch()
+        kll.update_many(numeric.to_numpy(dtype="float64"))
+    return {"hll": hll, "kll": kll, "count": int(series.notna().sum())}
+
+
+def _merge_into(merged: Dict[str, Any], sketches: Dict[str, Any]) -> None:
+    merged["hll"].merge(sketches["hll"])
+    merged["count"] += sketches["count"]
+    if sketches["kll"] is not None:
+        if merged["kll"] is None:
+            merged["kll"] = KLLSketch()
+        merged["kll"].merge(sketches["kll"])
+
+
+def _to_document(dataset_id: Any, column: str, chunk: int, sketches: Dict[str, Any]) -> Dict[str, Any]:
+    hll = sketches["hll"].to_dict()
+    hll["registers"] = Binary(hll["registers"])
+    return {
+        "dataset_id": dataset_id,
+        "column": column,
+        "chunk": chunk,
+        "count": sketches["count"],
+        "hll": hll,
+        "kll": sketches["kll"].to_dict() if sketches["kll"] is not None else None,
+        "distinct_estimate": sketches["hll"].estimate(),
+    }
+
+
+def _from_document(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "hll": HyperLogLog.from_dict(doc["hll"]),
+        "kll": KLLSketch.from_dict(doc["kll"]) if doc.get("kll") else None,
+        "count": doc.get("count", 0),
+    }
+
+
+def _rebuild_merged(dataset_id: Any, column: str) -> Dict[str, Any]:
+    merged = {"hll": HyperLogLog(), "kll": None, "count": 0}
+    for doc in dataset_sketches_collection.find({"dataset_id": dataset_id, "column": column,
+                                                 "chunk": {"$ne": MERGED_CHUNK}}):
+        _merge_into(merged, _from_document(doc))
+    return merged
+
+
+def store_chunk_sketches(dataset_id: Any, chunk_index: int, records: List[Dict[str, Any]], columns: List[str]) -> None:
+    """
+    Build sketches for one chunk of rows and fold them into the running merge.
+
+    Re-writing a chunk that was already merged (e.g. a retried ingest batch)
+    rebuilds that column's merge from the chunk sketches, so a chunk is never
+    counted twice.
+    """
+    merged_docs = {
+        doc["column"]: doc
+        for doc in dataset_sketches_collection.find({"dataset_id": dataset_id, "chunk": MERGED_CHUNK})
+    }
+
+    operations = []
+    for column in columns:
+        sketches = _build_sketches([record.get(column) for record in records])
+        operations.append(ReplaceOne(
+            {"dataset_id": dataset_id, "column": column, "chunk": chunk_index},
+            _to_document(dataset_id, column, chunk_index, sketches),
+            upsert=True,
+        ))
+
+        merged_doc = merged_docs.get(column)
+        merged_chunks = merged_doc.get("chunks", []) if merged_doc else []
+        if chunk_index in merged_chunks:
+            dataset_sketches_collection.bulk_write(operations[-1:])
+            operations.pop()
+            merged = _rebuild_merged(dataset_id, column)
+        else:
+            merged = _from_document(merged_doc) if merged_doc else {"hll": HyperLogLog(), "kll": None, "count": 0}
+            _merge_into(merged, sketches)
+            merged_chunks = merged_chunks + [chunk_index]
+
+        merged_document = _to_document(dataset_id, column, MERGED_CHUNK, merged)
+        merged_document["chunks"] = sorted(set(merged_chunks))
+        operations.append(ReplaceOne(
+            {"dataset_id": dataset_id, "column": column, "chunk": MERGED_CHUNK},
+            merged_document,
+            upsert=True,
+        ))
+
+    if operations:
+        dataset_sketches_collection.bulk_write(operations, ordered=True)
+
+
+def delete_sketches(dataset_id: Any) -> None:
+    dataset_sketches_collection.delete_many({"dataset_id": dataset_id})
+
+
+def get_approximate_stats(dataset_id: Any, column: str, quantiles: Optional[List[float]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Approximate distinct count and quantiles of a column.
+
+    Returns:
+        Dictionary with count, approx_distinct and quantiles (None for
+        non-numeric columns), or None if the column has no sketches
+    """
+    projection = {"count": 1, "distinct_estimate": 1}
+    if quantiles:
+        projection["kll"] = 1
+    doc = dataset_sketches_collection.find_one(
+        {"dataset_id": dataset_id, "column": column, "chunk": MERGED_CHUNK}, projection)
+    if not doc:
+        return None
+
+    quantile_values = None
+    if quantiles and doc.get("kll"):
+        estimates = KLLSketch.from_dict(doc["kll"]).quantiles(quantiles)
+        quantile_values = dict(zip([str(q) for q in quantiles], estimates))
+
+    return {
+        "count": doc.get("count", 0),
+        "approx_distinct": doc.get("distinct_estimate", 0),
+        "quantiles": quantile_values,
+    }
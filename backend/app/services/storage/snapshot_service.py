@@ -0,0 +1,149 @@
+"""
+Parquet/Arrow snapshots of datasets in object storage.
+
+After every completed ingest or pipeline run the dataset is written as a
+compressed Parquet file (and optionally an Arrow IPC stream) to the configured
+storage backend. The object names are linked from both the ``datasets`` and
+``datasets_information`` documents so bulk consumers can download the data
+through a presigned URL without going through the API or MongoDB.
+"""
+import tempfile
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.config.logging import get_logger
+from app.config.settings import get_settings
+from app.db.database import datasets_collection, dataset_information_collection
+from app.services.storage.mongodb_service import as_dataset_id
+from app.services.storage.storage_factory import get_storage_service
+
+logger = get_logger("services.snapshot")
+
+# Snapshot files larger than this are spooled to disk while they are written
+SPOOL_MAX_MEMORY = 64 * 1024 * 1024
+
+
+def dataframe_to_arrow(df: pd.DataFrame) -> pa.Table:
+    """
+    Convert a DataFrame to an Arrow table.
+
+    Object columns holding mixed types (e.g. numbers and strings in the same
+    CSV column) cannot be typed by Arrow; those are stored as strings.
+    """
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        df = df.copy()
+        for column in df.columns:
+            if df[column].dtype == object:
+                df[column] = df[column].map(lambda value: None if pd.isna(value) else str(value))
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _upload_spooled(storage_service: Any, spool: BinaryIO, object_name: str) -> int:
+    """Upload a spooled file, as a multipart upload when it is large; returns its size."""
+    settings = get_settings()
+    size = spool.tell()
+    spool.seek(0)
+    if size > settings.multipart_threshold:
+        storage_service.upload_multipart(spool, object_name, settings.multipart_part_size,
+                                         settings.multipart_max_workers, total_size=size)
+    else:
+        storage_service.upload_file(spool.read(), object_name)
+    return size
+
+
+def _write_snapshot(dataset_id: Any, tables: Iterable[pa.Table]) -> Optional[Dict[str, Any]]:
+    settings = get_settings()
+    timestamp = datetime.now(timezone.utc)
+    object_prefix = f"snapshots/{dataset_id}/{timestamp.strftime('%Y%m%d_%H%M%S')}"
+
+    try:
+        storage_service = get_storage_service()
+        with ExitStack() as stack:
+            parquet_spool = stack.enter_context(tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY))
+            arrow_spool = None
+            parquet_writer = arrow_writer = None
+            record_count = 0
+            # Tables are appended as they arrive, the first one fixes the schema
+            for table in tables:
+                if parquet_writer is None:
+                    schema = table.schema
+                    parquet_writer = stack.enter_context(
+                        pq.ParquetWriter(parquet_spool, schema, compression=settings.snapshot_compression))
+                    if settings.snapshot_write_arrow:
+                        arrow_spool = stack.enter_context(tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY))
+                        arrow_writer = stack.enter_context(pa.ipc.new_stream(
+                            arrow_spool, schema, options=pa.ipc.IpcWriteOptions(compression="zstd")))
+                elif table.schema != schema:
+                    table = table.cast(schema)
+                parquet_writer.write_table(table)
+                if arrow_writer is not None:
+                    arrow_writer.write_table(table)
+                record_count += table.num_rows
+            if parquet_writer is None:
+                raise ValueError("No data to snapshot")
+            parquet_writer.close()
+            if arrow_writer is not None:
+                arrow_writer.close()
+
+            parquet_object = f"{object_prefix}.parquet"
+            snapshot = {
+                "parquet_object": parquet_object,
+                "parquet_size": _upload_spooled(storage_service, parquet_spool, parquet_object),
+                "arrow_object": None,
+                "record_count": record_count,
+                "created_at": timestamp.isoformat(),
+            }
+            if arrow_spool is not None:
+                arrow_object = f"{object_prefix}.arrows"
+                _upload_spooled(storage_service, arrow_spool, arrow_object)
+                snapshot["arrow_object"] = arrow_object
+
+        datasets_collection.update_one({"_id": dataset_id}, {"$set": {"snapshot": snapshot}})
+        dataset_information_collection.update_many({"dataset_id": dataset_id}, {"$set": {"snapshot": snapshot}})
+
+        logger.info(f"Wrote snapshot {parquet_object} with {record_count} records")
+        return snapshot
+
+    except Exception as e:
+        logger.error(f"Failed to write snapshot for dataset {dataset_id}: {e}", exc_info=True)
+        return None
+
+
+def write_dataset_snapshot(dataset_id: Any, df: pd.DataFrame) -> Optional[Dict[str, Any]]:
+    """
+    Write a snapshot of ``df`` to object storage and link it to the dataset.
+
+    Snapshot failures are logged and never fail the ingest that triggered them.
+
+    Returns:
+        The snapshot metadata stored on the dataset, or None on failure
+    """
+    return _write_snapshot(as_dataset_id(dataset_id), (dataframe_to_arrow(frame) for frame in [df]))
+
+
+def write_dataset_snapshot_batches(
+    dataset_id: Any, schema: pa.Schema, batches: Iterable[pd.DataFrame]
+) -> Optional[Dict[str, Any]]:
+    """
+    Write a snapshot from DataFrame batches that all fit ``schema``.
+
+    Each batch is appended to the snapshot files as it arrives and the files
+    are spooled to disk, so the dataset is never held in memory as a whole.
+    Failures are logged like in ``write_dataset_snapshot``.
+    """
+    def tables() -> Iterator[pa.Table]:
+        empty = True
+        for batch in batches:
+            empty = False
+            yield pa.Table.from_pandas(batch, schema=schema, preserve_index=False)
+        if empty:
+            yield schema.empty_table()
+
+    return _write_snapshot(as_dataset_id(dataset_id), tables())
@@ -1,23 +1,42 @@
+from functools import lru_cache
+
 from app.config.settings import get_settings
-from .minio_service import MinioStorageService
-from .s3_service import S3StorageService
+from .base_storage import BaseStorage
 
 
-def get_storage_service():
+@lru_cache()
+def get_storage_service() -> BaseStorage:
     """
-    Return the appropriate storage service based on environment flags.
+    Return the process-wide storage service based on environment flags.
 
-    - If DEV_MODE is true (default), use MinIO.
+    - STORAGE_BACKEND selects "minio", "s3" or "local" explicitly.
+    - Otherwise, if DEV_MODE is true (default), use MinIO.
     - If DEV_MODE is false (e.g. in production), use AWS S3.
+
+    The service is created on first use and shared by all requests and
+    threads, so its HTTP connection pool is reused. Creating it makes no
+    network calls; bucket setup happens once in ``bootstrap_storage``.
     """
     settings = get_settings()
-
-    # Use the dedicated dev_mode flag, falling back to True if missing.
-    dev_mode = getattr(settings, "dev_mode", True)
-
-    if dev_mode:
+    backend = settings.storage_backend.lower()
+
+    if not backend:
+        # Use the dedicated dev_mode flag, falling back to True if missing.
+        backend = "minio" if getattr(settings, "dev_mode", True) else "s3"
+
+    # Backends are imported lazily: each one reads its own settings on import.
+    if backend == "local":
+        from .local_service import LocalStorageService
+        return LocalStorageService()
+    if backend == "minio":
+        from .minio_service import MinioStorageService
         return MinioStorageService()
-
-    return S3StorageService()
+    if backend == "s3":
+        from .s3_service import S3StorageService
+        return S3StorageService()
+    raise ValueError(f"Unknown storage backend: {settings.storage_backend}")
 
 
+def bootstrap_storage() -> None:
+    """Create the storage client and its bucket. Called from the app lifespan."""
+    get_storage_service().ensure_bucket()
@@ -1,17 +1,48 @@
 import threading
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import Dict, Any, Tuple
 
 from app.utils.erp import pull_dataset
 from app.services.storage.mongodb_service import store_to_mongodb
+from app.services.storage.snapshot_service import write_dataset_snapshot
+from app.services.storage.profile_service import write_dataset_profile
 from app.config.logging import LoggerMixin
+from app.config.settings import get_settings
 from app.db.database import datasets_collection, pipelines_collection, pipelines_history_collection
+from app.utils.metrics import TASK_DURATION, TASK_QUEUE_DEPTH, TASK_WORKERS_BUSY, TASK_WORKERS_LIMIT
+from app.utils.response_cache import bump_catalog_version
 
 # In-memory store for task metadata
 tasks: Dict[str, Dict[str, Any]] = {}
 
 
+class MeteredThreadPoolExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor that reports busy workers and task run times to the metrics."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(self._run_metered, fn, *args, **kwargs)
+
+    @staticmethod
+    def _run_metered(fn, *args, **kwargs):
+        TASK_WORKERS_BUSY.inc()
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            TASK_DURATION.observe(time.perf_counter() - started, getattr(fn, "__name__", "task"))
+            TASK_WORKERS_BUSY.dec()
+
+
+# Shared pool for background work (pipeline runs and ingest jobs). Work beyond
+# TASK_MAX_WORKERS waits in the pool's queue instead of starting more threads.
+task_pool = MeteredThreadPoolExecutor(max_workers=get_settings().task_max_workers, thread_name_prefix="TaskThread")
+TASK_WORKERS_LIMIT.set(task_pool._max_workers)
+TASK_QUEUE_DEPTH.set_function(task_pool._work_queue.qsize)
+
+
 class TaskRunner(LoggerMixin):
     def run_pipeline_task(
         self, dataset_id: str, dataset_name: str, user_id: str, exec_id: str, pipeline_id: str = None
@@ -35,6 +66,9 @@ class TaskRunner(LoggerMixin):
             result = store_to_mongodb(
                 dataset_id, dataset_name, user_id, "", "", dataset_json, pipeline_id)
 
+            write_dataset_snapshot(result.get("dataset_id"), dataset)
+            write_dataset_profile(result.get("dataset_id"), dataset)
+
             if result.get("updated"):
                 self.logger.info(
                     f"[{exec_id}] Updated existing dataset {dataset_id} with {len(dataset_json)} records.")
@@ -131,6 +165,9 @@ def add_pipeline_history_entry(pipeline_name: str, exec_id: str, status: str, us
                 {"$push": {"history": history_result.inserted_id}}
             )
 
+        # Pipeline status (and, once completed, the pulled dataset) changed
+        bump_catalog_version()
+
     except Exception as e:
         print(f"Error adding pipeline history entry: {e}")
 
@@ -153,13 +190,8 @@ def submit_task(dataset_id: str, dataset_name: str, user_id: str, pipeline_id: s
         "user_id": user_id,
     }
 
-    # Run task in background thread
-    thread = threading.Thread(
-        target=task_runner.run_pipeline_task,
-        args=(dataset_id, dataset_name, user_id, exec_id, pipeline_id),
-        name=f"TaskThread-{exec_id[:8]}",
-    )
-    thread.start()
+    # Run task on the shared background pool
+    task_pool.submit(task_runner.run_pipeline_task, dataset_id, dataset_name, user_id, exec_id, pipeline_id)
 
     return tasks[exec_id], exec_id
 
@@ -0,0 +1,110 @@
+import math
+import numpy as np
+import pandas as pd
+from typing import List, Dict, Any
+
+
+def _to_native(value: Any) -> Any:
+    """Convert numpy/pandas scalars to BSON- and JSON-friendly Python values."""
+    if value is None:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return None if pd.isna(value) else value.isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def _profile_column(
+    series: pd.Series, count: int, numeric_stats: Any, top_k: int, bins: int
+) -> Dict[str, Any]:
+    row_count = len(series)
+    non_null = series.dropna()
+
+    profile: Dict[str, Any] = {
+        "name": str(series.name),
+        "dtype": str(series.dtype),
+        "count": count,
+        "nulls": row_count - count,
+        "null_fraction": (row_count - count) / row_count if row_count else 0.0,
+        "distinct": None,
+        "min": None,
+        "max": None,
+        "mean": None,
+        "std": None,
+        "top_values": [],
+        "histogram": None,
+    }
+
+    if numeric_stats is not None:
+        profile.update({key: _to_native(numeric_stats[key]) for key in ("min", "max", "mean", "std")})
+        values = non_null.to_numpy(dtype="float64")
+        values = values[np.isfinite(values)]
+        if values.size:
+            hist_counts, edges = np.histogram(values, bins=bins)
+            profile["histogram"] = {
+                "edges": [float(edge) for edge in edges],
+                "counts": [int(c) for c in hist_counts],
+            }
+    elif pd.api.types.is_datetime64_any_dtype(series) and count:
+        profile["min"] = _to_native(non_null.min())
+        profile["max"] = _to_native(non_null.max())
+
+    if count:
+        try:
+            top = non_null.value_counts()
+        except TypeError:
+            # Unhashable values (lists or dicts from JSON sources)
+            top = None
+        if top is not None:
+            profile["distinct"] = len(top)
+            profile["top_values"] = [{"value": _to_native(value), "count": int(c)}
+                                     for value, c in top.head(top_k).items()]
+    else:
+        profile["distinct"] = 0
+
+    return profile
+
+
+def _is_numeric(series: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+def profile_dataframe(df: pd.DataFrame, top_k: int = 10, bins: int = 10) -> List[Dict[str, Any]]:
+    """
+    Compute per-column statistics for a DataFrame.
+
+    Counts and null counts are computed for all columns at once, and numeric
+    statistics with one vectorized aggregation over the numeric columns.
+
+    Args:
+        df: DataFrame to profile
+        top_k: Number of most frequent values to keep per column
+        bins: Number of histogram bins for numeric columns
+
+    Returns:
+        List of column profiles in column order
+    """
+    counts = df.count()
+    numeric = df.select_dtypes(include="number").select_dtypes(exclude="bool")
+    numeric_stats = numeric.agg(["min", "max", "mean", "std"]) if not numeric.empty else pd.DataFrame()
+
+    return [
+        _profile_column(df[column], int(counts[column]),
+                        numeric_stats[column] if column in numeric_stats.columns else None, top_k, bins)
+        for column in df.columns
+    ]
+
+
+def profile_series(series: pd.Series, top_k: int = 10, bins: int = 10) -> Dict[str, Any]:
+    """
+    Compute the statistics of a single column, as ``profile_dataframe`` does for each column.
+
+    Lets a dataset be profiled one column at a time.
+    """
+    numeric_stats = series.agg(["min", "max", "mean", "std"]) if _is_numeric(series) else None
+    return _profile_column(series, int(series.count()), numeric_stats, top_k, bins)
@@ -3,7 +3,9 @@ import numpy as np
 import pandas as pd
 from typing import List, Dict, Any, Optional
 from app.config.logging import get_logger
+from app.config.settings import get_settings
 from app.db.database import datasets_collection
+from app.services.storage.columnar_service import store_columnar
 from app.services.storage.minio_service import MinioStorageService
 
 logger = get_logger("csv_processor")
@@ -95,7 +97,8 @@ def store_csv_data_in_mongodb(
 
         document = {
             "_id": dataset_id,
-            "data": csv_data,
+            # All rows go to the column chunks; this keeps a preview
+            "data": csv_data[:get_settings().dataset_preview_rows],
             "columns": columns,
             "record_count": len(csv_data),
             "created_at": current_time,
@@ -103,6 +106,7 @@ def store_csv_data_in_mongodb(
         }
 
         result = datasets_collection.insert_one(document)
+        store_columnar(dataset_id, csv_data, columns)
 
         logger.info(
             f"CSV data stored in datasets collection with ID: {dataset_id}")
@@ -0,0 +1,120 @@
+"""
+Per-request accounting of MongoDB commands.
+
+``DbTracingMiddleware`` puts a ``RequestDbStats`` in a context variable for
+the duration of each request. Sync routes run in threads that inherit the
+request's context, so ``RequestCommandListener`` (registered on the shared
+client) finds the stats of the request that issued a command and adds the
+command's duration to them. Commands issued outside a request (background
+tasks, startup) are not recorded.
+
+Each command is also reduced to its shape: the command name, the collection
+and the structure of its filter or pipeline with every value replaced by
+``?``. A shape that repeats many times in one request is the signature of a
+query issued in a loop (an N+1 pattern) that could be a single ``$in`` query
+or aggregation.
+"""
+import threading
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+from app.utils.metrics import command_collection
+
+# Where each command keeps the part that identifies what it reads or writes
+QUERY_FIELDS = {
+    "find": "filter",
+    "aggregate": "pipeline",
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query",
+    "update": "updates",
+    "delete": "deletes",
+}
+# Follow-ups of an earlier command, which repeat by design
+CURSOR_COMMANDS = {"getMore", "killCursors", "endSessions"}
+
+Shape = Tuple[str, str, str]
+
+_current_stats: ContextVar[Optional["RequestDbStats"]] = ContextVar("request_db_stats", default=None)
+
+
+def _shape(value: Any) -> str:
+    if isinstance(value, dict):
+        return "{" + ", ".join(f"{key}: {_shape(item)}" for key, item in value.items()) + "}"
+    # Lists of documents are structure ($and/$or branches, pipeline stages, update statements)
+    if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+        return "[" + ", ".join(_shape(item) for item in value) + "]"
+    return "?"
+
+
+def command_shape(command_name: str, command: Dict[str, Any]) -> Shape:
+    """(command, collection, structure of the query with values left out)."""
+    query_field = QUERY_FIELDS.get(command_name)
+    query = _shape(command.get(query_field)) if query_field else ""
+    return command_name, command_collection(command_name, command), query
+
+
+class RequestDbStats:
+    """MongoDB commands issued while handling one request."""
+
+    def __init__(self):
+        self.commands = 0
+        self.seconds = 0.0
+        self.shapes: Counter = Counter()
+        self._pending: Dict[Tuple[int, object], Shape] = {}
+        self._lock = threading.Lock()
+
+    def started(self, key: Tuple[int, object], shape: Shape) -> None:
+        with self._lock:
+            self._pending[key] = shape
+
+    def finished(self, key: Tuple[int, object], seconds: float) -> None:
+        with self._lock:
+            shape = self._pending.pop(key, None)
+            self.commands += 1
+            self.seconds += seconds
+            if shape is not None and shape[0] not in CURSOR_COMMANDS:
+                self.shapes[shape] += 1
+
+    def repeated_shapes(self, threshold: int) -> List[Tuple[Shape, int]]:
+        """Shapes issued at least ``threshold`` times, most frequent first."""
+        with self._lock:
+            return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+    def server_timing(self) -> str:
+        """``Server-Timing`` entry for the commands recorded so far."""
+        with self._lock:
+            return f'db;dur={self.seconds * 1000:.1f};desc="{self.commands} MongoDB commands"'
+
+
+def start_request_stats() -> Tuple[RequestDbStats, Any]:
+    """Begin recording for the current request; returns the stats and a token for ``end_request_stats``."""
+    stats = RequestDbStats()
+    return stats, _current_stats.set(stats)
+
+
+def end_request_stats(token: Any) -> None:
+    _current_stats.reset(token)
+
+
+class RequestCommandListener(monitoring.CommandListener):
+    """Adds every MongoDB command to the stats of the request that issued it."""
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.started((event.request_id, event.connection_id), command_shape(event.command_name, event.command))
+
+    def _finished(self, event) -> None:
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.finished((event.request_id, event.connection_id), event.duration_micros / 1e6)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finished(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finished(event)
@@ -0,0 +1,51 @@
+"""
+Reports the MongoDB commands of each request (see ``db_tracing``).
+
+The count and total time of the commands issued before the response starts
+are sent in a ``Server-Timing`` header, which browser developer tools show
+next to the request. When the request is complete, the totals are logged
+and every query shape repeated at least ``repeated_query_threshold`` times
+is logged as a warning.
+"""
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config.logging import get_logger
+from app.utils.db_tracing import end_request_stats, start_request_stats
+
+logger = get_logger("utils.db_tracing")
+
+
+class DbTracingMiddleware:
+    def __init__(self, app: ASGIApp, repeated_query_threshold: int = 5):
+        self.app = app
+        self.repeated_query_threshold = repeated_query_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = start_request_stats()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if stats.commands:
+                    MutableHeaders(raw=message["headers"]).append("Server-Timing", stats.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            end_request_stats(token)
+            if stats.commands:
+                request = f"{scope['method']} {scope['path']}"
+                logger.info(f"{request} -> {status_code}: {stats.commands} MongoDB commands "
+                            f"in {stats.seconds * 1000:.1f} ms")
+                for (command, collection, query), count in stats.repeated_shapes(self.repeated_query_threshold):
+                    shape = f" {query}" if query else ""
+                    logger.warning(f"{request} issued {count} {command} commands on {collection or 'the database'} "
+                                   f"with the same shape{shape} (N+1 query in a loop?)")
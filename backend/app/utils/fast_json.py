@@ -0,0 +1,133 @@
+"""
+Fast JSON serialization for API responses.
+
+``FastJSONResponse`` renders content with orjson instead of ``json.dumps``
+and understands the types that show up in MongoDB documents and DataFrame
+rows (ObjectId, numpy scalars, pandas timestamps, pydantic models). NaN and
+infinities become ``null`` rather than failing the response.
+
+For data the application produced itself, ``construct_trusted`` builds
+response models without re-validating every field, and ``render_model``
+serializes them straight to bytes. Validation in pydantic-core is already
+cheap for small models, so skipping it pays off for row-heavy responses
+(query results, column values) whose free-form rows would otherwise be
+walked value by value; lists of many small models are faster validated.
+Request bodies and other external input must always be validated.
+"""
+import typing
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, TypeVar
+
+import numpy as np
+import orjson
+import pandas as pd
+from bson import ObjectId
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", by_alias=True, warnings=False)
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, pd.Timestamp):
+        return None if pd.isna(value) else value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    if value is pd.NaT:
+        return None
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _converter(annotation: Any) -> Optional[Callable[[Any], Any]]:
+    """
+    Function that turns trusted data for ``annotation`` into what validation
+    would produce, or None where the data can be used as is.
+    """
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+    if origin is typing.Union or (origin is not None and type(None) in args):
+        options = [_converter(option) for option in args if option is not type(None)]
+        convert = options[0] if len(options) == 1 else None
+        return (lambda value: None if value is None else convert(value)) if convert else None
+    if origin in (list, typing.List):
+        convert = _converter(args[0]) if args else None
+        return (lambda value: [convert(item) for item in value]) if convert else None
+    if origin in (dict, typing.Dict):
+        convert = _converter(args[1]) if len(args) == 2 else None
+        return (lambda value: {key: convert(item) for key, item in value.items()}) if convert else None
+    if isinstance(annotation, type):
+        if issubclass(annotation, BaseModel):
+            return lambda value: construct_trusted(annotation, value) if isinstance(value, dict) else value
+        if issubclass(annotation, Enum):
+            return lambda value: value if isinstance(value, Enum) else annotation(value)
+        if annotation in (datetime, date):
+            return lambda value: _parse_iso(annotation, value) if isinstance(value, str) else value
+    return None
+
+
+def _parse_iso(annotation: type, value: str) -> Any:
+    try:
+        return annotation.fromisoformat(value)
+    except ValueError:
+        return value
+
+
+@lru_cache(maxsize=None)
+def _construction_plan(model: Type[BaseModel]) -> List[Tuple[str, Optional[str], Optional[Callable[[Any], Any]]]]:
+    return [(name, field.alias, _converter(field.annotation)) for name, field in model.model_fields.items()]
+
+
+def construct_trusted(model: Type[ModelT], data: Dict[str, Any]) -> ModelT:
+    """
+    Build ``model`` from trusted data without validation.
+
+    Nested models, lists and dictionaries of models are constructed
+    recursively; enum values and ISO timestamps are converted so the model
+    serializes exactly like a validated one. Fields are looked up by alias
+    first, then by name. Fields whose type needs no conversion (strings,
+    lists of plain values, free-form row dictionaries) are not walked at all.
+    """
+    values = {}
+    for name, alias, convert in _construction_plan(model):
+        key = alias if alias and alias in data else name
+        if key in data:
+            value = data[key]
+            values[name] = convert(value) if convert is not None and value is not None else value
+    return model.model_construct(**values)
+
+
+def render_model(model: BaseModel) -> bytes:
+    """Serialize a response model to JSON bytes, as FastAPI would (by alias)."""
+    return model.__pydantic_serializer__.to_json(model, by_alias=True, warnings=False, fallback=_default)
+
+
+def trusted_response(model: Type[BaseModel], data: Dict[str, Any], status_code: int = 200) -> Response:
+    """JSON response for trusted ``data`` shaped like ``model``, skipping FastAPI's validation."""
+    return Response(content=render_model(construct_trusted(model, data)), status_code=status_code,
+                    media_type="application/json")
@@ -1,26 +1,50 @@
-import io
+import hashlib
+import tempfile
 import requests
-import pandas as pd
 import mimetypes
 from datetime import datetime, timezone
 from bson import ObjectId
 from ..config.logging import get_logger
 from app.db.database import datasets_collection
 from app.services.storage.storage_factory import get_storage_service
+from app.services.ingest.readers import read_dataframe
 logger = get_logger("db")
-storage_service = get_storage_service()
+
+
+def spool_with_sha256(reader, max_memory: int, chunk_size: int = 1024 * 1024, on_progress=None):
+    """
+    Copy a file-like object into a spooled temporary file while hashing it.
+
+    The copy stays in memory up to ``max_memory`` bytes and moves to disk
+    beyond that. The returned file is positioned at the start. If given,
+    ``on_progress`` is called with the number of bytes copied so far.
+
+    Returns:
+        Tuple of (temporary file, SHA-256 hex digest)
+    """
+    digest = hashlib.sha256()
+    spool = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    copied = 0
+    for chunk in iter(lambda: reader.read(chunk_size), b""):
+        digest.update(chunk)
+        spool.write(chunk)
+        copied += len(chunk)
+        if on_progress:
+            on_progress(copied)
+    spool.seek(0)
+    return spool, digest.hexdigest()
 
 
 def download_and_store_file(file_url):
     try:
         logger.info(f"Attempting to download file from URL: {file_url}")
-        response = requests.get(file_url)
-        logger.debug(f"HTTP response status: {response.status_code}")
-        response.raise_for_status()  # Raise an error for bad responses
+        with requests.get(file_url, stream=True) as response:
+            logger.debug(f"HTTP response status: {response.status_code}")
+            response.raise_for_status()  # Raise an error for bad responses
 
-        # Convert CSV to pandas DataFrame
-        csv_content = response.content.decode("utf-8")
-        df = pd.read_csv(io.StringIO(csv_content))
+            # Parse the body as it streams in; the format is sniffed from its first bytes
+            response.raw.decode_content = True
+            df = read_dataframe(response.raw, file_url.split("?")[0])
         records = df.to_dict(orient="records")
 
         logger.info(
@@ -62,7 +86,7 @@ def store_file_metadata(filename, content_type, file_url):
 
 def upload_file_to_presigned_url(file_path: str):
     filename = file_path.split("/")[-1]
-    upload_url, object_name = storage_service.generate_presigned_url(filename)
+    upload_url, object_name = get_storage_service().generate_presigned_url(filename)
 
     mime_type, _ = mimetypes.guess_type(file_path)
     mime_type = mime_type or "application/octet-stream"
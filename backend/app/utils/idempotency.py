@@ -0,0 +1,152 @@
+"""
+Idempotency keys for POST endpoints that start expensive work.
+
+A client sends the same ``Idempotency-Key`` header when it retries a
+request. The first request with a key records it in ``idempotency_keys``
+(unique per scope, user and key) before doing any work and stores its
+response when done; a repeat gets that stored response instead of starting
+another ERP pull or ingest. A repeat that arrives while the first request is
+still running waits briefly for its result.
+
+Keys expire through a TTL index after IDEMPOTENCY_TTL_SECONDS. A failed
+request releases its key so that it can be retried. A request that dies
+without releasing it (e.g. its process crashed) stops renewing the key's
+``locked_until`` lease, and once that lapses a repeat takes the key over and
+runs the work itself.
+"""
+import hashlib
+import json
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from app.config.settings import get_settings
+from app.db.database import idempotency_keys_collection
+
+POLL_INTERVAL = 0.1
+
+
+class IdempotencyKeyReused(ValueError):
+    """The key was already used for a request with a different body."""
+
+
+class IdempotencyKeyInProgress(RuntimeError):
+    """The original request with this key is still running."""
+
+
+def request_fingerprint(payload: Any) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _lock_expiry() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=get_settings().idempotency_lease_seconds)
+
+
+def run_idempotent(
+    scope: str, key: Optional[str], user_id: Any, payload: Any, run: Callable[[], Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Run ``run`` once per (scope, user, key) and return its response.
+
+    Args:
+        scope: Name of the endpoint, so the same key can be used on different endpoints
+        key: Value of the Idempotency-Key header; without a key ``run`` is always called
+        user_id: Owner of the key
+        payload: Request body; a repeat must send the same body
+        run: Does the work and returns the JSON-serializable response
+
+    Raises:
+        IdempotencyKeyReused: If the key was used with a different body
+        IdempotencyKeyInProgress: If the original request is still running
+            after IDEMPOTENCY_WAIT_SECONDS
+    """
+    if not key:
+        return run()
+
+    settings = get_settings()
+    fingerprint = request_fingerprint(payload)
+    key_filter = {"scope": scope, "user_id": str(user_id), "key": key}
+    now = datetime.now(timezone.utc)
+
+    while True:
+        # Keys past their expiry may not have been removed by the TTL monitor yet
+        idempotency_keys_collection.delete_one({**key_filter, "expires_at": {"$lt": now}})
+        try:
+            idempotency_keys_collection.insert_one({
+                **key_filter,
+                "fingerprint": fingerprint,
+                "status": "in_progress",
+                "response": None,
+                "locked_until": _lock_expiry(),
+                "created_at": now,
+                "expires_at": now + timedelta(seconds=settings.idempotency_ttl_seconds),
+            })
+            break
+        except DuplicateKeyError:
+            record = _wait_for_record(key_filter, settings.idempotency_wait_seconds)
+            if record is None:
+                # The original request failed and released the key
+                continue
+            if record["fingerprint"] != fingerprint:
+                raise IdempotencyKeyReused("Idempotency-Key was already used with a different request")
+            if record["status"] == "completed":
+                return record["response"]
+            if _take_over(key_filter):
+                break
+            raise IdempotencyKeyInProgress("A request with this Idempotency-Key is still in progress")
+
+    try:
+        with _renewing_lock(key_filter):
+            response = run()
+    except BaseException:
+        idempotency_keys_collection.delete_one(key_filter)
+        raise
+
+    idempotency_keys_collection.update_one(
+        key_filter, {"$set": {"status": "completed", "response": response}})
+    return response
+
+
+def _take_over(key_filter: Dict[str, Any]) -> bool:
+    """Claim an in-progress key whose lock lapsed; only one of several repeats succeeds."""
+    now = datetime.now(timezone.utc)
+    record = idempotency_keys_collection.find_one_and_update(
+        {**key_filter, "status": "in_progress",
+         "$or": [{"locked_until": None}, {"locked_until": {"$lt": now}}]},
+        {"$set": {"locked_until": _lock_expiry()}},
+    )
+    return record is not None
+
+
+@contextmanager
+def _renewing_lock(key_filter: Dict[str, Any]) -> Iterator[None]:
+    """Keep renewing the lock on a key while its request runs."""
+    stop = threading.Event()
+    interval = max(get_settings().idempotency_lease_seconds / 3, 1)
+
+    def renew() -> None:
+        while not stop.wait(interval):
+            idempotency_keys_collection.update_one(
+                {**key_filter, "status": "in_progress"}, {"$set": {"locked_until": _lock_expiry()}})
+
+    thread = threading.Thread(target=renew, name=f"idempotency-lock-{key_filter['key']}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _wait_for_record(key_filter: Dict[str, Any], wait_seconds: float) -> Optional[Dict[str, Any]]:
+    """The key record once it is completed, released (None), or still in progress at the deadline."""
+    deadline = time.monotonic() + wait_seconds
+    while True:
+        record = idempotency_keys_collection.find_one(key_filter)
+        if record is None or record["status"] == "completed" or time.monotonic() >= deadline:
+            return record
+        time.sleep(POLL_INTERVAL)
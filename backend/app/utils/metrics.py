@@ -0,0 +1,226 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Counters, gauges and histograms are kept per worker process and rendered by
+``/metrics``. Recording a value is a dict lookup and an addition under a
+lock, so instrumentation can stay on in production. Gauges that describe a
+queue or pool read their value from a callback when the metrics are scraped
+instead of being updated on every change.
+
+Label values must come from a small, fixed set (route templates, status
+codes, collection and command names), never from request data.
+"""
+import bisect
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from anyio import to_thread
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DB_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def _samples(self) -> Iterable[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for label_values, value in values:
+            yield f"{self.name}{_format_labels(self.label_names, label_values)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """Gauge set directly (``inc``/``dec``/``set``) or read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._functions: Dict[LabelValues, Callable[[], float]] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, *label_values: str, amount: float = 1) -> None:
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = value
+
+    def set_function(self, function: Callable[[], float], *label_values: str) -> None:
+        with self._lock:
+            self._functions[label_values] = function
+
+    def _samples(self) -> Iterable[str]:
+        with self._lock:
+            values = dict(self._values)
+            functions = list(self._functions.items())
+        for label_values, function in functions:
+            try:
+                values[label_values] = function()
+            except Exception:
+                # A gauge whose source is unavailable is left out of this scrape
+                continue
+        for label_values, value in values.items():
+            yield f"{self.name}{_format_labels(self.label_names, label_values)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: observation count per bucket (the last one is +Inf), sum
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def _samples(self) -> Iterable[str]:
+        with self._lock:
+            values = [(label_values, list(counts), total[0]) for label_values, (counts, total) in self._values.items()]
+        bounds = [repr(float(bound)) for bound in self.buckets] + ["+Inf"]
+        names = self.label_names + ("le",)
+        for label_values, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(names, label_values + (bound,))} {cumulative}"
+            labels = _format_labels(self.label_names, label_values)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = registry.register(Histogram(
+    "http_request_duration_seconds", "Time to handle HTTP requests, by route template, method and status.",
+    labels=("route", "method", "status")))
+HTTP_REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled."))
+THREADPOOL_THREADS_BUSY = registry.register(Gauge(
+    "threadpool_threads_busy", "Threads of the request threadpool (sync routes) that are in use."))
+THREADPOOL_THREADS_LIMIT = registry.register(Gauge(
+    "threadpool_threads_limit", "Size of the request threadpool."))
+THREADPOOL_QUEUE_DEPTH = registry.register(Gauge(
+    "threadpool_queue_depth", "Calls waiting for a thread of the request threadpool."))
+TASK_QUEUE_DEPTH = registry.register(Gauge(
+    "task_queue_depth", "Background tasks (pipeline runs, ingest jobs) waiting for a worker."))
+TASK_WORKERS_BUSY = registry.register(Gauge(
+    "task_workers_busy", "Background task workers running a task."))
+TASK_WORKERS_LIMIT = registry.register(Gauge(
+    "task_workers_limit", "Number of background task workers."))
+TASK_DURATION = registry.register(Histogram(
+    "task_duration_seconds", "Run time of background tasks, by task.", labels=("task",)))
+MONGO_COMMAND_DURATION = registry.register(Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency, by collection, command and outcome.",
+    labels=("collection", "command", "outcome"), buckets=DB_LATENCY_BUCKETS))
+
+
+def command_collection(command_name: str, command: dict) -> str:
+    """Collection a MongoDB command targets, or an empty string for database-level commands."""
+    target = command.get(command_name)
+    if isinstance(target, str):
+        return target
+    # getMore names its collection separately
+    collection = command.get("collection")
+    return collection if isinstance(collection, str) else ""
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Records the latency of every MongoDB command in ``MONGO_COMMAND_DURATION``."""
+
+    def __init__(self):
+        self._collections: Dict[Tuple[int, object], str] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        self._collections[(event.request_id, event.connection_id)] = command_collection(
+            event.command_name, event.command)
+
+    def _finished(self, event, outcome: str) -> None:
+        collection = self._collections.pop((event.request_id, event.connection_id), "")
+        MONGO_COMMAND_DURATION.observe(event.duration_micros / 1e6, collection, event.command_name, outcome)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finished(event, "success")
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finished(event, "failure")
+
+
+# Sync routes and run_in_threadpool share anyio's default limiter, which only
+# exists inside the event loop; /metrics is async so these read it there.
+THREADPOOL_THREADS_BUSY.set_function(lambda: to_thread.current_default_thread_limiter().borrowed_tokens)
+THREADPOOL_THREADS_LIMIT.set_function(lambda: to_thread.current_default_thread_limiter().total_tokens)
+THREADPOOL_QUEUE_DEPTH.set_function(lambda: to_thread.current_default_thread_limiter().statistics().tasks_waiting)
@@ -0,0 +1,137 @@
+"""
+On-demand profiling of single requests.
+
+An admin asks for a profile with the ``X-Profile`` header or the ``_profile``
+query parameter, whose value picks the output: ``html``, ``speedscope`` (JSON
+for speedscope.app) or ``text``. ``ProfilingMiddleware`` runs that one
+request under a profiler and stores the result under the request id.
+
+pyinstrument, an optional dependency, is a sampling profiler and renders all
+three outputs. Without it cProfile is used, and the profile is a pstats text
+report.
+
+Async endpoints run on the event loop, so their requests are profiled there;
+pyinstrument follows the request's task across awaits. Sync endpoints run in
+the threadpool, where a profiler started on the event loop sees nothing.
+``profile_sync_endpoints`` wraps them so the call is profiled in the worker
+thread. Requests without the flag pay for one context variable lookup per
+sync endpoint call.
+"""
+import asyncio
+import cProfile
+import io
+import pstats
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+from fastapi.routing import APIRoute
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:  # optional dependency, cProfile is used instead
+    SamplingProfiler = None
+
+MEDIA_TYPES = {
+    "html": "text/html; charset=utf-8",
+    "speedscope": "application/json",
+    "text": "text/plain; charset=utf-8",
+}
+SAMPLING_INTERVAL = 0.001
+
+
+def output_format(requested: str) -> str:
+    """Output for a requested format: cProfile can only produce ``text``."""
+    requested = requested.strip().lower()
+    if SamplingProfiler is None:
+        return "text"
+    return requested if requested in MEDIA_TYPES else "html"
+
+
+class RequestProfiler:
+    """One profiling run with pyinstrument, or with cProfile when it is not installed."""
+
+    def __init__(self, async_mode: bool):
+        if SamplingProfiler is not None:
+            self._profiler = SamplingProfiler(
+                interval=SAMPLING_INTERVAL, async_mode="enabled" if async_mode else "disabled")
+        else:
+            self._profiler = cProfile.Profile()
+
+    def start(self) -> None:
+        if SamplingProfiler is not None:
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self) -> None:
+        if SamplingProfiler is not None:
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+
+    def render(self, fmt: str) -> Tuple[str, str]:
+        """Returns (content, media type)."""
+        if SamplingProfiler is None:
+            stream = io.StringIO()
+            pstats.Stats(self._profiler, stream=stream).sort_stats("cumulative").print_stats(100)
+            return stream.getvalue(), MEDIA_TYPES["text"]
+        if fmt == "speedscope":
+            return self._profiler.output(renderer=SpeedscopeRenderer()), MEDIA_TYPES["speedscope"]
+        if fmt == "text":
+            return self._profiler.output_text(unicode=True), MEDIA_TYPES["text"]
+        return self._profiler.output_html(), MEDIA_TYPES["html"]
+
+
+class ProfileSession:
+    """Profiling state of one request; ``profiler`` is set once a profiler runs."""
+
+    def __init__(self, request_id: str, fmt: str):
+        self.request_id = request_id
+        self.format = fmt
+        self.profiler: Optional[RequestProfiler] = None
+
+
+_current_session: ContextVar[Optional[ProfileSession]] = ContextVar("profile_session", default=None)
+
+
+def start_session(session: ProfileSession) -> Any:
+    return _current_session.set(session)
+
+
+def end_session(token: Any) -> None:
+    _current_session.reset(token)
+
+
+def _profiled(call: Callable) -> Callable:
+    @wraps(call)
+    def profiled_call(*args, **kwargs):
+        session = _current_session.get()
+        if session is None or session.profiler is not None:
+            return call(*args, **kwargs)
+        session.profiler = RequestProfiler(async_mode=False)
+        session.profiler.start()
+        try:
+            return call(*args, **kwargs)
+        finally:
+            session.profiler.stop()
+
+    profiled_call.profiled = True
+    return profiled_call
+
+
+def is_sync_endpoint(route: Any) -> bool:
+    return isinstance(route, APIRoute) and not asyncio.iscoroutinefunction(route.endpoint)
+
+
+def profile_sync_endpoints(routes: Iterable[Any]) -> None:
+    """
+    Make the sync endpoints among ``routes`` profile themselves in their worker thread.
+
+    FastAPI calls ``dependant.call`` on every request, so wrapping it covers
+    the endpoint body (not its dependencies). Call after all routers are included.
+    """
+    for route in routes:
+        if is_sync_endpoint(route) and not getattr(route.dependant.call, "profiled", False):
+            route.dependant.call = _profiled(route.dependant.call)
@@ -0,0 +1,151 @@
+"""
+Runs requests flagged with ``X-Profile`` or ``_profile`` under a profiler (see ``profiling``).
+
+Only admins can profile; for anyone else the flag is ignored. The profile is
+stored in ``request_profiles`` under the request id (the client's
+``X-Request-ID`` when it sends a usable one). The response carries
+``X-Request-ID`` and ``X-Profile-URL``, and the profile can be fetched from
+``/profiles/{request_id}`` once the request is complete.
+
+Must run inside ``TokenAuthMiddleware``, which identifies the user.
+"""
+import re
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from urllib.parse import parse_qs
+
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.auth.user_auth import is_admin
+from app.config.logging import get_logger
+from app.db.crud import get_user_by_external_id
+from app.db.database import request_profiles_collection
+from app.utils.profiling import ProfileSession, RequestProfiler, end_session, is_sync_endpoint, output_format, start_session
+
+logger = get_logger("utils.profiling")
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_PARAMETER = "_profile"
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+# Profilers hook into the thread they run on, so only one request at a time
+# is profiled on the event loop
+_event_loop_profiler = threading.Lock()
+
+
+def _requested_format(scope: Scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return value.decode("latin-1")
+    query_string = scope.get("query_string", b"")
+    if PROFILE_QUERY_PARAMETER.encode() in query_string:
+        values = parse_qs(query_string.decode("latin-1"), keep_blank_values=True).get(PROFILE_QUERY_PARAMETER)
+        if values is not None:
+            return values[0]
+    return None
+
+
+def _request_id(scope: Scope) -> str:
+    for name, value in scope["headers"]:
+        if name == b"x-request-id":
+            request_id = value.decode("latin-1")
+            if REQUEST_ID_PATTERN.match(request_id):
+                return request_id
+    return uuid.uuid4().hex
+
+
+def _admin_user(external_id: Optional[str]) -> Optional[dict]:
+    if not external_id:
+        return None
+    user = get_user_by_external_id(external_id)
+    return user if user and is_admin(user) else None
+
+
+def _endpoint_is_sync(scope: Scope) -> bool:
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return is_sync_endpoint(route)
+    return False
+
+
+def _store_profile(session: ProfileSession, scope: Scope, user: dict, ttl_seconds: int) -> None:
+    content, media_type = session.profiler.render(session.format)
+    now = datetime.now(timezone.utc)
+    request_profiles_collection.replace_one(
+        {"_id": session.request_id},
+        {
+            "_id": session.request_id,
+            "method": scope["method"],
+            "path": scope["path"],
+            "user_id": user["_id"],
+            "format": session.format,
+            "media_type": media_type,
+            "content": content,
+            "created_at": now,
+            "expires_at": now + timedelta(seconds=ttl_seconds),
+        },
+        upsert=True,
+    )
+    logger.info(f"Stored profile {session.request_id} of {scope['method']} {scope['path']}")
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp, ttl_seconds: int = 86400):
+        self.app = app
+        self.ttl_seconds = ttl_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        requested = _requested_format(scope)
+        if requested is None:
+            await self.app(scope, receive, send)
+            return
+        user = await run_in_threadpool(_admin_user, scope.get("state", {}).get("external_id"))
+        if user is None:
+            await self.app(scope, receive, send)
+            return
+
+        session = ProfileSession(_request_id(scope), output_format(requested))
+        on_event_loop = not _endpoint_is_sync(scope)
+        if on_event_loop and not _event_loop_profiler.acquire(blocking=False):
+            logger.warning(f"Not profiling {scope['method']} {scope['path']}: another request is being profiled")
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_profile_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                headers["X-Request-ID"] = session.request_id
+                headers["X-Profile-URL"] = f"/profiles/{session.request_id}"
+            await send(message)
+
+        token = start_session(session)
+        try:
+            if on_event_loop:
+                session.profiler = RequestProfiler(async_mode=True)
+                session.profiler.start()
+                try:
+                    await self.app(scope, receive, send_with_profile_headers)
+                finally:
+                    session.profiler.stop()
+                    _event_loop_profiler.release()
+            else:
+                # The endpoint profiles itself in its worker thread
+                await self.app(scope, receive, send_with_profile_headers)
+        finally:
+            end_session(token)
+            if session.profiler is not None:
+                try:
+                    await run_in_threadpool(_store_profile, session, scope, user, self.ttl_seconds)
+                except Exception as e:
+                    logger.error(f"Failed to store profile {session.request_id}: {e}")
+            else:
+                logger.info(f"Nothing profiled for {scope['method']} {scope['path']}: the endpoint did not run")
@@ -0,0 +1,114 @@
+"""
+Response cache with ETags for the catalog endpoints.
+
+``/datasets``, ``/user/datasets``, ``/dataset`` and ``/pipelines`` only
+change when the catalog does, so their serialized responses are kept in a
+bounded in-process LRU. Every write that changes what these endpoints return
+calls ``bump_catalog_version``, which increments a counter in MongoDB (shared
+by all workers).
+
+The ETag of a response is derived from (route, user, params, catalog
+version) alone, so a conditional request whose ``If-None-Match`` matches is
+answered with ``304 Not Modified`` before anything is computed or serialized,
+and a cache entry can never outlive the version it was built for.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from app.config.settings import get_settings
+from app.db.database import counters_collection
+from app.utils.fast_json import render_model
+
+CATALOG_COUNTER = "catalog_version"
+
+
+class LRUCache:
+    """Thread-safe, size-bounded mapping that evicts the least recently used entry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Any, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Any, value: bytes) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+response_cache = LRUCache(get_settings().response_cache_max_entries)
+
+
+def catalog_version() -> int:
+    counter = counters_collection.find_one({"_id": CATALOG_COUNTER}, {"value": 1})
+    return counter["value"] if counter else 0
+
+
+def bump_catalog_version() -> None:
+    """Invalidate cached catalog responses and their ETags in every worker."""
+    counters_collection.update_one({"_id": CATALOG_COUNTER}, {"$inc": {"value": 1}}, upsert=True)
+
+
+def _etag(key: Tuple[Any, ...]) -> str:
+    return '"' + hashlib.sha256(repr(key).encode()).hexdigest()[:32] + '"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def cached_response(
+    request: Request,
+    route: str,
+    user_id: Any,
+    params: Dict[str, Any],
+    build: Callable[[], BaseModel],
+    media_type: str = "application/json",
+    render: Callable[[BaseModel], bytes] = render_model,
+) -> Response:
+    """
+    Serve a catalog response from the cache, building it on a miss.
+
+    Args:
+        request: Incoming request, for its If-None-Match header
+        route: Name of the endpoint
+        user_id: User the response is built for
+        params: Query parameters that affect the response
+        build: Computes the response model; data produced by the service
+            layer can be built with ``construct_trusted`` to skip validation
+        media_type: Negotiated response format; each format is cached separately
+        render: Encodes the response model as ``media_type``
+    """
+    key = (route, str(user_id), tuple(sorted(params.items())), media_type, catalog_version())
+    etag = _etag(key)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept"}
+
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    body = response_cache.get(key)
+    if body is None:
+        body = render(build())
+        response_cache.put(key, body)
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -0,0 +1,143 @@
+"""
+Mergeable approximate sketches for column statistics.
+
+- ``HyperLogLog`` estimates distinct counts (about 1.6% standard error with
+  the default precision of 12, i.e. 4 KB of registers).
+- ``KLLSketch`` estimates quantiles of numeric values with a few hundred
+  retained items.
+
+Both are built with vectorized numpy operations over a chunk of values, can
+be merged with sketches of other chunks, and round-trip through plain
+dictionaries so they can be stored in MongoDB.
+"""
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional
+
+
+def hash_values(values: pd.Series) -> np.ndarray:
+    """
+    Hash non-null values to 64-bit integers.
+
+    Numeric values are hashed as float64 so that 1 and 1.0 in different
+    chunks count as the same value.
+    """
+    values = values.dropna()
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        values = values.astype("float64")
+    else:
+        values = values.astype(str)
+    return pd.util.hash_pandas_object(values, index=False).to_numpy(dtype="uint64")
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """Vectorized int.bit_length() for uint64 arrays."""
+    lengths = np.zeros(values.shape, dtype=np.int64)
+    remaining = values.copy()
+    for shift in (32, 16, 8, 4, 2, 1):
+        mask = remaining >= (np.uint64(1) << np.uint64(shift))
+        lengths[mask] += shift
+        remaining[mask] >>= np.uint64(shift)
+    lengths += (remaining > 0)
+    return lengths
+
+
+class HyperLogLog:
+    def __init__(self, precision: int = 12, registers: Optional[np.ndarray] = None):
+        self.precision = precision
+        self.registers = registers if registers is not None else np.zeros(1 << precision, dtype=np.uint8)
+
+    def update_hashes(self, hashes: np.ndarray) -> None:
+        if hashes.size == 0:
+            return
+        value_bits = 64 - self.precision
+        index = (hashes >> np.uint64(value_bits)).astype(np.int64)
+        remainder = hashes & np.uint64((1 << value_bits) - 1)
+        rank = (value_bits - _bit_length(remainder) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        m = float(len(self.registers))
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"precision": self.precision, "registers": self.registers.tobytes()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "HyperLogLog":
+        registers = np.frombuffer(bytes(data["registers"]), dtype=np.uint8).copy()
+        return cls(precision=data["precision"], registers=registers)
+
+
+class KLLSketch:
+    def __init__(self, k: int = 200, levels: Optional[List[np.ndarray]] = None, count: int = 0, seed: Optional[int] = None):
+        self.k = k
+        self.levels = levels if levels is not None else [np.empty(0, dtype=np.float64)]
+        self.count = count
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                items = np.sort(items)
+                leftover = items[-1:] if len(items) % 2 else items[:0]
+                items = items[:len(items) - len(leftover)]
+                promoted = items[int(self._rng.integers(2))::2]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                self.levels[level] = leftover
+            level += 1
+
+    def update_many(self, values: np.ndarray) -> None:
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            return
+        self.levels[0] = np.concatenate([self.levels[0], values.astype(np.float64)])
+        self.count += int(values.size)
+        self._compress()
+
+    def merge(self, other: "KLLSketch") -> None:
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+
+    def quantiles(self, fractions: List[float]) -> List[Optional[float]]:
+        if self.count == 0:
+            return [None for _ in fractions]
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level_items), 2 ** level, dtype=np.float64)
+                                  for level, level_items in enumerate(self.levels)])
+        order = np.argsort(items)
+        items, cumulative = items[order], np.cumsum(weights[order])
+        targets = np.clip(np.asarray(fractions, dtype=np.float64), 0.0, 1.0) * cumulative[-1]
+        positions = np.minimum(np.searchsorted(cumulative, targets, side="left"), len(items) - 1)
+        return [float(items[position]) for position in positions]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"k": self.k, "count": self.count, "levels": [items.tolist() for items in self.levels]}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "KLLSketch":
+        levels = [np.asarray(items, dtype=np.float64) for items in data["levels"]]
+        return cls(k=data["k"], levels=levels, count=data["count"])
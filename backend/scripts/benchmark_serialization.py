@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark response serialization and compression for row-heavy payloads.
+
+Compares, for a catalog listing and a dataset row preview of configurable
+size:
+
+- the default path: validate the response model, ``jsonable_encoder`` and
+  ``json.dumps`` (what FastAPI does for a returned dict)
+- validated model rendered with ``FastJSONResponse`` (orjson)
+- validated model rendered with ``render_model`` (pydantic-core)
+- ``construct_trusted`` + ``render_model`` (no re-validation)
+
+and the response size uncompressed, gzip-compressed and brotli-compressed.
+
+    python scripts/benchmark_serialization.py --cards 5000 --rows 20000
+"""
+import argparse
+import gzip
+import os
+import sys
+import timeit
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from pydantic import BaseModel, Field  # noqa: E402
+
+from app.schemas.models import BrowseResponse  # noqa: E402
+from app.utils.compression_middleware import brotli  # noqa: E402
+from app.utils.fast_json import FastJSONResponse, construct_trusted, render_model  # noqa: E402
+
+
+class RowsResponse(BaseModel):
+    status: str = Field(..., description="Status of the request")
+    rows: List[Dict[str, Any]] = Field(..., description="Dataset rows")
+
+
+def card_payload(count: int) -> Dict[str, Any]:
+    updated_at = datetime.now(timezone.utc).isoformat()
+    return {"data": [
+        {
+            "dataset_id": f"{i:024x}",
+            "dataset_name": f"Dataset {i}",
+            "description": "Monthly rainfall and crop yield observations by district",
+            "pulled_from_pipeline": i % 3 == 0,
+            "updated_at": updated_at,
+            "user_emails": ["owner@example.org"],
+            "user_names": ["Data Owner"],
+        }
+        for i in range(count)
+    ]}
+
+
+def rows_payload(count: int) -> Dict[str, Any]:
+    return {"status": "success", "rows": [
+        {"district": f"District {i % 640}", "year": 2000 + i % 25, "rainfall_mm": 812.5 + i % 97,
+         "yield_t_ha": 2.75 + (i % 13) / 10, "irrigated": bool(i % 2)}
+        for i in range(count)
+    ]}
+
+
+def measure(name: str, serialize: Callable[[], bytes], repeat: int) -> bytes:
+    body = serialize()
+    seconds = min(timeit.repeat(serialize, number=1, repeat=repeat))
+    print(f"  {name:<34} {seconds * 1000:9.2f} ms")
+    return body
+
+
+def run(title: str, model: type, payload: Dict[str, Any], repeat: int) -> None:
+    print(f"{title}")
+    default = measure("validate + jsonable_encoder + json", lambda: JSONResponse(
+        jsonable_encoder(model.model_validate(payload))).body, repeat)
+    measure("validate + orjson", lambda: FastJSONResponse(
+        model.model_validate(payload).model_dump(mode="json", by_alias=True)).body, repeat)
+    measure("validate + render_model", lambda: render_model(model.model_validate(payload)), repeat)
+    fast = measure("construct_trusted + render_model", lambda: render_model(
+        construct_trusted(model, payload)), repeat)
+    assert len(fast) > 0 and len(default) > 0
+
+    sizes = [f"raw {len(fast):,} B", f"gzip {len(gzip.compress(fast, 6)):,} B"]
+    if brotli is not None:
+        sizes.append(f"brotli {len(brotli.compress(fast, quality=4)):,} B")
+    print("  size: " + ", ".join(sizes))
+    print()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cards", type=int, default=5000, help="Dataset cards in the catalog listing")
+    parser.add_argument("--rows", type=int, default=20000, help="Rows in the dataset preview")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing runs (the fastest is reported)")
+    args = parser.parse_args()
+
+    run(f"/datasets with {args.cards} cards", BrowseResponse, card_payload(args.cards), args.repeat)
+    run(f"rows response with {args.rows} rows", RowsResponse, rows_payload(args.rows), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+"""
+Shared test setup.
+
+Some modules read their settings on import, so the required ones get
+placeholder values before any ``app`` module is imported. No test talks to
+a real database or object store.
+"""
+import os
+
+os.environ.setdefault("MINIO_ENDPOINT", "localhost:9000")
+os.environ.setdefault("MINIO_ACCESS_KEY", "test-access-key")
+os.environ.setdefault("MINIO_SECRET_KEY", "test-secret-key")
@@ -0,0 +1,135 @@
+"""
+Multipart uploads of ``MinioStorageService`` against a stub SDK client.
+
+The service calls private multipart methods of the MinIO client, which is
+why minio is pinned to 7.x. The stub mirrors their 7.x signatures, and
+``test_stub_matches_sdk`` fails when the installed SDK no longer does.
+"""
+import inspect
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from minio import Minio
+
+from app.services.storage.base_storage import MIN_PART_SIZE
+from app.services.storage.minio_service import MinioStorageService
+
+UPLOAD_ID = "upload-1"
+
+
+class StubMinio:
+    """In-memory stand-in for the multipart methods of ``minio.Minio``."""
+
+    def __init__(self, parts_per_page: int = 2):
+        self.parts_per_page = parts_per_page
+        self.parts = {}
+        self.calls = []
+
+    def _create_multipart_upload(self, bucket_name, object_name, headers):
+        self.calls.append(("create", bucket_name, object_name, headers))
+        return UPLOAD_ID
+
+    def _upload_part(self, bucket_name, object_name, data, headers, upload_id, part_number):
+        if data == b"fail":
+            raise OSError("connection reset")
+        etag = f"etag-{part_number}"
+        self.parts[part_number] = SimpleNamespace(part_number=part_number, etag=etag, size=len(data))
+        return etag
+
+    def _list_parts(self, bucket_name, object_name, upload_id, max_parts=None, part_number_marker=None,
+                    extra_headers=None, extra_query_params=None):
+        self.calls.append(("list", part_number_marker))
+        numbers = sorted(number for number in self.parts if number > int(part_number_marker or 0))
+        page = numbers[:self.parts_per_page]
+        return SimpleNamespace(
+            parts=[self.parts[number] for number in page],
+            is_truncated=len(numbers) > len(page),
+            next_part_number_marker=str(page[-1]) if page else None,
+        )
+
+    def _complete_multipart_upload(self, bucket_name, object_name, upload_id, parts, ssec=None):
+        self.calls.append(("complete", bucket_name, object_name, upload_id,
+                           [(part.part_number, part.etag) for part in parts]))
+
+    def _abort_multipart_upload(self, bucket_name, object_name, upload_id):
+        self.calls.append(("abort", bucket_name, object_name, upload_id))
+
+    def get_presigned_url(self, method, bucket_name, object_name, expires=timedelta(days=7), response_headers=None,
+                          request_date=None, version_id=None, extra_query_params=None):
+        self.calls.append(("presign", method, bucket_name, object_name, expires, extra_query_params))
+        return f"http://minio.test/{bucket_name}/{object_name}"
+
+
+@pytest.fixture
+def storage():
+    service = MinioStorageService()
+    service.client = StubMinio()
+    return service
+
+
+@pytest.mark.parametrize("name", [
+    "_create_multipart_upload",
+    "_upload_part",
+    "_list_parts",
+    "_complete_multipart_upload",
+    "_abort_multipart_upload",
+    "get_presigned_url",
+])
+def test_stub_matches_sdk(name):
+    sdk = inspect.signature(getattr(Minio, name)).parameters
+    stub = inspect.signature(getattr(StubMinio, name)).parameters
+    assert list(sdk) == list(stub)
+
+
+def test_create_upload_and_list_parts(storage):
+    upload_id = storage.create_multipart_upload("a/b.csv")
+    assert upload_id == UPLOAD_ID
+    assert storage.client.calls[0] == ("create", storage.bucket, "a/b.csv", {"Content-Type": "application/octet-stream"})
+
+    for part_number in (3, 1, 2):
+        assert storage.upload_part("a/b.csv", upload_id, part_number, b"x" * part_number) == f"etag-{part_number}"
+
+    # Three parts over two pages
+    assert storage.list_uploaded_parts("a/b.csv", upload_id) == [
+        {"part_number": 1, "etag": "etag-1", "size": 1},
+        {"part_number": 2, "etag": "etag-2", "size": 2},
+        {"part_number": 3, "etag": "etag-3", "size": 3},
+    ]
+    assert [call for call in storage.client.calls if call[0] == "list"] == [("list", None), ("list", "2")]
+
+
+def test_presigned_part_url(storage):
+    url = storage.generate_part_upload_url("a/b.csv", UPLOAD_ID, 4)
+    assert url.endswith(f"/{storage.bucket}/a/b.csv")
+    assert storage.client.calls == [(
+        "presign", "PUT", storage.bucket, "a/b.csv", timedelta(seconds=storage.minio_presigned_url_expiry),
+        {"uploadId": UPLOAD_ID, "partNumber": "4"},
+    )]
+
+
+def test_complete_orders_parts(storage):
+    parts = [{"part_number": "2", "etag": "etag-2"}, {"part_number": 1, "etag": "etag-1"}]
+    assert storage.complete_multipart_upload("a/b.csv", UPLOAD_ID, parts) == f"{storage.bucket}/a/b.csv"
+    assert storage.client.calls == [
+        ("complete", storage.bucket, "a/b.csv", UPLOAD_ID, [(1, "etag-1"), (2, "etag-2")])]
+
+
+def test_abort(storage):
+    storage.abort_multipart_upload("a/b.csv", UPLOAD_ID)
+    assert storage.client.calls == [("abort", storage.bucket, "a/b.csv", UPLOAD_ID)]
+
+
+def test_upload_multipart(storage):
+    payload = b"a" * MIN_PART_SIZE + b"b" * MIN_PART_SIZE + b"c"
+    storage.upload_multipart(payload, "big.bin", MIN_PART_SIZE, max_workers=2)
+    assert storage.client.calls[-1] == (
+        "complete", storage.bucket, "big.bin", UPLOAD_ID, [(1, "etag-1"), (2, "etag-2"), (3, "etag-3")])
+    assert [storage.client.parts[number].size for number in (1, 2, 3)] == [MIN_PART_SIZE, MIN_PART_SIZE, 1]
+
+
+def test_upload_multipart_aborts_on_failure(storage):
+    with pytest.raises(OSError):
+        storage.upload_multipart(b"fail", "big.bin", MIN_PART_SIZE, max_workers=2)
+    assert storage.client.calls[-1] == ("abort", storage.bucket, "big.bin", UPLOAD_ID)
+    assert not any(call[0] == "complete" for call in storage.client.calls)
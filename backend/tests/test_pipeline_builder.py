@@ -0,0 +1,74 @@
+"""Compilation of structured row queries into aggregation pipelines."""
+import pytest
+
+from app.services.query.pipeline_builder import (
+    PipelineBuildError,
+    build_rows_pipeline,
+    map_result_rows,
+    result_column_types,
+)
+
+COLUMNS = ["a", "b.c", "$d"]
+
+
+def test_unknown_columns_are_rejected():
+    with pytest.raises(PipelineBuildError, match="Unknown columns: x"):
+        build_rows_pipeline("id", COLUMNS, filters=[{"column": "x", "op": "eq", "value": 1}])
+
+
+def test_unsupported_operator_and_aggregate():
+    with pytest.raises(PipelineBuildError):
+        build_rows_pipeline("id", COLUMNS, filters=[{"column": "a", "op": "like", "value": 1}])
+    with pytest.raises(PipelineBuildError):
+        build_rows_pipeline("id", COLUMNS, aggregates=[{"func": "median", "column": "a"}])
+
+
+def test_grouped_sort_must_use_output_columns():
+    with pytest.raises(PipelineBuildError):
+        build_rows_pipeline("id", COLUMNS, group_by=["a"], aggregates=[{"func": "count"}],
+                            sort=[{"column": "b.c"}])
+
+
+def test_fields_are_read_with_get_field():
+    pipeline, output_columns = build_rows_pipeline("id", COLUMNS, columns=["b.c", "$d"])
+    assert output_columns == ["b.c", "$d"]
+    projection = pipeline[-1]["$project"]
+    assert projection["c0"] == {"$getField": {"field": {"$literal": "b.c"}, "input": "$$CURRENT"}}
+    assert projection["c1"]["$getField"]["field"] == {"$literal": "$d"}
+
+
+def test_legacy_datasets_unwind_data():
+    pipeline, _ = build_rows_pipeline("id", COLUMNS)
+    assert pipeline[:2] == [{"$match": {"_id": "id"}}, {"$unwind": "$data"}]
+
+
+def test_columnar_page_reads_leading_chunks_only():
+    pipeline, _ = build_rows_pipeline("id", COLUMNS, columns=["a"], limit=10, offset=20, columnar=True)
+    assert pipeline[0] == {"$match": {"dataset_id": "id", "column": {"$in": ["a"]}, "row_offset": {"$lt": 30}}}
+
+
+def test_columnar_filtered_query_reads_referenced_columns():
+    pipeline, _ = build_rows_pipeline("id", COLUMNS, columns=["a"], filters=[{"column": "b.c", "op": "gt", "value": 1}],
+                                      columnar=True)
+    assert pipeline[0] == {"$match": {"dataset_id": "id", "column": {"$in": ["b.c", "a"]}}}
+
+
+def test_columnar_count_reads_one_column():
+    pipeline, output_columns = build_rows_pipeline("id", COLUMNS, aggregates=[{"func": "count"}], columnar=True)
+    assert output_columns == ["count"]
+    assert pipeline[0]["$match"]["column"] == {"$in": ["a"]}
+
+
+def test_map_result_rows():
+    assert map_result_rows([{"c0": 1, "c1": 2}, {"c0": 3}], ["a", "b"]) == [{"a": 1, "b": 2}, {"a": 3, "b": None}]
+
+
+def test_result_column_types():
+    column_types = {"a": "int", "b": "float", "s": "string"}
+    assert result_column_types(column_types, ["s", "a"]) == ["string", "int"]
+    aggregates = [{"func": "count"}, {"func": "sum", "column": "a"}, {"func": "sum", "column": "b"},
+                  {"func": "avg", "column": "a"}, {"func": "max", "column": "s"}]
+    assert result_column_types(column_types, [], ["s"], aggregates) == [
+        "string", "int", "int", "float", "float", "string"]
+    assert result_column_types(None, ["a"]) is None
+    assert result_column_types(column_types, ["missing"]) is None
@@ -0,0 +1,135 @@
+"""Block readers and column-type reconciliation used by background ingest jobs."""
+import gzip
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from app.services.ingest.readers import (
+    EmptyFileError,
+    apply_column_types,
+    column_types_schema,
+    detect,
+    iter_record_blocks,
+    merge_column_types,
+    sniff_compression,
+    sniff_format,
+)
+
+# Small blocks, so records and headers are cut across block boundaries
+BLOCK_SIZE = 16
+
+QUOTED_CSV = b"id,name\n" + b"".join(f'{i},"name\n{i}"\n'.encode() for i in range(20))
+
+
+def read_blocks(payload: bytes, file_format: str = "csv", **kwargs):
+    return list(iter_record_blocks(io.BytesIO(payload), file_format, BLOCK_SIZE, **kwargs))
+
+
+def concat(blocks) -> pd.DataFrame:
+    return pd.concat([df for df, _, _ in blocks], ignore_index=True)
+
+
+@pytest.mark.parametrize("payload", [b"", b"\n\n  \r\n"])
+def test_empty_csv_is_rejected(payload):
+    with pytest.raises(EmptyFileError):
+        read_blocks(payload)
+
+
+@pytest.mark.parametrize("payload", [b"id,name\n", b"id,name"])
+def test_header_only_csv_keeps_columns(payload):
+    blocks = read_blocks(payload)
+    assert len(blocks) == 1
+    df, consumed, header = blocks[0]
+    assert df.empty and list(df.columns) == ["id", "name"]
+    assert consumed == len(payload)
+
+
+def test_blank_lines_before_header_are_skipped():
+    df = concat(read_blocks(b"\n\nid,name\n1,a\n"))
+    assert df.to_dict(orient="list") == {"id": [1], "name": ["a"]}
+
+
+def test_csv_blocks_cover_file_with_quoted_newlines():
+    blocks = read_blocks(QUOTED_CSV)
+    assert len(blocks) > 1
+    assert sum(consumed for _, consumed, _ in blocks) == len(QUOTED_CSV)
+    df = concat(blocks)
+    assert df["id"].tolist() == list(range(20))
+    assert df["name"].tolist() == [f"name\n{i}" for i in range(20)]
+
+
+def test_ndjson_blocks_keep_late_columns():
+    payload = b"".join(f'{{"a": {i}}}\n'.encode() for i in range(4)) + b'{"a": 4, "late": "x"}\n'
+    blocks = read_blocks(payload, "ndjson")
+    assert sum(consumed for _, consumed, _ in blocks) == len(payload)
+    df = concat(blocks)
+    assert df["a"].tolist() == [0, 1, 2, 3, 4]
+    assert df["late"].isna().sum() == 4 and df["late"].iloc[-1] == "x"
+
+
+@pytest.mark.parametrize("stop_after", [1, 3, 5])
+def test_resume_from_checkpoint(stop_after):
+    """A read continued from a checkpoint (byte offset and header) returns the remaining rows exactly once."""
+    first = []
+    offset = 0
+    header = None
+    for df, consumed, header in iter_record_blocks(io.BytesIO(QUOTED_CSV), "csv", BLOCK_SIZE):
+        first.append(df)
+        offset += consumed
+        if len(first) == stop_after:
+            break
+
+    stream = io.BytesIO(QUOTED_CSV)
+    stream.seek(offset)
+    rest = [df for df, _, _ in iter_record_blocks(stream, "csv", BLOCK_SIZE, header=header)]
+
+    df = pd.concat(first + rest, ignore_index=True)
+    assert df["id"].tolist() == list(range(20))
+
+
+def test_column_types_agree_across_blocks():
+    blocks = read_blocks(b"n,x\n" + b"1,1\n" * 4 + b"2.5,a\n" * 4)
+    assert len(blocks) > 1
+    column_types = {}
+    for df, _, _ in blocks:
+        column_types = merge_column_types(column_types, df)
+    assert column_types == {"n": "float", "x": "string"}
+
+    for df, _, _ in blocks:
+        typed = apply_column_types(df, column_types)
+        assert str(typed["n"].dtype) == "float64"
+        assert all(isinstance(value, str) for value in typed["x"])
+
+
+def test_merge_column_types_counts_missing_columns_as_null():
+    column_types = merge_column_types({}, pd.DataFrame({"a": [1, 2]}))
+    column_types = merge_column_types(column_types, pd.DataFrame({"b": ["x"]}))
+    # An integer column with missing values becomes float, as in pandas
+    assert column_types == {"a": "float", "b": "string"}
+
+
+def test_column_types_schema():
+    schema = column_types_schema(["a", "b", "c"], {"a": "int", "b": "datetime"})
+    assert schema.types == [pa.int64(), pa.timestamp("ns", tz="UTC"), pa.string()]
+
+
+@pytest.mark.parametrize("head, filename, expected", [
+    (b"PAR1....", "", "parquet"),
+    (b"PK\x03\x04", "", "xlsx"),
+    (b'\xef\xbb\xbf {"a": 1}', "", "ndjson"),
+    (b"[{", "", "json"),
+    (b"a\tb\n", "data.txt", "csv"),
+    (b"a,b\n", "", "csv"),
+])
+def test_sniff_format(head, filename, expected):
+    assert sniff_format(head, filename) == expected
+
+
+def test_detect_gzip():
+    payload = b'{"a": 1}\n{"a": 2}\n'
+    file_format, compression, stream = detect(io.BytesIO(gzip.compress(payload)), "upload.bin")
+    assert (file_format, compression) == ("ndjson", "gzip")
+    assert stream.read() == payload
+    assert sniff_compression(b"a,b") is None
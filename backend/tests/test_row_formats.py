@@ -0,0 +1,72 @@
+"""Content negotiation and encodings of row-returning endpoints."""
+import json
+
+import pyarrow as pa
+import pytest
+
+from app.services.query.row_formats import (
+    ARROW_STREAM,
+    COLUMNAR_JSON,
+    JSON,
+    MSGPACK,
+    NotAcceptableError,
+    encode_columns,
+    encode_rows,
+    negotiate_row_format,
+    row_columns,
+)
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, JSON),
+    ("", JSON),
+    ("*/*", JSON),
+    ("application/*", JSON),
+    (COLUMNAR_JSON, COLUMNAR_JSON),
+    ("text/html, application/vnd.apache.arrow.stream", ARROW_STREAM),
+    # Quality first, then order in the header
+    ("application/json;q=0.5, application/vnd.columnar+json;q=0.9", COLUMNAR_JSON),
+    ("application/vnd.columnar+json, application/json", COLUMNAR_JSON),
+    ("application/json, application/vnd.columnar+json", JSON),
+    ("Application/JSON", JSON),
+    ("application/vnd.columnar+json;q=0, application/json;q=0.1", JSON),
+])
+def test_negotiate_row_format(accept, expected):
+    assert negotiate_row_format(accept) == expected
+
+
+@pytest.mark.parametrize("accept", ["text/csv", "application/json;q=0", "text/html, image/png"])
+def test_negotiate_rejects_unsupported(accept):
+    with pytest.raises(NotAcceptableError):
+        negotiate_row_format(accept)
+
+
+def test_msgpack_alias():
+    pytest.importorskip("msgpack")
+    assert negotiate_row_format("application/x-msgpack") == MSGPACK
+
+
+def test_row_columns_in_first_seen_order():
+    assert row_columns([{"b": 1}, {"a": 2, "b": 3}, {"c": 4}]) == ["b", "a", "c"]
+
+
+def test_columnar_json():
+    body = json.loads(encode_rows(COLUMNAR_JSON, ["a", "b"], [{"a": 1, "b": float("nan")}, {"a": 2}],
+                                  {"row_count": 2}))
+    assert body == {"row_count": 2, "columns": ["a", "b"], "data": [[1, None], [2, None]]}
+
+
+def test_msgpack():
+    msgpack = pytest.importorskip("msgpack")
+    body = msgpack.unpackb(encode_columns(MSGPACK, ["a"], [[1, 2]], {"row_count": 2}))
+    assert body == {"row_count": 2, "columns": ["a"], "data": [[1], [2]]}
+
+
+def test_arrow_stream_keeps_fields_and_nulls_non_finite():
+    payload = encode_rows(ARROW_STREAM, ["a", "b", "a"], [[1, float("inf"), "x"], [2, 1.5, 3]], {"row_count": 2})
+    table = pa.ipc.open_stream(payload).read_all()
+    assert table.column_names == ["a", "b", "a"]
+    assert table.column(1).to_pylist() == [None, 1.5]
+    # Mixed types are sent as strings
+    assert table.column(2).to_pylist() == ["x", "3"]
+    assert json.loads(table.schema.metadata[b"response"]) == {"row_count": 2}